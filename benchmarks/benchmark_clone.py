@@ -0,0 +1,33 @@
+"""
+Compare the time to copy water network models with WaterNetworkModel.clone
+and with copy.deepcopy.
+
+Run from the repository directory:
+    python benchmarks/benchmark_clone.py
+"""
+import copy
+import os
+import time
+import wntr
+
+networks_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'examples', 'networks')
+repeat = 7
+
+for name in ['Net3.inp', 'Net6.inp']:
+    wn = wntr.network.WaterNetworkModel(os.path.join(networks_dir, name))
+
+    # Best of several runs, to limit the effect of other processes
+    clone_time = float('inf')
+    deepcopy_time = float('inf')
+    for i in range(repeat):
+        tic = time.time()
+        wn.clone()
+        clone_time = min(clone_time, time.time() - tic)
+        tic = time.time()
+        copy.deepcopy(wn)
+        deepcopy_time = min(deepcopy_time, time.time() - tic)
+
+    print('%s (%d nodes, %d links): clone %.4f s, deepcopy %.4f s, %.1fx faster' %
+          (name, wn.num_nodes, wn.num_links, clone_time, deepcopy_time,
+           deepcopy_time/clone_time))
@@ -0,0 +1,50 @@
+"""
+Compare the memory used by a water network model and the time to query
+link attributes and compute the annual network cost, with and without
+columnar storage.
+
+Run from the repository directory:
+    python benchmarks/benchmark_columnar_storage.py
+"""
+import gc
+import os
+import time
+import tracemalloc
+import wntr
+
+networks_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'examples', 'networks')
+repeat = 5
+
+def best_time(function):
+    run_time = float('inf')
+    for i in range(repeat):
+        tic = time.time()
+        function()
+        run_time = min(run_time, time.time() - tic)
+    return run_time
+
+for name in ['Net3.inp', 'Net6.inp']:
+    inp_file = os.path.join(networks_dir, name)
+    for columnar in [False, True]:
+        gc.collect()
+        tracemalloc.start()
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        if columnar:
+            wn.enable_columnar_storage()
+        gc.collect()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # Changing the model each time defeats the cached query results
+        pipe = wn.get_link(wn.pipe_name_list[0])
+        def query():
+            pipe.diameter = pipe.diameter
+            wn.query_link_attribute('diameter', link_type=wntr.network.Pipe)
+        query_time = best_time(query)
+        cost_time = best_time(lambda: wntr.metrics.annual_network_cost(wn))
+
+        print('%s (%d nodes, %d links), columnar=%s: %.1f MB, query %.4f s, '
+              'network cost %.4f s' % (name, wn.num_nodes, wn.num_links, columnar,
+              memory/1e6, query_time, cost_time))
+        del wn, pipe
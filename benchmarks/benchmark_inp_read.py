@@ -0,0 +1,52 @@
+"""
+Time reading INP files of square grid networks of increasing size, to check
+that the reader scales linearly with the number of elements.
+
+Run from the repository directory:
+    python benchmarks/benchmark_inp_read.py
+"""
+import os
+import shutil
+import tempfile
+import time
+import wntr
+
+repeat = 3
+
+def write_grid_inp(filename, n):
+    with open(filename, 'w') as f:
+        f.write('[JUNCTIONS]\n')
+        for i in range(n):
+            for j in range(n):
+                f.write(' J%d_%d\t%.1f\t%.1f\t1\n' % (i, j, 100+i, 1+(i*j)%7))
+        f.write('\n[RESERVOIRS]\n R1\t300\n\n[PIPES]\n P_R\tR1\tJ0_0\t100\t24\t100\n')
+        k = 0
+        for i in range(n):
+            for j in range(n):
+                if j+1 < n:
+                    f.write(' P%d\tJ%d_%d\tJ%d_%d\t500\t12\t100\t0\tOpen\n' % (k, i, j, i, j+1))
+                    k += 1
+                if i+1 < n:
+                    f.write(' P%d\tJ%d_%d\tJ%d_%d\t400\t8\t110\n' % (k, i, j, i+1, j))
+                    k += 1
+        f.write('\n[PATTERNS]\n 1\t1.0\t1.2\t0.8\n\n[COORDINATES]\n')
+        for i in range(n):
+            for j in range(n):
+                f.write(' J%d_%d\t%d\t%d\n' % (i, j, i*100, j*100))
+        f.write('\n[OPTIONS]\n Units\tGPM\n\n[END]\n')
+
+tempdir = tempfile.mkdtemp()
+try:
+    for n in [20, 40, 80, 160]:
+        inp_file = os.path.join(tempdir, 'grid%d.inp' % n)
+        write_grid_inp(inp_file, n)
+        run_time = float('inf')
+        for i in range(repeat):
+            tic = time.time()
+            wn = wntr.network.WaterNetworkModel(inp_file)
+            run_time = min(run_time, time.time() - tic)
+        num_elements = wn.num_nodes + wn.num_links
+        print('%dx%d grid (%d nodes, %d links): %.3f s, %.1f us per element' % (n, n,
+              wn.num_nodes, wn.num_links, run_time, 1e6*run_time/num_elements))
+finally:
+    shutil.rmtree(tempdir)
@@ -0,0 +1,50 @@
+"""
+Time the count of links in simple paths from the sources (reservoirs and
+tanks) to the junctions of large networks, on an acyclic graph and on
+looped graphs.
+
+Run from the repository directory:
+    python benchmarks/benchmark_links_in_simple_paths.py
+"""
+import os
+import time
+import wntr
+from wntr.metrics.topographic import _links_in_simple_paths
+
+networks_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            '..', 'examples', 'networks')
+
+def run(label, G, wn, **kwds):
+    sources = wn.reservoir_name_list + wn.tank_name_list
+    tic = time.time()
+    link_count = _links_in_simple_paths(G, sources, wn.junction_name_list, **kwds)
+    run_time = time.time() - tic
+    print('%s: %.2f s, %s counts, total %.4g' % (label, run_time,
+          'exact' if link_count.dtype.kind == 'i' else 'estimated', link_count.sum()))
+
+# Net6 (3356 nodes, 3892 links)
+wn = wntr.network.WaterNetworkModel(os.path.join(networks_dir, 'Net6.inp'))
+wn.options.time.duration = 0
+results = wntr.sim.EpanetSimulator(wn).run_sim()
+flowrate = results.link['flowrate'].loc[0, :]
+
+# Acyclic, counted exactly
+G = wn.get_graph(link_weight=flowrate, modify_direction=True)
+run('Net6 directed by flow', G, wn)
+
+# Directed by the link definition, with looped components
+G = wn.get_graph()
+run('Net6 directed by link definition', G, wn, max_paths=1000)
+
+# Undirected, one looped component that is estimated by sampling
+G = wn.get_graph().to_undirected()
+for num_samples in [10, 100, 1000]:
+    run('Net6 undirected, %d samples' % num_samples, G, wn,
+        num_samples=num_samples, seed=123)
+
+# Net3 (97 nodes, 119 links) undirected
+wn = wntr.network.WaterNetworkModel(os.path.join(networks_dir, 'Net3.inp'))
+G = wn.get_graph().to_undirected()
+for num_samples in [100, 1000]:
+    run('Net3 undirected, %d samples' % num_samples, G, wn,
+        num_samples=num_samples, seed=123)
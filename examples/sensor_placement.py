@@ -17,41 +17,21 @@ import wntr
 inp_file = 'networks/Net1.inp'
 wn = wntr.network.WaterNetworkModel(inp_file)
 
-# Run trace simulations (one from each junction) and extract data needed for 
-# sensor placement optimization. You can run this step once, save the data to a 
-# file, and reload the file for sensor placement
+# Run trace simulations (one from each junction) and extract the minimum 
+# detection time for each scenario-sensor pair. Hydraulics are solved once and 
+# each trace simulation only reruns water quality.  Sensors detect a scenario
+# when the trace concentration exceeds the threshold.  You can run this step 
+# once, save the data to a file, and reload the file for sensor placement
 scenario_names = wn.junction_name_list
-sim = wntr.sim.EpanetSimulator(wn)
-sim.run_sim(save_hyd = True)
-wn.options.quality.mode = 'TRACE'
-signal = pd.DataFrame()
-for inj_node in scenario_names:
-    print(inj_node)
-    wn.options.quality.trace_node = inj_node
-    sim_results = sim.run_sim(use_hyd = True)
-    trace = sim_results.node['quality']
-    trace = trace.stack()
-    trace = trace.reset_index()
-    trace.columns = ['T', 'Node', inj_node]
-    signal = signal.combine_first(trace)
-signal.to_csv('signal.csv')
-
-# Define feasible sensors using location, sample times, and detection threshold
 sensor_names = wn.junction_name_list
 sample_times = np.arange(0, wn.options.time.duration, wn.options.time.hydraulic_timestep)
 threshold = 20
-sensors = {}
-for location in sensor_names:
-    position = chama.sensors.Stationary(location)
-    detector = chama.sensors.Point(threshold, sample_times)
-    stationary_pt_sensor = chama.sensors.Sensor(position, detector)
-    sensors[location] = stationary_pt_sensor
-
-# Extract minimum detection time for each scenario-sensor pair
-det_times = chama.impact.extract_detection_times(signal, sensors)
-det_time_stats = chama.impact.detection_time_stats(det_times)
-min_det_time = det_time_stats[['Scenario','Sensor','Min']]
-min_det_time.rename(columns = {'Min':'Impact'}, inplace = True)
+sim = wntr.sim.ContaminationImpactSimulator(wn)
+impact = sim.run_sim(scenarios=scenario_names, sensors=sensor_names, 
+                     quality_type='TRACE', detection_limit=threshold)
+min_det_time = impact.to_long()[['Scenario','Sensor','Detection time']]
+min_det_time = min_det_time.rename(columns = {'Detection time':'Impact'})
+min_det_time.to_csv('min_det_time.csv')
 
 # Run sensor placement optimization to minimize detection time using 0 to 5 sensors
 #   The impact for undetected scenarios is set at 1.5x the max sample time
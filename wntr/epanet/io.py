@@ -7,6 +7,8 @@ The wntr.epanet.io module contains methods for reading/writing EPANET input and
 
     InpFile
     BinFile
+    BinFileArray
+    BinFileMemmap
 
 ----
 
@@ -24,6 +26,10 @@ import warnings
 import numpy as np
 import pandas as pd
 import difflib
+import copy
+import gc
+import hashlib
+import time
 from collections import OrderedDict
 
 #from .time_utils import run_lineprofile
@@ -41,6 +47,7 @@ from wntr.network.controls import OrCondition, AndCondition, Control, ControlAct
 from .util import FlowUnits, MassUnits, HydParam, QualParam, MixType, ResultType, EN
 from .util import to_si, from_si
 from .util import StatisticsType, QualType, PressureUnits
+from wntr.sim.results import ElementResults
 
 logger = logging.getLogger(__name__)
 
@@ -236,6 +243,7 @@ class InpFile(object):
         self.flow_units = None
         self.top_comments = []
         self.curves = OrderedDict()
+        self._last_write = None
 
     def read(self, inp_files, wn=None):
         """
@@ -276,8 +284,7 @@ class InpFile(object):
                 lnum += 1
                 edata['lnum'] = lnum
                 line = line.strip()
-                nwords = len(line.split())
-                if len(line) == 0 or nwords == 0:
+                if not line:
                     # Blank line
                     continue
                 elif line.startswith('['):
@@ -303,82 +310,90 @@ class InpFile(object):
                 # We have text, and we are in a section
                 self.sections[section].append((lnum, line))
 
-        # Parse each of the sections
-        # The order of operations is important as certain things require prior knowledge
+        # Building the element objects allocates many small containers; pause
+        # the cyclic garbage collector so large models parse in linear time
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            # Parse each of the sections
+            # The order of operations is important as certain things require prior knowledge
 
-        ### OPTIONS
-        self._read_options()
+            ### OPTIONS
+            self._read_options()
 
-        ### TIMES
-        self._read_times()
+            ### TIMES
+            self._read_times()
 
-        ### CURVES
-        self._read_curves()
+            ### CURVES
+            self._read_curves()
 
-        ### PATTERNS
-        self._read_patterns()
+            ### PATTERNS
+            self._read_patterns()
 
-        ### JUNCTIONS
-        self._read_junctions()
+            ### JUNCTIONS
+            self._read_junctions()
 
-        ### RESERVOIRS
-        self._read_reservoirs()
+            ### RESERVOIRS
+            self._read_reservoirs()
 
-        ### TANKS
-        self._read_tanks()
+            ### TANKS
+            self._read_tanks()
 
-        ### PIPES
-        self._read_pipes()
+            ### PIPES
+            self._read_pipes()
 
-        ### PUMPS
-        self._read_pumps()
+            ### PUMPS
+            self._read_pumps()
 
-        ### VALVES
-        self._read_valves()
+            ### VALVES
+            self._read_valves()
 
-        ### COORDINATES
-        self._read_coordinates()
+            ### COORDINATES
+            self._read_coordinates()
 
-        ### SOURCES
-        self._read_sources()
+            ### SOURCES
+            self._read_sources()
 
-        ### STATUS
-        self._read_status()
+            ### STATUS
+            self._read_status()
 
-        ### CONTROLS
-        self._read_controls()
+            ### CONTROLS
+            self._read_controls()
 
-        ### RULES
-        self._read_rules()
+            ### RULES
+            self._read_rules()
 
-        ### REACTIONS
-        self._read_reactions()
+            ### REACTIONS
+            self._read_reactions()
 
-        ### TITLE
-        self._read_title()
+            ### TITLE
+            self._read_title()
 
-        ### ENERGY
-        self._read_energy()
+            ### ENERGY
+            self._read_energy()
 
-        ### DEMANDS
-        self._read_demands()
+            ### DEMANDS
+            self._read_demands()
 
-        ### EMITTERS
-        self._read_emitters()
+            ### EMITTERS
+            self._read_emitters()
         
-        ### QUALITY
-        self._read_quality()
+            ### QUALITY
+            self._read_quality()
 
-        self._read_mixing()
-        self._read_report()
-        self._read_vertices()
-        self._read_labels()
+            self._read_mixing()
+            self._read_report()
+            self._read_vertices()
+            self._read_labels()
 
-        ### Parse Backdrop
-        self._read_backdrop()
+            ### Parse Backdrop
+            self._read_backdrop()
 
-        ### TAGS
-        self._read_tags()
+            ### TAGS
+            self._read_tags()
+        finally:
+            if gc_enabled:
+                gc.enable()
 
         # Set the _inpfile io data inside the water network, so it is saved somewhere
         wn._inpfile = self
@@ -392,6 +407,11 @@ class InpFile(object):
         """
         Write a water network model into an EPANET INP file.
 
+        The file is assembled in memory and a fingerprint of its contents is
+        kept. If the same file is written again with identical contents, and
+        has not been modified on disk since, it is left untouched (including
+        the creation timestamp in its header).
+
         Parameters
         ----------
         filename : str
@@ -419,40 +439,66 @@ class InpFile(object):
             self.flow_units = FlowUnits.GPM
         if self.mass_units is None:
             self.mass_units = MassUnits.mg
-        with io.open(filename, 'wb') as f:
-            self._write_title(f, wn)
-            self._write_junctions(f, wn)
-            self._write_reservoirs(f, wn)
-            self._write_tanks(f, wn)
-            self._write_pipes(f, wn)
-            self._write_pumps(f, wn)
-            self._write_valves(f, wn)
-
-            self._write_tags(f, wn)
-            self._write_demands(f, wn)
-            self._write_status(f, wn)
-            self._write_patterns(f, wn)
-            self._write_curves(f, wn)
-            self._write_controls(f, wn)
-            self._write_rules(f, wn)
-            self._write_energy(f, wn)
-            self._write_emitters(f, wn)
-
-            self._write_quality(f, wn)
-            self._write_sources(f, wn)
-            self._write_reactions(f, wn)
-            self._write_mixing(f, wn)
-
-            self._write_times(f, wn)
-            self._write_report(f, wn)
-            self._write_options(f, wn)
-
-            self._write_coordinates(f, wn)
-            self._write_vertices(f, wn)
-            self._write_labels(f, wn)
-            self._write_backdrop(f, wn)
-
-            self._write_end(f, wn)
+        f = io.BytesIO()
+        self._write_title(f, wn)
+        self._write_junctions(f, wn)
+        self._write_reservoirs(f, wn)
+        self._write_tanks(f, wn)
+        self._write_pipes(f, wn)
+        self._write_pumps(f, wn)
+        self._write_valves(f, wn)
+
+        self._write_tags(f, wn)
+        self._write_demands(f, wn)
+        self._write_status(f, wn)
+        self._write_patterns(f, wn)
+        self._write_curves(f, wn)
+        self._write_controls(f, wn)
+        self._write_rules(f, wn)
+        self._write_energy(f, wn)
+        self._write_emitters(f, wn)
+
+        self._write_quality(f, wn)
+        self._write_sources(f, wn)
+        self._write_reactions(f, wn)
+        self._write_mixing(f, wn)
+
+        self._write_times(f, wn)
+        self._write_report(f, wn)
+        self._write_options(f, wn)
+
+        self._write_coordinates(f, wn)
+        self._write_vertices(f, wn)
+        self._write_labels(f, wn)
+        self._write_backdrop(f, wn)
+
+        self._write_end(f, wn)
+
+        # The header holds a creation timestamp, so it is left out of the fingerprint
+        contents = f.getvalue()
+        fingerprint = hashlib.md5(contents)
+        fingerprint.update(str(wn.name).encode('utf-8'))
+        fingerprint = fingerprint.hexdigest()
+        if self._is_unchanged(filename, fingerprint):
+            return
+        with io.open(filename, 'wb') as fout:
+            self._write_header(fout, wn)
+            fout.write(contents)
+        stat = os.stat(filename)
+        self._last_write = (os.path.abspath(filename), fingerprint, stat.st_size, stat.st_mtime)
+
+    def _is_unchanged(self, filename, fingerprint):
+        """Check if filename still holds the last contents written by this object"""
+        if self._last_write is None:
+            return False
+        last_filename, last_fingerprint, size, mtime = self._last_write
+        if last_filename != os.path.abspath(filename) or last_fingerprint != fingerprint:
+            return False
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return False
+        return stat.st_size == size and stat.st_mtime == mtime
 
     ### Network Components
 
@@ -466,48 +512,94 @@ class InpFile(object):
             lines.append(line)
         self.wn.title = lines
 
-    def _write_title(self, f, wn):
+    def _write_header(self, f, wn):
         if wn.name is not None:
             f.write('; Filename: {0}\n'.format(wn.name).encode('ascii'))
             f.write('; WNTR: {}\n; Created: {:%Y-%m-%d %H:%M:%S}\n'.format(wntr.__version__, datetime.datetime.now()).encode('ascii'))
+
+    def _write_title(self, f, wn):
         f.write('[TITLE]\n'.encode('ascii'))
         if hasattr(wn, 'title'):
             for line in wn.title:
                 f.write('{}\n'.format(line).encode('ascii'))
         f.write('\n'.encode('ascii'))
 
+    def _section_columns(self, section, nfields):
+        """Tokenize a section into columns of strings.
+
+        Comments are removed, and missing optional fields are None.
+
+        Parameters
+        ----------
+        section : str
+            Section name, e.g. '[PIPES]'
+        nfields : int
+            Number of fields (columns) to return
+
+        Returns
+        -------
+        lnums : list of int
+            Line number of each entry
+        columns : list of tuples
+            The string values of each field
+
+        """
+        lnums = []
+        rows = []
+        for lnum, line in self.sections[section]:
+            current = line.split(';', 1)[0].split()
+            if current:
+                lnums.append(lnum)
+                rows.append(current)
+        columns = list(six.moves.zip_longest(*rows))[:nfields]
+        while len(columns) < nfields:
+            columns.append((None,)*len(rows))
+        return lnums, columns
+
+    def _float_column(self, section, lnums, values, default=None):
+        """Convert a column of strings to a float array.
+
+        Missing values are replaced by `default`, or raise an IndexError with
+        the line number if no default is given.  Values that are not numbers
+        raise a ValueError with the line number.
+
+        """
+        if None in values:
+            if default is None:
+                lnum = lnums[values.index(None)]
+                raise IndexError('%s line %d: missing required value' % (section, lnum))
+            values = [default if value is None else value for value in values]
+        try:
+            return np.fromiter(map(float, values), dtype=float, count=len(values))
+        except ValueError:
+            for lnum, value in zip(lnums, values):
+                if not _is_number(value):
+                    raise ValueError('%s line %d: invalid number "%s"' % (section, lnum, value))
+            raise
+
     def _read_junctions(self):
-#        try:
-            for lnum, line in self.sections['[JUNCTIONS]']:
-                line = line.split(';')[0]
-                current = line.split()
-                if current == []:
-                    continue
-                if len(current) > 3:
-                    pat = current[3]
-                elif self.wn.options.hydraulic.pattern:
-                    pat = self.wn.options.hydraulic.pattern
-                else:
-                    pat = self.wn.patterns.default_pattern
-                base_demand = 0.0
-                if len(current) > 2:
-                    base_demand = to_si(self.flow_units, float(current[2]), HydParam.Demand)
-                self.wn.add_junction(current[0],
-                                base_demand,
-                                pat,
-                                to_si(self.flow_units, float(current[1]), HydParam.Elevation),
-                                demand_category=None)
-#        except Exception as e:
-#            print(line)
-#            raise e
+        lnums, (names, elevation, base_demand, pattern) = self._section_columns('[JUNCTIONS]', 4)
+        elevation = HydParam.Elevation._to_si(self.flow_units, self._float_column('[JUNCTIONS]', lnums, elevation))
+        base_demand = HydParam.Demand._to_si(self.flow_units, self._float_column('[JUNCTIONS]', lnums, base_demand, '0.0'))
+        if self.wn.options.hydraulic.pattern:
+            default_pattern = self.wn.options.hydraulic.pattern
+        else:
+            default_pattern = self.wn.patterns.default_pattern
+        pattern = [default_pattern if pat is None else pat for pat in pattern]
+        self.wn._node_reg._add_junctions(names, base_demand.tolist(), pattern, elevation.tolist())
 
     def _write_junctions(self, f, wn):
         f.write('[JUNCTIONS]\n'.encode('ascii'))
         f.write(_JUNC_LABEL.format(';ID', 'Elevation', 'Demand', 'Pattern').encode('ascii'))
         nnames = list(wn.junction_name_list)
         # nnames.sort()
+        nodes = wn.nodes
+        default_pattern = wn.options.hydraulic.pattern
+        elevations = []
+        demands = []
+        patterns = []
         for junction_name in nnames:
-            junction = wn.nodes[junction_name]
+            junction = nodes[junction_name]
             if junction.demand_timeseries_list:
                 base_demands = junction.demand_timeseries_list.base_demand_list()
                 demand_patterns = junction.demand_timeseries_list.pattern_list()
@@ -516,7 +608,7 @@ class InpFile(object):
                 else:
                     base_demand = 0.0
                 if demand_patterns:
-                    if demand_patterns[0] == wn.options.hydraulic.pattern:
+                    if demand_patterns[0] == default_pattern:
                         demand_pattern = None
                     else:
                         demand_pattern = demand_patterns[0]
@@ -525,15 +617,16 @@ class InpFile(object):
             else:
                 base_demand = 0.0
                 demand_pattern = None
-            E = {'name': junction_name,
-                 'elev': from_si(self.flow_units, junction.elevation, HydParam.Elevation),
-                 'dem': from_si(self.flow_units, base_demand, HydParam.Demand),
-                 'pat': '',
-                 'com': ';'}
-            if demand_pattern is not None:
-                E['pat'] = str(demand_pattern)
-            f.write(_JUNC_ENTRY.format(**E).encode('ascii'))
-        f.write('\n'.encode('ascii'))
+            elevations.append(junction.elevation)
+            demands.append(base_demand)
+            patterns.append('' if demand_pattern is None else str(demand_pattern))
+        elevations = self._from_si_column(elevations, HydParam.Elevation)
+        demands = self._from_si_column(demands, HydParam.Demand)
+        entry = _JUNC_ENTRY.format
+        lines = [entry(name=name, elev=elev, dem=dem, pat=pat, com=';') for name, elev, dem, pat
+                 in zip(nnames, elevations, demands, patterns)]
+        lines.append('\n')
+        f.write(''.join(lines).encode('ascii'))
 
     def _read_reservoirs(self):
         for lnum, line in self.sections['[RESERVOIRS]']:
@@ -617,30 +710,30 @@ class InpFile(object):
         f.write('\n'.encode('ascii'))
 
     def _read_pipes(self):
-        for lnum, line in self.sections['[PIPES]']:
-            line = line.split(';')[0]
-            current = line.split()
-            if current == []:
-                continue
-            if current[7].upper() == 'CV':
-                self.wn.add_pipe(current[0],
-                            current[1],
-                            current[2],
-                            to_si(self.flow_units, float(current[3]), HydParam.Length),
-                            to_si(self.flow_units, float(current[4]), HydParam.PipeDiameter),
-                            float(current[5]),
-                            float(current[6]),
-                            LinkStatus.Open,
-                            True)
+        lnums, columns = self._section_columns('[PIPES]', 8)
+        names, node1, node2, length, diameter, roughness, minor_loss, status = columns
+        length = HydParam.Length._to_si(self.flow_units, self._float_column('[PIPES]', lnums, length))
+        diameter = HydParam.PipeDiameter._to_si(self.flow_units, self._float_column('[PIPES]', lnums, diameter))
+        roughness = self._float_column('[PIPES]', lnums, roughness)
+        minor_loss = self._float_column('[PIPES]', lnums, minor_loss, '0.0')
+        if None in node2:
+            raise IndexError('[PIPES] line %d: missing required value' % lnums[node2.index(None)])
+        statuses = []
+        check_valves = []
+        for lnum, value in zip(lnums, status):
+            value = 'OPEN' if value is None else value.upper()
+            if value == 'CV':
+                statuses.append(LinkStatus.Open)
+                check_valves.append(True)
             else:
-                self.wn.add_pipe(current[0],
-                            current[1],
-                            current[2],
-                            to_si(self.flow_units, float(current[3]), HydParam.Length),
-                            to_si(self.flow_units, float(current[4]), HydParam.PipeDiameter),
-                            float(current[5]),
-                            float(current[6]),
-                            LinkStatus[current[7].upper()])
+                try:
+                    statuses.append(LinkStatus[value])
+                except KeyError:
+                    raise KeyError('[PIPES] line %d: invalid status "%s"' % (lnum, value))
+                check_valves.append(False)
+        self.wn._link_reg._add_pipes(names, node1, node2, length.tolist(), diameter.tolist(),
+                                     roughness.tolist(), minor_loss.tolist(), statuses, check_valves)
+        self.wn._check_valves.extend([name for name, cv in zip(names, check_valves) if cv])
 
     def _write_pipes(self, f, wn):
         f.write('[PIPES]\n'.encode('ascii'))
@@ -648,21 +741,24 @@ class InpFile(object):
                                    'Roughness', 'Minor Loss', 'Status').encode('ascii'))
         lnames = list(wn.pipe_name_list)
         # lnames.sort()
-        for pipe_name in lnames:
-            pipe = wn.links[pipe_name]
-            E = {'name': pipe_name,
-                 'node1': pipe.start_node_name,
-                 'node2': pipe.end_node_name,
-                 'len': from_si(self.flow_units, pipe.length, HydParam.Length),
-                 'diam': from_si(self.flow_units, pipe.diameter, HydParam.PipeDiameter),
-                 'rough': pipe.roughness,
-                 'mloss': pipe.minor_loss,
-                 'status': str(pipe.initial_status),
-                 'com': ';'}
-            if pipe.cv:
-                E['status'] = 'CV'
-            f.write(_PIPE_ENTRY.format(**E).encode('ascii'))
-        f.write('\n'.encode('ascii'))
+        links = wn.links
+        pipes = [links[pipe_name] for pipe_name in lnames]
+        lengths = self._from_si_column([pipe.length for pipe in pipes], HydParam.Length)
+        diameters = self._from_si_column([pipe.diameter for pipe in pipes], HydParam.PipeDiameter)
+        entry = _PIPE_ENTRY.format
+        lines = []
+        for pipe_name, pipe, length, diameter in zip(lnames, pipes, lengths, diameters):
+            lines.append(entry(name=pipe_name, node1=pipe.start_node_name, node2=pipe.end_node_name,
+                               len=length, diam=diameter, rough=pipe.roughness, mloss=pipe.minor_loss,
+                               status='CV' if pipe.cv else str(pipe.initial_status), com=';'))
+        lines.append('\n')
+        f.write(''.join(lines).encode('ascii'))
+
+    def _from_si_column(self, values, param):
+        """Convert a list of SI values with a single vectorized call, returning floats"""
+        if len(values) == 0:
+            return []
+        return from_si(self.flow_units, np.array(values, dtype=float), param).tolist()
 
     def _read_pumps(self):
         def create_curve(curve_name):
@@ -938,7 +1034,7 @@ class InpFile(object):
         for pattern_name in patterns:
             pattern = wn.get_pattern(pattern_name)
             count = 0
-            for i in pattern.multipliers:
+            for i in pattern._multipliers:
                 if count % num_columns == 0:
                     f.write('\n{:s} {:f}'.format(pattern_name, i).encode('ascii'))
                 else:
@@ -1936,24 +2032,25 @@ class InpFile(object):
     ### Network Map/Tags
 
     def _read_coordinates(self):
-        for lnum, line in self.sections['[COORDINATES]']:
-            line = line.split(';')[0]
-            current = line.split()
-            if current == []:
-                continue
-#            assert(len(current) == 3), ("Error reading node coordinates. Check format.")
-            node = self.wn.get_node(current[0])
-            node.coordinates = (float(current[1]), float(current[2]))
+        lnums, (names, x, y) = self._section_columns('[COORDINATES]', 3)
+        x = self._float_column('[COORDINATES]', lnums, x).tolist()
+        y = self._float_column('[COORDINATES]', lnums, y).tolist()
+        nodes = self.wn._node_reg
+        for lnum, name, xy in zip(lnums, names, zip(x, y)):
+            try:
+                nodes._data[name]._coordinates = xy
+            except KeyError:
+                raise KeyError('[COORDINATES] line %d: node "%s" not found' % (lnum, name))
 
     def _write_coordinates(self, f, wn):
         f.write('[COORDINATES]\n'.encode('ascii'))
         entry = '{:10s} {:20.9f} {:20.9f}\n'
         label = '{:10s} {:10s} {:10s}\n'
         f.write(label.format(';Node', 'X-Coord', 'Y-Coord').encode('ascii'))
-        for name, node in wn.nodes():
-            val = node.coordinates
-            f.write(entry.format(name, val[0], val[1]).encode('ascii'))
-        f.write('\n'.encode('ascii'))
+        entry = entry.format
+        lines = [entry(name, node.coordinates[0], node.coordinates[1]) for name, node in wn.nodes()]
+        lines.append('\n')
+        f.write(''.join(lines).encode('ascii'))
 
     def _read_vertices(self):
         for lnum, line in self.sections['[VERTICES]']:
@@ -1975,11 +2072,12 @@ class InpFile(object):
         f.write(label.format(';Link', 'X-Coord', 'Y-Coord').encode('ascii'))
         lnames = list(wn.pipe_name_list)
         # lnames.sort()
-        for pipe_name in lnames:
-            pipe = wn.links[pipe_name]
-            for vert in pipe._vertices:
-                f.write(entry.format(pipe_name, vert[0], vert[1]).encode('ascii'))
-        f.write('\n'.encode('ascii'))
+        links = wn.links
+        entry = entry.format
+        lines = [entry(pipe_name, vert[0], vert[1]) for pipe_name in lnames
+                 for vert in links[pipe_name]._vertices]
+        lines.append('\n')
+        f.write(''.join(lines).encode('ascii'))
 
     def _read_labels(self):
         labels = []
@@ -2052,17 +2150,16 @@ class InpFile(object):
         f.write(label.format(';type', 'name', 'tag').encode('ascii'))
         nnodes = list(wn.node_name_list)
         # nnodes.sort()
-        for node_name in nnodes:
-            node = wn.nodes[node_name]
-            if node.tag:
-                f.write(entry.format('NODE', node_name, node.tag).encode('ascii'))
+        nodes = wn.nodes
+        lines = [entry.format('NODE', node_name, nodes[node_name].tag) for node_name in nnodes
+                 if nodes[node_name].tag]
         nlinks = list(wn.link_name_list)
         nlinks.sort()
-        for link_name in nlinks:
-            link = wn.links[link_name]
-            if link.tag:
-                f.write(entry.format('LINK', link_name, link.tag).encode('ascii'))
-        f.write('\n'.encode('ascii'))
+        links = wn.links
+        lines.extend(entry.format('LINK', link_name, links[link_name].tag) for link_name in nlinks
+                     if links[link_name].tag)
+        lines.append('\n')
+        f.write(''.join(lines).encode('ascii'))
 
     ### End of File
 
@@ -2411,6 +2508,9 @@ class BinFile(object):
         Convert the EPANET link status (8 values) to simpler WNTR status (3 values). By 
         default, this is done, and the encoded-cause status values are converted simple state
         values, instead.
+    dtype : numpy dtype, default=None
+        Type of the numeric results. If ``None``, the float type of the file
+        (float32) is used. Link status is stored as int8 codes.
 
     Returns
     ----------
@@ -2419,13 +2519,14 @@ class BinFile(object):
 
     """
     def __init__(self, result_types=None, network=False, energy=False, statistics=False,
-                 convert_status=True):
+                 convert_status=True, dtype=None):
         if os.name in ['nt', 'dos'] or sys.platform in ['darwin']:
             self.ftype = '=f4'
         else:
             self.ftype = '=f4'
         self.idlen = 32
         self.convert_status = convert_status
+        self.dtype = dtype
         self.hydraulic_id = None
         self.quality_id = None
         self.node_names = None
@@ -2447,6 +2548,10 @@ class BinFile(object):
         self.chem_units = None
         self.inp_file = None
         self.rpt_file = None
+        self.link_types = None
+        self.num_periods = None
+        self.period_size = None
+        self.ep_offset = None
         self.results = wntr.sim.SimulationResults()
         if result_types is None:
             self.items = [ member for name, member in ResultType.__members__.items() ]
@@ -2500,21 +2605,7 @@ class BinFile(object):
             The values to save, in the node or link order specified earlier in the file
 
         """
-        if result_type in [ResultType.quality, ResultType.linkquality]:
-            if self.quality_type is QualType.Chem:
-                values = QualParam.Concentration._to_si(self.flow_units, values, mass_units=self.mass_units)
-            elif self.quality_type is QualType.Age:
-                values = QualParam.WaterAge._to_si(self.flow_units, values)
-        elif result_type == ResultType.demand:
-            values = HydParam.Demand._to_si(self.flow_units, values)
-        elif result_type == ResultType.flowrate:
-            values = HydParam.Flow._to_si(self.flow_units, values)
-        elif result_type == ResultType.head:
-            values = HydParam.HydraulicHead._to_si(self.flow_units, values)
-        elif result_type == ResultType.pressure:
-            values = HydParam.Pressure._to_si(self.flow_units, values)
-        elif result_type == ResultType.velocity:
-            values = HydParam.Velocity._to_si(self.flow_units, values)
+        values = self._values_to_si(result_type, values, self.link_types)
         if result_type in self.items:
             if result_type.is_node:
                 self.results.node[result_type.name].iloc[period] = values
@@ -2572,6 +2663,208 @@ class BinFile(object):
         """
         pass
 
+    def _values_to_si(self, result_type, values, link_types=None):
+        """Convert the values of one result type from EPANET units to SI units.
+
+        Parameters
+        ----------
+        result_type : ResultType
+            The result type of the values
+        values : numpy.array
+            The values, with nodes or links along the last axis
+        link_types : numpy.array, optional
+            EPANET link type codes of the links, used to convert valve settings
+
+        Returns
+        -------
+        numpy.array
+            The values in SI units
+
+        """
+        if result_type in [ResultType.quality, ResultType.linkquality]:
+            if self.quality_type is QualType.Chem:
+                values = QualParam.Concentration._to_si(self.flow_units, values, mass_units=self.mass_units)
+            elif self.quality_type is QualType.Age:
+                values = QualParam.WaterAge._to_si(self.flow_units, values)
+        elif result_type == ResultType.demand:
+            values = HydParam.Demand._to_si(self.flow_units, values)
+        elif result_type == ResultType.flowrate:
+            values = HydParam.Flow._to_si(self.flow_units, values)
+        elif result_type == ResultType.head:
+            values = HydParam.HydraulicHead._to_si(self.flow_units, values)
+        elif result_type == ResultType.pressure:
+            values = HydParam.Pressure._to_si(self.flow_units, values)
+        elif result_type == ResultType.velocity:
+            values = HydParam.Velocity._to_si(self.flow_units, values)
+        elif result_type == ResultType.status and self.convert_status:
+            values = np.array(values)
+            values[values <= 2] = 0
+            values[values == 3] = 1
+            values[values >= 5] = 1
+            values[values == 4] = 2
+        elif result_type == ResultType.setting and link_types is not None:
+            values = np.array(values)
+            for link_type in [EN.PRV, EN.PSV, EN.PBV]:
+                mask = link_types == link_type
+                values[..., mask] = to_si(self.flow_units, values[..., mask], HydParam.Pressure)
+            mask = link_types == EN.FCV
+            values[..., mask] = to_si(self.flow_units, values[..., mask], HydParam.Flow)
+        return values
+
+    def _read_prolog(self, fin):
+        """Read the prolog and energy sections and locate the extended period block.
+
+        Parameters
+        ----------
+        fin : file
+            The binary file, opened at the start of the file
+
+        """
+        dt_str = '|S{}'.format(self.idlen)
+        ftype = self.ftype
+        logger.debug('... read prolog information ...')
+        prolog = np.fromfile(fin, dtype=np.int32, count=15)
+        magic1 = prolog[0]
+        version = prolog[1]
+        nnodes = prolog[2]
+        ntanks = prolog[3]
+        nlinks = prolog[4]
+        npumps = prolog[5]
+        nvalve = prolog[6]
+        wqopt = QualType(prolog[7])
+        srctrace = prolog[8]
+        flowunits = FlowUnits(prolog[9])
+        presunits = PressureUnits(prolog[10])
+        statsflag = StatisticsType(prolog[11])
+        reportstart = prolog[12]
+        reportstep = prolog[13]
+        duration = prolog[14]
+        logger.debug('EPANET/Toolkit version %d',version)
+        logger.debug('Nodes: %d; Tanks/Resrv: %d Links: %d; Pumps: %d; Valves: %d',
+                     nnodes, ntanks, nlinks, npumps, nvalve)
+        logger.debug('WQ opt: %s; Trace Node: %s; Flow Units %s; Pressure Units %s',
+                     wqopt, srctrace, flowunits, presunits)
+        logger.debug('Statistics: %s; Report Start %d, step %d; Duration=%d sec',
+                     statsflag, reportstart, reportstep, duration)
+
+        # Ignore the title lines
+        np.fromfile(fin, dtype=np.uint8, count=240)
+        inpfile = np.fromfile(fin, dtype=np.uint8, count=260)
+        rptfile = np.fromfile(fin, dtype=np.uint8, count=260)
+        chemical = str(np.fromfile(fin, dtype=dt_str, count=1)[0])
+#        wqunits = ''.join([chr(f) for f in np.fromfile(fin, dtype=np.uint8, count=idlen) if f!=0 ])
+        wqunits = str(np.fromfile(fin, dtype=dt_str, count=1)[0])
+        mass = wqunits.split('/',1)[0]
+        if mass in ['mg', 'ug', u'mg', u'ug']:
+            massunits = MassUnits[mass]
+        else:
+            massunits = MassUnits.mg
+        self.magic = magic1
+        self.flow_units = flowunits
+        self.pres_units = presunits
+        self.quality_type = wqopt
+        self.mass_units = massunits
+        self.num_nodes = nnodes
+        self.num_tanks = ntanks
+        self.num_links = nlinks
+        self.num_pumps = npumps
+        self.num_valves = nvalve
+        self.report_start = reportstart
+        self.report_step = reportstep
+        self.duration = duration
+        self.chemical = chemical
+        self.chem_units = wqunits
+        self.inp_file = inpfile
+        self.rpt_file = rptfile
+        nodenames = np.array(np.fromfile(fin, dtype=dt_str, count=nnodes), dtype=str).tolist()
+        linknames = np.array(np.fromfile(fin, dtype=dt_str, count=nlinks), dtype=str).tolist()
+        self.node_names = nodenames
+        self.link_names = linknames
+        linkstart = np.array(np.fromfile(fin, dtype=np.int32, count=nlinks), dtype=int)
+        linkend = np.array(np.fromfile(fin, dtype=np.int32, count=nlinks), dtype=int)
+        linktype = np.fromfile(fin, dtype=np.int32, count=nlinks)
+        self.link_types = linktype
+        tankidxs = np.fromfile(fin, dtype=np.int32, count=ntanks)
+        tankarea = np.fromfile(fin, dtype=np.dtype(ftype), count=ntanks)
+        elevation = np.fromfile(fin, dtype=np.dtype(ftype), count=nnodes)
+        linklen = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
+        diameter = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
+
+        logger.debug('... read energy data ...')
+        for i in range(npumps):
+            pidx = int(np.fromfile(fin,dtype=np.int32, count=1))
+            energy = np.fromfile(fin, dtype=np.dtype(ftype), count=6)
+            self.save_energy_line(pidx, linknames[pidx-1], energy)
+        peakenergy = np.fromfile(fin, dtype=np.dtype(ftype), count=1)
+        self.peak_energy = peakenergy
+
+        reporttimes = np.arange(reportstart, duration+reportstep, reportstep)
+        nrptsteps = len(reporttimes)
+        if statsflag in [StatisticsType.Maximum, StatisticsType.Minimum, StatisticsType.Range]:
+            nrptsteps = 1
+            reporttimes = [reportstart + reportstep]
+        self.num_periods = nrptsteps
+        self.report_times = reporttimes
+
+        # Each report period holds 4 node values and 8 link values per element,
+        # in the same order as ResultType
+        self.period_size = 4*nnodes + 8*nlinks
+        self.ep_offset = fin.tell()
+
+    def _read_epilog(self, fin):
+        """Read the epilog and check the file is complete.
+
+        Returns
+        -------
+        tuple
+            (good_read, warnflag)
+
+        """
+        logger.debug('... read epilog ...')
+        # Read the averages and then the number of periods for checks
+        averages = np.fromfile(fin, dtype=np.dtype(self.ftype), count=4)
+        self.averages = averages
+        np.fromfile(fin, dtype=np.int32, count=1)
+        warnflag = np.fromfile(fin, dtype=np.int32, count=1)
+        magic2 = np.fromfile(fin, dtype=np.int32, count=1)
+        if self.magic != magic2:
+            logger.critical('The magic number did not match -- binary incomplete or incorrectly read. If you believe this file IS complete, please try a different float type. Current type is "%s"',self.ftype)
+        #print numperiods, warnflag, magic
+        if warnflag != 0:
+            logger.warning('Warnings were issued during simulation')
+        return self.magic == magic2, warnflag
+
+    def _result_slice(self, result_type):
+        """Location of a result type within a report period, as a slice"""
+        if result_type.is_node:
+            offset = (result_type.value-1)*self.num_nodes
+            return slice(offset, offset+self.num_nodes)
+        offset = 4*self.num_nodes + (result_type.value-5)*self.num_links
+        return slice(offset, offset+self.num_links)
+
+    def _element_results(self, arrays, names, start_time=None, end_time=None):
+        """Copy a time window of lazy arrays into an ElementResults object"""
+        times = np.asarray(self.report_times)
+        start = 0 if start_time is None else np.searchsorted(times, start_time, side='left')
+        stop = len(times) if end_time is None else np.searchsorted(times, end_time, side='right')
+        dtype = np.dtype(self.ftype) if self.dtype is None else self.dtype
+        results = ElementResults(pd.Index(names, name='name'), list(arrays), [ResultType.status.name], 
+                                 times=times[start:stop], dtype=dtype)
+        for name, values in arrays.items():
+            results.array(name)[:] = values[start:stop, :]
+        return results
+
+    def _ep_arrays(self, data):
+        """Create a lazy array for each result type of an extended period block"""
+        node = OrderedDict()
+        link = OrderedDict()
+        for result_type in ResultType:
+            if result_type.is_node:
+                node[result_type.name] = BinFileArray(self, data, result_type)
+            else:
+                link[result_type.name] = BinFileArray(self, data, result_type)
+        return node, link
+
 #    @run_lineprofile()
     def read(self, filename, custom_handlers=False):
         """Read a binary file and create a results object.
@@ -2598,259 +2891,310 @@ class BinFile(object):
             
         """
         self.results = wntr.sim.SimulationResults()
+        self.results.node = {}
+        self.results.link = {}
         
         logger.debug('Read binary EPANET data from %s',filename)
-        dt_str = '|S{}'.format(self.idlen)
         with open(filename, 'rb') as fin:
+            self._read_prolog(fin)
             ftype = self.ftype
-            idlen = self.idlen
-            logger.debug('... read prolog information ...')
-            prolog = np.fromfile(fin, dtype=np.int32, count=15)
-            magic1 = prolog[0]
-            version = prolog[1]
-            nnodes = prolog[2]
-            ntanks = prolog[3]
-            nlinks = prolog[4]
-            npumps = prolog[5]
-            nvalve = prolog[6]
-            wqopt = QualType(prolog[7])
-            srctrace = prolog[8]
-            flowunits = FlowUnits(prolog[9])
-            presunits = PressureUnits(prolog[10])
-            statsflag = StatisticsType(prolog[11])
-            reportstart = prolog[12]
-            reportstep = prolog[13]
-            duration = prolog[14]
-            logger.debug('EPANET/Toolkit version %d',version)
-            logger.debug('Nodes: %d; Tanks/Resrv: %d Links: %d; Pumps: %d; Valves: %d',
-                         nnodes, ntanks, nlinks, npumps, nvalve)
-            logger.debug('WQ opt: %s; Trace Node: %s; Flow Units %s; Pressure Units %s',
-                         wqopt, srctrace, flowunits, presunits)
-            logger.debug('Statistics: %s; Report Start %d, step %d; Duration=%d sec',
-                         statsflag, reportstart, reportstep, duration)
-
-            # Ignore the title lines
-            np.fromfile(fin, dtype=np.uint8, count=240)
-            inpfile = np.fromfile(fin, dtype=np.uint8, count=260)
-            rptfile = np.fromfile(fin, dtype=np.uint8, count=260)
-            chemical = str(np.fromfile(fin, dtype=dt_str, count=1)[0])
-#            wqunits = ''.join([chr(f) for f in np.fromfile(fin, dtype=np.uint8, count=idlen) if f!=0 ])
-            wqunits = str(np.fromfile(fin, dtype=dt_str, count=1)[0])
-            mass = wqunits.split('/',1)[0]
-            if mass in ['mg', 'ug', u'mg', u'ug']:
-                massunits = MassUnits[mass]
-            else:
-                massunits = MassUnits.mg            
-            self.flow_units = flowunits
-            self.pres_units = presunits
-            self.quality_type = wqopt
-            self.mass_units = massunits
-            self.num_nodes = nnodes
-            self.num_tanks = ntanks
-            self.num_links = nlinks
-            self.num_pumps = npumps
-            self.num_valves = nvalve
-            self.report_start = reportstart
-            self.report_step = reportstep
-            self.duration = duration
-            self.chemical = chemical
-            self.chem_units = wqunits
-            self.inp_file = inpfile
-            self.rpt_file = rptfile
-            nodenames = []
-            linknames = []
-            nodenames = np.array(np.fromfile(fin, dtype=dt_str, count=nnodes), dtype=str).tolist()
-            linknames = np.array(np.fromfile(fin, dtype=dt_str, count=nlinks), dtype=str).tolist()
-            self.node_names = nodenames
-            self.link_names = linknames
-            linkstart = np.array(np.fromfile(fin, dtype=np.int32, count=nlinks), dtype=int)
-            linkend = np.array(np.fromfile(fin, dtype=np.int32, count=nlinks), dtype=int)
-            linktype = np.fromfile(fin, dtype=np.int32, count=nlinks)
-            tankidxs = np.fromfile(fin, dtype=np.int32, count=ntanks)
-            tankarea = np.fromfile(fin, dtype=np.dtype(ftype), count=ntanks)
-            elevation = np.fromfile(fin, dtype=np.dtype(ftype), count=nnodes)
-            linklen = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-            diameter = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-            """
-            self.save_network_desc_line('link_start', linkstart)
-            self.save_network_desc_line('link_end', linkend)
-            self.save_network_desc_line('link_type', linktype)
-            self.save_network_desc_line('tank_node_index', tankidxs)
-            self.save_network_desc_line('tank_area', tankarea)
-            self.save_network_desc_line('node_elevation', elevation)
-            self.save_network_desc_line('link_length', linklen)
-            self.save_network_desc_line('link_diameter', diameter)
-            """
-            logger.debug('... read energy data ...')
-            for i in range(npumps):
-                pidx = int(np.fromfile(fin,dtype=np.int32, count=1))
-                energy = np.fromfile(fin, dtype=np.dtype(ftype), count=6)
-                self.save_energy_line(pidx, linknames[pidx-1], energy)
-            peakenergy = np.fromfile(fin, dtype=np.dtype(ftype), count=1)
-            self.peak_energy = peakenergy
-
+            nrptsteps = self.num_periods
             logger.debug('... read EP simulation data ...')
-            reporttimes = np.arange(reportstart, duration+reportstep, reportstep)
-            nrptsteps = len(reporttimes)
-            statsN = nrptsteps
-            if statsflag in [StatisticsType.Maximum, StatisticsType.Minimum, StatisticsType.Range]:
-                nrptsteps = 1
-                reporttimes = [reportstart + reportstep]
-            self.num_periods = nrptsteps
-            self.report_times = reporttimes
-
-            # set up results metadata dictionary
-            """
-            if wqopt == QualType.Age:
-                self.results.meta['quality_mode'] = 'AGE'
-                self.results.meta['quality_units'] = 's'
-            elif wqopt == QualType.Trace:
-                self.results.meta['quality_mode'] = 'TRACE'
-                self.results.meta['quality_units'] = '%'
-                self.results.meta['quality_trace'] = srctrace
-            elif wqopt == QualType.Chem:
-                self.results.meta['quality_mode'] = 'CHEMICAL'
-                self.results.meta['quality_units'] = wqunits
-                self.results.meta['quality_chem'] = chemical
-            self.results.time = reporttimes
-            self.save_network_desc_line('report_times', reporttimes)
-            self.save_network_desc_line('node_elevation', pd.Series(data=elevation, index=nodenames))
-            self.save_network_desc_line('link_length', pd.Series(data=linklen, index=linknames))
-            self.save_network_desc_line('link_diameter', pd.Series(data=diameter, index=linknames))
-            self.save_network_desc_line('stats_mode', statsflag)
-            self.save_network_desc_line('stats_N', statsN)
-            nodetypes = np.array(['Junction']*self.num_nodes, dtype='|S10')
-            nodetypes[tankidxs-1] = 'Tank'
-            nodetypes[tankidxs[tankarea==0]-1] = 'Reservoir'
-            linktypes = np.array(['Pipe']*self.num_links)
-            linktypes[ linktype == EN.PUMP ] = 'Pump'
-            linktypes[ linktype > EN.PUMP ] = 'Valve'
-            self.save_network_desc_line('link_type', pd.Series(data=linktypes, index=linknames, copy=True))
-            linktypes[ linktype == EN.CVPIPE ] = 'CV'
-            linktypes[ linktype == EN.FCV ] = 'FCV'
-            linktypes[ linktype == EN.PRV ] = 'PRV'
-            linktypes[ linktype == EN.PSV ] = 'PSV'
-            linktypes[ linktype == EN.PBV ] = 'PBV'
-            linktypes[ linktype == EN.TCV ] = 'TCV'
-            linktypes[ linktype == EN.GPV ] = 'GPV'
-            self.save_network_desc_line('link_subtype', pd.Series(data=linktypes, index=linknames, copy=True))
-            self.save_network_desc_line('node_type', pd.Series(data=nodetypes, index=nodenames, copy=True))
-            self.save_network_desc_line('node_names', np.array(nodenames, dtype=str))
-            self.save_network_desc_line('link_names', np.array(linknames, dtype=str))
-            names = np.array(nodenames, dtype=str)
-            self.save_network_desc_line('link_start', pd.Series(data=names[linkstart-1], index=linknames, copy=True))
-            self.save_network_desc_line('link_end', pd.Series(data=names[linkend-1], index=linknames, copy=True))
-            """
             if custom_handlers is True:
                 logger.debug('... set up results object ...')
-                self.setup_ep_results(reporttimes, nodenames, linknames)
-    
+                self.setup_ep_results(self.report_times, self.node_names, self.link_names)
+                slices = [(result_type, self._result_slice(result_type)) for result_type in ResultType]
                 for ts in range(nrptsteps):
                     try:
-                        demand = np.fromfile(fin, dtype=np.dtype(ftype), count=nnodes)
-                        head = np.fromfile(fin, dtype=np.dtype(ftype), count=nnodes)
-                        pressure = np.fromfile(fin, dtype=np.dtype(ftype), count=nnodes)
-                        quality = np.fromfile(fin, dtype=np.dtype(ftype), count=nnodes)
-                        flow = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-                        velocity = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-                        headloss = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-                        linkquality = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-                        linkstatus = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-                        linksetting = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-                        reactionrate = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-                        frictionfactor = np.fromfile(fin, dtype=np.dtype(ftype), count=nlinks)
-                        self.save_ep_line(ts, ResultType.demand, demand)
-                        self.save_ep_line(ts, ResultType.head, head)
-                        self.save_ep_line(ts, ResultType.pressure, pressure)
-                        self.save_ep_line(ts, ResultType.quality, quality)
-                        self.save_ep_line(ts, ResultType.flowrate, flow)
-                        self.save_ep_line(ts, ResultType.velocity, velocity)
-                        self.save_ep_line(ts, ResultType.headloss, headloss)
-                        self.save_ep_line(ts, ResultType.linkquality, linkquality)
-                        self.save_ep_line(ts, ResultType.status, linkstatus)
-                        self.save_ep_line(ts, ResultType.setting, linksetting)
-                        self.save_ep_line(ts, ResultType.rxnrate, reactionrate)
-                        self.save_ep_line(ts, ResultType.frictionfact, frictionfactor)
+                        data = np.fromfile(fin, dtype=np.dtype(ftype), count=self.period_size)
+                        for result_type, result_slice in slices:
+                            self.save_ep_line(ts, result_type, data[result_slice])
                     except Exception as e:
                         logger.exception('Error reading or writing EP line: %s', e)
                         logger.warning('Missing results from report period %d',ts)
             else:
-#                type_list = 4*nnodes*['node'] + 8*nlinks*['link']
-                name_list = nodenames*4 + linknames*8
-                valuetype = nnodes*['demand']+nnodes*['head']+nnodes*['pressure']+nnodes*['quality'] + nlinks*['flow']+nlinks*['velocity']+nlinks*['headloss']+nlinks*['linkquality']+nlinks*['linkstatus']+nlinks*['linksetting']+nlinks*['reactionrate']+nlinks*['frictionfactor']
-                
-#                tuples = zip(type_list, valuetype, name_list)
-                tuples = list(zip(valuetype, name_list))
-#                tuples = [(valuetype[i], v) for i, v in enumerate(name_list)]
-                index = pd.MultiIndex.from_tuples(tuples, names=['value','name'])          
                 try:
-                    data = np.fromfile(fin, dtype = np.dtype(ftype), count = (4*nnodes+8*nlinks)*nrptsteps)
-                    data = np.reshape(data, (nrptsteps, (4*nnodes+8*nlinks)))
+                    data = np.fromfile(fin, dtype = np.dtype(ftype), count = self.period_size*nrptsteps)
+                    data = np.reshape(data, (nrptsteps, self.period_size))
                 except Exception as e:
                     logger.exception('Failed to process file: %s', e)
-                    
-                df = pd.DataFrame(data.transpose(), index =index, columns = reporttimes)
-                df = df.transpose()
-                
-                self.results.node = {}
-                self.results.link = {}
+
                 self.results.network_name = self.inp_file
-                
-                # Node Results
-                self.results.node['demand'] = HydParam.Demand._to_si(self.flow_units, df['demand'])
-                self.results.node['head'] = HydParam.HydraulicHead._to_si(self.flow_units, df['head'])
-                self.results.node['pressure'] = HydParam.Pressure._to_si(self.flow_units, df['pressure'])
-
-                # Water Quality Results (node and link)
-                if self.quality_type is QualType.Chem:
-                    self.results.node['quality'] = QualParam.Concentration._to_si(self.flow_units, df['quality'], mass_units=self.mass_units)
-                    self.results.link['linkquality'] = QualParam.Concentration._to_si(self.flow_units, df['linkquality'], mass_units=self.mass_units)
-                elif self.quality_type is QualType.Age:
-                    self.results.node['quality'] = QualParam.WaterAge._to_si(self.flow_units, df['quality'], mass_units=self.mass_units)
-                    self.results.link['linkquality'] = QualParam.WaterAge._to_si(self.flow_units, df['linkquality'], mass_units=self.mass_units)
-                else:
-                    self.results.node['quality'] = df['quality']
-                    self.results.link['linkquality'] = df['linkquality']
-
-                # Link Results
-                self.results.link['flowrate'] = HydParam.Flow._to_si(self.flow_units, df['flow'])
-                self.results.link['headloss'] = df['headloss']  # Unit is per 1000
-                self.results.link['velocity'] = HydParam.Velocity._to_si(self.flow_units, df['velocity'])
-                
-#                self.results.link['status'] = df['linkstatus']
-                status = np.array(df['linkstatus'])
-                if self.convert_status:
-                    status[status <= 2] = 0
-                    status[status == 3] = 1
-                    status[status >= 5] = 1
-                    status[status == 4] = 2
-                self.results.link['status'] = pd.DataFrame(data=status, columns=linknames, index=reporttimes)
-                
-                settings = np.array(df['linksetting'])
-                settings[:, linktype == EN.PRV] = to_si(self.flow_units, settings[:, linktype == EN.PRV], HydParam.Pressure)
-                settings[:, linktype == EN.PSV] = to_si(self.flow_units, settings[:, linktype == EN.PSV], HydParam.Pressure)
-                settings[:, linktype == EN.PBV] = to_si(self.flow_units, settings[:, linktype == EN.PBV], HydParam.Pressure)
-                settings[:, linktype == EN.FCV] = to_si(self.flow_units, settings[:, linktype == EN.FCV], HydParam.Flow)
-                self.results.link['setting'] = pd.DataFrame(data=settings, columns=linknames, index=reporttimes)
-                self.results.link['frictionfact'] = df['frictionfactor']
-                self.results.link['rxnrate'] = df['reactionrate']
-                
-            logger.debug('... read epilog ...')
-            # Read the averages and then the number of periods for checks
-            averages = np.fromfile(fin, dtype=np.dtype(ftype), count=4)
-            self.averages = averages
-            np.fromfile(fin, dtype=np.int32, count=1)
-            warnflag = np.fromfile(fin, dtype=np.int32, count=1)
-            magic2 = np.fromfile(fin, dtype=np.int32, count=1)
-            if magic1 != magic2:
-                logger.critical('The magic number did not match -- binary incomplete or incorrectly read. If you believe this file IS complete, please try a different float type. Current type is "%s"',ftype)
-            #print numperiods, warnflag, magic
-            if warnflag != 0:
-                logger.warning('Warnings were issued during simulation')
-        self.finalize_save(magic1==magic2, warnflag)
+                node, link = self._ep_arrays(data)
+                self.results.node = self._element_results(node, self.node_names)
+                self.results.link = self._element_results(link, self.link_names)
+
+            good_read, warnflag = self._read_epilog(fin)
+        self.finalize_save(good_read, warnflag)
         
         return self.results
 
+    def memmap(self, filename):
+        """Memory-map the extended period results of a binary file.
+
+        Only the prolog is read. The results of each result type are exposed
+        as a lazy :class:`~wntr.epanet.io.BinFileArray`, which reads and
+        converts to SI units only the report periods and elements that are
+        indexed.
+
+        Parameters
+        ----------
+        filename : str
+            An EPANET BIN output file
+
+        Returns
+        -------
+        BinFileMemmap
+
+        """
+        reader = copy.copy(self)
+        with open(filename, 'rb') as fin:
+            reader._read_prolog(fin)
+            fin.seek(reader.ep_offset + 4*reader.period_size*reader.num_periods)
+            reader._read_epilog(fin)
+        data = np.memmap(filename, dtype=np.dtype(reader.ftype), mode='r',
+                         offset=reader.ep_offset, shape=(reader.num_periods, reader.period_size))
+        return BinFileMemmap(reader, data)
+
+    def _wait_for_size(self, fin, size, timeout, poll_interval):
+        """Wait until a file that is still being written reaches a size (in bytes)"""
+        start = time.time()
+        while os.fstat(fin.fileno()).st_size < size:
+            if timeout is not None and time.time() - start > timeout:
+                raise RuntimeError('Timed out waiting for EPANET binary output')
+            time.sleep(poll_interval)
+
+    def iter_periods(self, filename, result_types=None, convert_units=True,
+                     wait=False, timeout=None, poll_interval=0.5):
+        """Iterate over the report periods of a binary file.
+
+        Only one report period is held in memory at a time. The prolog
+        information (node and link names, report times, etc.) is available
+        from the reader once the first period has been yielded.
+
+        Parameters
+        ----------
+        filename : str
+            An EPANET BIN output file
+        result_types : list of :class:`~wntr.epanet.util.ResultType`, optional
+            Result types to return, defaults to the result types specified
+            when the reader was created
+        convert_units : bool, optional
+            Convert values to SI units (default True)
+        wait : bool, optional
+            Wait for periods that have not been written yet, for files still
+            being written by a running simulation (default False)
+        timeout : float, optional
+            Maximum time (s) to wait for each period, defaults to no limit
+        poll_interval : float, optional
+            Time (s) between checks of the file size while waiting
+
+        Yields
+        ------
+        tuple
+            (time, node, link) where time is the report time (s) and node and
+            link are dictionaries of numpy arrays, keyed by result type name,
+            in the node and link order of the file
+
+        """
+        if result_types is None:
+            result_types = self.items
+        node_types = [result_type for result_type in result_types if result_type.is_node]
+        link_types = [result_type for result_type in result_types if result_type.is_link]
+        dtype = np.dtype(self.ftype)
+        with open(filename, 'rb') as fin:
+            if wait:
+                # The prolog size depends on the element counts at its start
+                self._wait_for_size(fin, 60, timeout, poll_interval)
+                counts = np.fromfile(fin, dtype=np.int32, count=7)
+                nnodes, ntanks, nlinks, npumps = counts[2], counts[3], counts[4], counts[5]
+                prolog_size = 60 + 240 + 520 + 2*self.idlen + self.idlen*(nnodes+nlinks) + \
+                              4*(3*nlinks + 2*ntanks + nnodes + 2*nlinks) + 28*npumps + 4
+                self._wait_for_size(fin, prolog_size, timeout, poll_interval)
+                fin.seek(0)
+            self._read_prolog(fin)
+            nbytes = dtype.itemsize*self.period_size
+            node_slices = [(result_type, self._result_slice(result_type)) for result_type in node_types]
+            link_slices = [(result_type, self._result_slice(result_type)) for result_type in link_types]
+            for ts in range(self.num_periods):
+                if wait:
+                    self._wait_for_size(fin, self.ep_offset + (ts+1)*nbytes, timeout, poll_interval)
+                fin.seek(self.ep_offset + ts*nbytes)
+                data = np.fromfile(fin, dtype=dtype, count=self.period_size)
+                if len(data) < self.period_size:
+                    logger.warning('Missing results from report period %d', ts)
+                    return
+                node = OrderedDict()
+                link = OrderedDict()
+                for result_type, result_slice in node_slices:
+                    node[result_type.name] = data[result_slice]
+                for result_type, result_slice in link_slices:
+                    link[result_type.name] = data[result_slice]
+                if convert_units:
+                    for result_type, result_slice in node_slices:
+                        node[result_type.name] = self._values_to_si(result_type, node[result_type.name])
+                    for result_type, result_slice in link_slices:
+                        link[result_type.name] = self._values_to_si(result_type, link[result_type.name], self.link_types)
+                yield self.report_times[ts], node, link
+
+
+class BinFileArray(object):
+    """
+    Lazily decoded results of one result type in an EPANET binary output file.
+
+    Indexing follows numpy, with report periods along the first axis and
+    elements (nodes or links) along the second axis. Only the indexed values
+    are read from the extended period block and converted to SI units.
+
+    Parameters
+    ----------
+    reader : BinFile
+        Reader that read the prolog of the file
+    data : numpy.array or numpy.memmap
+        Extended period block, with shape (periods, 4*nodes + 8*links)
+    result_type : ResultType
+        The result type
+
+    """
+    def __init__(self, reader, data, result_type):
+        self._reader = reader
+        self._data = data
+        self.result_type = result_type
+        self.index = np.asarray(reader.report_times)
+        self._offset = reader._result_slice(result_type).start
+        if result_type.is_node:
+            self.columns = reader.node_names
+            self._link_types = None
+        else:
+            self.columns = reader.link_names
+            self._link_types = np.asarray(reader.link_types)
+        self._positions = None
+
+    @property
+    def shape(self):
+        """Shape of the array, (periods, elements)"""
+        return (len(self.index), len(self.columns))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, cols = key
+        else:
+            rows, cols = key, slice(None)
+        cols = np.arange(self.shape[1])[cols]
+        col_idx = np.atleast_1d(cols)
+        if isinstance(rows, slice):
+            values = self._data[rows, col_idx + self._offset]
+        else:
+            rows = np.arange(self.shape[0])[rows]
+            values = self._data[np.atleast_1d(rows)[:, np.newaxis], col_idx + self._offset]
+        values = np.asarray(values)
+        link_types = None
+        if self._link_types is not None:
+            link_types = self._link_types[col_idx]
+        values = self._reader._values_to_si(self.result_type, values, link_types)
+        if np.ndim(rows) == 0 and not isinstance(rows, slice):
+            values = values[0]
+        if np.ndim(cols) == 0:
+            values = values[..., 0]
+        return values
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return self.values
+        return self.values.astype(dtype)
+
+    @property
+    def values(self):
+        """All values, in SI units"""
+        return self[:, :]
+
+    def to_dataframe(self, start_time=None, end_time=None, names=None):
+        """Read a time window and a subset of elements into a DataFrame.
+
+        Parameters
+        ----------
+        start_time : int, optional
+            First report time (s) to read, defaults to the first report period
+        end_time : int, optional
+            Last report time (s) to read, defaults to the last report period
+        names : list of str, optional
+            Element names to read, defaults to all elements
+
+        Returns
+        -------
+        pandas DataFrame (index = times, columns = element names)
+
+        """
+        start = 0
+        stop = len(self.index)
+        if start_time is not None:
+            start = np.searchsorted(self.index, start_time, side='left')
+        if end_time is not None:
+            stop = np.searchsorted(self.index, end_time, side='right')
+        rows = slice(start, stop)
+        if names is None:
+            cols = slice(None)
+            names = self.columns
+        else:
+            if self._positions is None:
+                self._positions = dict((name, i) for i, name in enumerate(self.columns))
+            names = list(names)
+            cols = [self._positions[name] for name in names]
+        return pd.DataFrame(self[rows, cols], index=self.index[rows], columns=pd.Index(names, name='name'))
+
+
+class BinFileMemmap(object):
+    """
+    Memory-mapped extended period results of an EPANET binary output file.
+
+    Created by :meth:`~wntr.epanet.io.BinFile.memmap`.
+
+    Attributes
+    ----------
+    node : dict of BinFileArray
+        Lazy node results, keyed by result type name
+    link : dict of BinFileArray
+        Lazy link results, keyed by result type name
+    times : numpy.array
+        Report times (s)
+    node_names : list of str
+        Node names, in file order
+    link_names : list of str
+        Link names, in file order
+
+    """
+    def __init__(self, reader, data):
+        self.reader = reader
+        self.data = data
+        self.times = np.asarray(reader.report_times)
+        self.node_names = reader.node_names
+        self.link_names = reader.link_names
+        self.node, self.link = reader._ep_arrays(data)
+
+    def to_results(self, start_time=None, end_time=None):
+        """Read a time window of all results into a results object.
+
+        Parameters
+        ----------
+        start_time : int, optional
+            First report time (s) to read
+        end_time : int, optional
+            Last report time (s) to read
+
+        Returns
+        -------
+        :class:`~wntr.sim.results.SimulationResults`
+
+        """
+        results = wntr.sim.SimulationResults()
+        results.network_name = self.reader.inp_file
+        results.node = self.reader._element_results(self.node, self.node_names, start_time, end_time)
+        results.link = self.reader._element_results(self.link, self.link_names, start_time, end_time)
+        return results
+
 
 class NoSectionError(Exception):
     pass
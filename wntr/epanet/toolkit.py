@@ -499,4 +499,142 @@ class ENepanet():
         return
 
 
-    
\ No newline at end of file
+    
+    def ENgetnodeid(self, iIndex):
+        """Retrieves the ID label of a node with a specified index
+
+        Parameters
+        -------------
+        iIndex : int
+            Node index
+
+        Returns
+        ---------
+        Node ID
+
+        """
+        sId = ctypes.create_string_buffer(32)
+        self.errcode = self.ENlib.ENgetnodeid(iIndex, byref(sId))
+        self._error()
+        return sId.value.decode('ascii')
+
+    def ENsetnodevalue(self, iIndex, iCode, fValue):
+        """Sets the value of a parameter for a node
+
+        Parameters
+        -------------
+        iIndex : int
+            Node index
+        iCode : int
+            Node parameter code (see toolkit.optNodeParams)
+        fValue : float
+            Parameter value
+
+        """
+        self.errcode = self.ENlib.ENsetnodevalue(iIndex, iCode, ctypes.c_float(fValue))
+        self._error()
+        return
+
+    def ENsetlinkvalue(self, iIndex, iCode, fValue):
+        """Sets the value of a parameter for a link
+
+        Parameters
+        -------------
+        iIndex : int
+            Link index
+        iCode : int
+            Link parameter code (see toolkit.optLinkParams)
+        fValue : float
+            Parameter value
+
+        """
+        self.errcode = self.ENlib.ENsetlinkvalue(iIndex, iCode, ctypes.c_float(fValue))
+        self._error()
+        return
+
+    def ENgettimeparam(self, iCode):
+        """Retrieves the value of a time parameter
+
+        Parameters
+        -------------
+        iCode : int
+            Time parameter code (see toolkit.optTimeParams)
+
+        Returns
+        ---------
+        Value of the time parameter (seconds)
+
+        """
+        lValue = ctypes.c_long()
+        self.errcode = self.ENlib.ENgettimeparam(iCode, byref(lValue))
+        self._error()
+        return lValue.value
+
+    def ENsetqualtype(self, iQualcode, sChemname='', sChemunits='', sTracenode=''):
+        """Sets the type of water quality analysis called for
+
+        Parameters
+        -------------
+        iQualcode : int
+            Water quality analysis code (see toolkit.optQualTypes)
+        sChemname : str
+            Name of the chemical being analyzed
+        sChemunits : str
+            Units that the chemical is measured in
+        sTracenode : str
+            ID of the node traced in a source tracing analysis
+
+        """
+        self.errcode = self.ENlib.ENsetqualtype(iQualcode, sChemname.encode('ascii'),
+                                                sChemunits.encode('ascii'),
+                                                sTracenode.encode('ascii'))
+        self._error()
+        return
+
+    def ENaddpattern(self, sId):
+        """Adds a new time pattern to the network
+
+        Parameters
+        -------------
+        sId : str
+            Pattern ID
+
+        """
+        self.errcode = self.ENlib.ENaddpattern(sId.encode('ascii'))
+        self._error()
+        return
+
+    def ENgetpatternindex(self, sId):
+        """Retrieves the index of a time pattern with a specific ID
+
+        Parameters
+        -------------
+        sId : str
+            Pattern ID
+
+        Returns
+        ---------
+        Index of pattern in list of patterns
+
+        """
+        iIndex = ctypes.c_int()
+        self.errcode = self.ENlib.ENgetpatternindex(sId.encode('ascii'), byref(iIndex))
+        self._error()
+        return iIndex.value
+
+    def ENsetpattern(self, iIndex, factors):
+        """Sets all of the multiplier factors for a specific time pattern
+
+        Parameters
+        -------------
+        iIndex : int
+            Pattern index
+        factors : list of float
+            Multiplier factors for the entire pattern
+
+        """
+        nfactors = len(factors)
+        cfactors = (ctypes.c_float * nfactors)(*factors)
+        self.errcode = self.ENlib.ENsetpattern(iIndex, cfactors, nfactors)
+        self._error()
+        return
@@ -8,14 +8,13 @@ The wntr.metrics.economic module contains economic metrics.
     annual_network_cost
     annual_ghg_emissions
     pump_energy
-
+    pump_cost
 
 """
-from wntr.network import Tank, Pipe, Pump, Valve
+from wntr.network import Tank, Pipe, Pump, Valve, Curve
 import numpy as np 
 import pandas as pd 
 import logging
-import scipy
 
 logger = logging.getLogger(__name__)
 
@@ -155,10 +154,7 @@ def annual_network_cost(wn, tank_cost=None, pipe_cost=None, prv_cost=None,
         network_cost = network_cost + tank_cost.iloc[idx]
 
     # Pipe construction cost
-    for link_name, link in wn.links(Pipe):
-        idx = np.argmin([np.abs(pipe_cost.index - link.diameter)])
-        #print(link_name, pipe_cost.iloc[idx], link.length)
-        network_cost = network_cost + pipe_cost.iloc[idx]*link.length    
+    network_cost = network_cost + _pipe_table_sum(wn, pipe_cost)
 
     # Pump construction cost
     for link_name, link in wn.head_pumps():
@@ -234,28 +230,39 @@ def annual_ghg_emissions(wn, pipe_ghg=None):
         pipe_ghg = pd.Series(cost, diameter)
         
     # GHG emissions from pipes
-    for link_name, link in wn.links(Pipe):
-        idx = np.argmin([np.abs(pipe_ghg.index - link.diameter)])
-        #print(link_name, link.diameter, pipe_ghg.iloc[idx],link.length)
-        network_ghg = network_ghg + pipe_ghg.iloc[idx]*link.length
+    network_ghg = network_ghg + _pipe_table_sum(wn, pipe_ghg)
        
     return network_ghg    
 
 
+def _pipe_table_sum(wn, table):
+    """Sum over all pipes of the table value at the closest diameter times 
+    the pipe length; diameters and lengths are read as whole columns"""
+    diameter = wn.query_link_attribute('diameter', link_type=Pipe).values
+    length = wn.query_link_attribute('length', link_type=Pipe).values
+    if len(diameter) == 0:
+        return 0
+    idx = np.abs(np.subtract.outer(diameter, np.asarray(table.index, dtype=float))).argmin(axis=1)
+    return (table.values[idx]*length).sum()
+
+
 def pump_energy(flowrate, head, wn):
     """
     Compute the pump energy over time.
     
     The computation uses pump flow rate, pump head, pump efficiency, and the 
-    electricity price. Pump efficiency curves may be specified through the 
-    "efficiency" attribute on the pump object. Alternatively, a global 
-    efficiency may be set on the wn.energy object:
+    electricity price. Pump efficiency curves (efficiency in percent as a 
+    function of flow rate) may be specified through the "efficiency" 
+    attribute on the pump object, as a curve or curve name. The efficiency 
+    is interpolated linearly between the curve points, is constant beyond
+    the first and last points, and is limited to 1-100%. Alternatively, a global efficiency may be set 
+    on the wn.options.energy object:
 
-        wn.energy.global_efficiency = 75 # This means 75% or 0.75
+        wn.options.energy.global_efficiency = 75 # This means 75% or 0.75
 
     The price can also be set on the pump or the energy object:
 
-        wn.energy.global_price = 3.61e-8  # $/J; equal to $0.13/kW-h
+        wn.options.energy.global_price = 3.61e-8  # $/J; equal to $0.13/kW-h
 
     or
 
@@ -272,46 +279,51 @@ def pump_energy(flowrate, head, wn):
         A pandas Dataframe containing node head 
         (index = times, columns = node names).
         
-     wn: wntr WaterNetworkModel
+    wn: wntr WaterNetworkModel
         Water network model.  The water network model is needed to 
         define energy efficiency.
 
     Returns
     -------
-    A tuple of pandas DataFrames: the first DataFrame contains pump energy in Watts,
-    the second contains pump cost is $/s (index = times, columns = pump names).
+    A pandas DataFrame that contains pump energy in Watts 
+    (index = times, columns = pump names).
     """
     
-    # TODO: Need to get this unit tested and not just functionally tested
     if wn.options.energy.demand_charge is not None and wn.options.energy.demand_charge != 0:
         raise ValueError('WNTR does not support demand charge yet.')
 
     pumps = wn.pump_name_list
     time = flowrate.index
+    flow = np.asarray(flowrate.loc[:, pumps], dtype=float)
     
-    headloss = pd.DataFrame(data=None, index=time, columns=pumps)
-    for pump_name, pump in wn.pumps():
-        start_node = pump.start_node_name
-        end_node = pump.end_node_name
-        start_head = head.loc[:,start_node]
-        end_head = head.loc[:,end_node]
-        headloss.loc[:,pump_name] = end_head - start_head
+    # Head gain of each pump, from the heads of its start and end nodes
+    if not head.index.equals(time):
+        head = head.reindex(time)
+    start_nodes = head.columns.get_indexer([wn.get_link(name).start_node_name for name in pumps])
+    end_nodes = head.columns.get_indexer([wn.get_link(name).end_node_name for name in pumps])
+    if (start_nodes < 0).any() or (end_nodes < 0).any():
+        raise KeyError('The head DataFrame does not include all pump start and end nodes')
+    head_values = np.asarray(head.values, dtype=float)
+    headloss = head_values[:, end_nodes] - head_values[:, start_nodes]
 
-    efficiency_dict = {}
-    for pump_name, pump in wn.pumps():
-        if pump.efficiency is None:
-            efficiency_dict[pump_name] = [wn.options.energy.global_efficiency/100.0 for i in time]
-        else:
-            raise NotImplementedError('WNTR does not support pump efficiency curves yet.')
-            curve = wn.get_curve(pump.efficiency)
-            x = [point[0] for point in curve.points]
-            y = [point[1]/100.0 for point in curve.points]
-            interp = scipy.interpolate.interp1d(x, y, kind='linear')
-            efficiency_dict[pump_name] = interp(np.array(flowrate.loc[:, pump_name]))
+    # Efficiency, interpolated from the efficiency curve of each pump
+    efficiency = np.full(flow.shape, wn.options.energy.global_efficiency/100.0)
+    curve_pumps = {}
+    for j, pump_name in enumerate(pumps):
+        curve = wn.get_link(pump_name).efficiency
+        if curve is not None:
+            if not isinstance(curve, Curve):
+                curve = wn.get_curve(curve)
+            curve_pumps.setdefault(curve.name, (curve, []))[1].append(j)
+    for curve, columns in curve_pumps.values():
+        x = [point[0] for point in curve.points]
+        y = [point[1]/100.0 for point in curve.points]
+        # Limit the efficiency to 1-100%, as in EPANET, so that curves that 
+        # start at zero efficiency do not divide by zero when there is no flow
+        efficiency[:, columns] = np.clip(np.interp(flow[:, columns], x, y), 0.01, 1.0)
 
-    efficiency = pd.DataFrame(data=efficiency_dict, index=time, columns=pumps)
-
-    energy = 1000.0 * 9.81 * headloss * flowrate / efficiency
+    energy = 1000.0 * 9.81 * headloss * flow / efficiency
+    energy = pd.DataFrame(data=energy, index=time, columns=pumps)
     
     return energy
 
@@ -319,6 +331,11 @@ def pump_cost(flowrate, head, wn):
     """
     Compute the pump cost over time.
     
+    The price of each pump is the pump energy price (or the global price, 
+    if the pump price is not set) times the value of the pump price pattern 
+    (or the global price pattern, if the pump pattern is not set) at each 
+    time.
+    
     Parameters
     ----------
     flowrate : pandas DataFrame
@@ -335,31 +352,34 @@ def pump_cost(flowrate, head, wn):
         
     Returns
     -----------
-    Pump cost (float)
+    A pandas DataFrame that contains pump cost in $/s 
+    (index = times, columns = pump names).
     
     """
     time = flowrate.index
     pumps = wn.pump_name_list
     energy = pump_energy(flowrate, head, wn)
     
-    price_dict = {}
-    for pump_name, pump in wn.pumps():
-        if pump.energy_price is None and pump.energy_pattern is None:
-            if wn.options.energy.global_pattern is None:
-                price_dict[pump_name] = [wn.options.energy.global_price for i in time]
-            else:
-                raise NotImplementedError('WNTR does not support price patterns yet.')
-        elif pump.energy_pattern is None:
-            if wn.energy.global_pattern is None:
-                price_dict[pump_name] = [pump.energy_price for i in time]
-            else:
-                raise NotImplementedError('WNTR does not support price patterns yet.')
+    base_price = np.empty(len(pumps))
+    pattern_pumps = {}
+    for j, pump_name in enumerate(pumps):
+        pump = wn.get_link(pump_name)
+        if pump.energy_price is None:
+            base_price[j] = wn.options.energy.global_price
         else:
-            raise NotImplementedError('WNTR does not support price patterns yet.')
-            
-    price = pd.DataFrame(data=price_dict, index=time, columns=pumps)
+            base_price[j] = pump.energy_price
+        pattern_name = pump.energy_pattern
+        if pattern_name is None:
+            pattern_name = wn.options.energy.global_pattern
+        if pattern_name is not None:
+            pattern_pumps.setdefault(str(pattern_name), []).append(j)
     
-    pump_cost =energy * price
+    # Price patterns, evaluated at all times
+    price = np.tile(base_price, (len(time), 1))
+    for pattern_name, columns in pattern_pumps.items():
+        pattern = wn.get_pattern(pattern_name)
+        price[:, columns] *= pattern.at_many(np.asarray(time))[:, np.newaxis]
     
-    return pump_cost
+    pump_cost = energy * price
     
+    return pump_cost
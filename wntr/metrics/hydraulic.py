@@ -16,8 +16,9 @@ import wntr.network
 import numpy as np
 import pandas as pd
 import networkx as nx
+import scipy.sparse
 import math
-from collections import Counter
+from collections import Counter, OrderedDict
 import sys
 if sys.version_info >= (3,0):
     from functools import reduce
@@ -57,19 +58,52 @@ def expected_demand(wn, start_time=None, end_time=None, timestep=None):
     if timestep is None:
         timestep = wn.options.time.report_timestep
         
-    exp_demand = {}
     tsteps = np.arange(start_time, end_time+timestep, timestep)
-    for name, junc in wn.junctions():
-        dem = []
-        for ts in tsteps:
-            dem.append(junc.demand_timeseries_list.at(ts, 
-                       multiplier=wn.options.hydraulic.demand_multiplier))
-        exp_demand[name] = dem 
+    junction_names = wn.junction_name_list
+    exp_demand = _expected_demand_values(wn, tsteps, junction_names)
     
-    exp_demand = pd.DataFrame(index=tsteps, data=exp_demand)
+    exp_demand = pd.DataFrame(index=tsteps, data=exp_demand, columns=junction_names)
     
     return exp_demand
 
+def _expected_demand_values(wn, times, junction_names):
+    """
+    Compute expected demand at junctions and times as an array of shape 
+    (times, junctions).
+    
+    Each pattern used by a demand is evaluated at all times at once from the 
+    pattern table of the model, and the base demands of each junction are 
+    summed over the demand categories with a sparse (pattern, junction) 
+    matrix. Demands without a pattern use a multiplier of 1.
+    """
+    multiplier = wn.options.hydraulic.demand_multiplier
+    pattern_positions = dict(zip(wn.patterns._names(), range(len(wn.patterns))))
+    columns = OrderedDict() # pattern position -> column of the pattern values
+    rows = []
+    cols = []
+    base_demands = []
+    for j, name in enumerate(junction_names):
+        for demand in wn.get_node(name).demand_timeseries_list:
+            pattern = demand.pattern
+            if pattern: 
+                column = columns.setdefault(pattern_positions[pattern.name], len(columns))
+            else:
+                column = -1
+            rows.append(column)
+            cols.append(j)
+            base_demands.append(demand.base_value*multiplier)
+    
+    times = np.asarray(times, dtype=float)
+    values = np.ones((len(times), len(columns)+1)) # last column = no pattern
+    if len(columns) > 0:
+        values[:, :-1] = wn.patterns._values_at(times, np.array(list(columns), dtype=np.intp))
+    rows = np.array(rows, dtype=np.intp)
+    rows[rows < 0] = len(columns)
+    base_demands = scipy.sparse.csr_matrix((base_demands, (rows, cols)), 
+                                           shape=(len(columns)+1, len(junction_names)))
+    
+    return np.asarray(base_demands.T.dot(values.T).T)
+
 def average_expected_demand(wn):
     """
     Compute average expected demand per day at each junction using base demands
@@ -87,7 +121,7 @@ def average_expected_demand(wn):
     """
     L = [24*3600] # start with a 24 hour pattern
     for name, pattern in wn.patterns():
-        L.append(len(pattern.multipliers)*wn.options.time.pattern_timestep)
+        L.append(len(pattern)*wn.options.time.pattern_timestep)
     lcm = int(_lcml(L))
     
     start_time = wn.options.time.pattern_start
@@ -272,6 +306,15 @@ def entropy(G, sources=None, sinks=None):
     A tuple which includes:
         - A pandas Series that contains entropy for each node
         - System entropy (float)
+
+    Notes
+    -----
+    If the graph is acyclic (for example, a graph from 
+    ``wn.get_graph(link_weight=flowrate, modify_direction=True)``), the 
+    number of paths through each link and the number of links on those 
+    paths are counted in topological order, without listing the paths.
+    Otherwise, all simple paths from the sources to each sink are listed, 
+    which is slow for large networks.
     """
 
     if G.is_directed() == False:
@@ -283,6 +326,48 @@ def entropy(G, sources=None, sinks=None):
     if sinks is None:
         sinks = G.nodes()
 
+    if nx.is_directed_acyclic_graph(G):
+        S, Q = _entropy_dag(G, sources, sinks)
+    else:
+        S, Q = _entropy_paths(G, sources, sinks)
+
+    Q0 = sum(nx.get_edge_attributes(G, 'weight').values())
+
+    # Equation 3
+    S_ave = 0
+    for nodej in sinks:
+        if not np.isnan(S[nodej]):
+            if nodej not in sources:
+                if Q[nodej]/Q0 > 0:
+                    S_ave = S_ave + \
+                        (Q[nodej]*S[nodej])/Q0 - \
+                        Q[nodej]/Q0*math.log(Q[nodej]/Q0)
+                        
+    S = pd.Series(S) # convert S to a series
+    
+    return [S, S_ave]
+
+def _node_entropy(qij, Qj, aij):
+    """Entropy of a node from the flow and number of equivalent independent 
+    paths of each incoming link (Equation 7)"""
+    Sj = 0
+    for idx in range(len(qij)):
+        if qij[idx]/Qj > 0:
+            Sj = Sj - \
+                qij[idx]/Qj*math.log(qij[idx]/Qj) + \
+                qij[idx]/Qj*math.log(aij[idx])
+    return Sj
+
+def _link_flow(G, nodei, nodej):
+    """Total flow in the links from node i to node j"""
+    flow = 0
+    for link in G[nodei][nodej].keys():
+        flow = flow + G[nodei][nodej][link]['weight']
+    return flow
+
+def _entropy_paths(G, sources, sinks):
+    """Compute node entropy and inflow by listing all simple paths from the 
+    sources to each sink"""
     S = {}
     Q = {}
     for nodej in sinks:
@@ -325,10 +410,7 @@ def entropy(G, sources=None, sinks=None):
             # MDij = links in the NDij path
             MDij = [(t[idx],t[idx+1]) for t in temp for idx in range(len(t)-1)]
 
-            flow = 0
-            for link in G[nodei][nodej].keys():
-                flow = flow + G[nodei][nodej][link]['weight']
-            qij.append(flow)
+            qij.append(_link_flow(G, nodei, nodej))
 
             # dk = degree of link k in MDij
             dk = Counter()
@@ -341,25 +423,126 @@ def entropy(G, sources=None, sinks=None):
         Q[nodej] = sum(qij) # Total flow into node j
 
         # Equation 7
-        S[nodej] = 0
-        for idx in range(len(qij)):
-            if qij[idx]/Q[nodej] > 0:
-                S[nodej] = S[nodej] - \
-                    qij[idx]/Q[nodej]*math.log(qij[idx]/Q[nodej]) + \
-                    qij[idx]/Q[nodej]*math.log(aij[idx])
+        S[nodej] = _node_entropy(qij, Q[nodej], aij)
 
-    Q0 = sum(nx.get_edge_attributes(G, 'weight').values())
+    return S, Q
 
-    # Equation 3
-    S_ave = 0
+def _entropy_dag(G, sources, sinks):
+    """
+    Compute node entropy and inflow of an acyclic graph in topological order.
+    
+    This gives the same result as _entropy_paths without listing the paths. 
+    For each link from node i to sink j, the paths from the sources to j 
+    that pass through i are counted (NDij), along with the number of links 
+    on those paths, where parallel links count as a fraction (sum(V)), and 
+    the number of distinct links used by those paths (len(V)). Paths 
+    are split at node i: counts for the paths from the sources to i are 
+    accumulated once for all nodes, and counts for the paths from i to j 
+    only use the nodes between i and j. Sets of nodes are stored as 
+    integer bit masks, with one bit per node in topological order.
+    """
+    order = list(nx.topological_sort(G))
+    bit = {node: 1 << k for k, node in enumerate(order)}
+    
+    # Number of paths from the sources to each node, with each parallel link 
+    # giving a separate path, and sum over those paths of the number of links
+    # (a link with n parallel links counts as 1/n)
+    paths = dict.fromkeys(order, 0)
+    path_links = dict.fromkeys(order, 0)
+    for source in sources:
+        paths[source] += 1
+    for node in order:
+        for pred in G.predecessors(node):
+            n = len(G[pred][node])
+            paths[node] += n*paths[pred]
+            path_links[node] += n*path_links[pred] + paths[pred]
+    
+    # Ancestors (including the node) that are connected to a source, and 
+    # nodes grouped by their number of upstream nodes connected to a source
+    ancestors = {}
+    in_degree_masks = {}
+    for node in order:
+        if paths[node] == 0:
+            continue
+        mask = bit[node]
+        in_degree = 0
+        for pred in G.predecessors(node):
+            if paths[pred] > 0:
+                mask |= ancestors[pred]
+                in_degree += 1
+        ancestors[node] = mask
+        in_degree_masks[in_degree] = in_degree_masks.get(in_degree, 0) | bit[node]
+    
+    # Descendants (including the node)
+    descendants = {}
+    for node in reversed(order):
+        mask = bit[node]
+        for succ in G.successors(node):
+            mask |= descendants[succ]
+        descendants[node] = mask
+    
+    def distinct_links(nodei):
+        # Number of distinct links on the paths from the sources to nodei
+        return sum(in_degree*_count_bits(ancestors[nodei] & mask) 
+                   for in_degree, mask in in_degree_masks.items())
+    
+    S = {}
+    Q = {}
     for nodej in sinks:
-        if not np.isnan(S[nodej]):
-            if nodej not in sources:
-                if Q[nodej]/Q0 > 0:
-                    S_ave = S_ave + \
-                        (Q[nodej]*S[nodej])/Q0 - \
-                        Q[nodej]/Q0*math.log(Q[nodej]/Q0)
-                        
-    S = pd.Series(S) # convert S to a series
+        if nodej in sources:
+            S[nodej] = 0 # nodej is the source
+            continue
+        
+        if G.nodes[nodej]['type'] != 'Junction' or paths[nodej] == 0:
+            S[nodej] = np.nan # nodej is not connected to any sources
+            continue
+        
+        qij = []
+        aij = []
+        for nodei in G.predecessors(nodej):
+            if paths[nodei] == 0:
+                continue
+            
+            # Count the paths from nodei to nodej, the links on those paths, 
+            # and the distinct links between the nodes on those paths
+            between = descendants[nodei] & ancestors[nodej]
+            nodes = [order[k] for k in _bit_positions(between)]
+            paths_ij = {nodei: 1}
+            path_links_ij = {nodei: 0}
+            links_ij = 0
+            for node in nodes[1:]:
+                paths_ij[node] = 0
+                path_links_ij[node] = 0
+                for pred in G.predecessors(node):
+                    if bit[pred] & between:
+                        n = len(G[pred][node])
+                        paths_ij[node] += n*paths_ij[pred]
+                        path_links_ij[node] += n*path_links_ij[pred] + paths_ij[pred]
+                        links_ij += 1
+            
+            NDij = paths[nodei]*paths_ij[nodej]
+            sum_V = path_links[nodei]*paths_ij[nodej] + paths[nodei]*path_links_ij[nodej]
+            len_V = distinct_links(nodei) + links_ij
+            
+            qij.append(_link_flow(G, nodei, nodej))
+            aij.append(NDij*(1-float(sum_V - len_V)/sum_V))
+        
+        Q[nodej] = sum(qij) # Total flow into node j
+        
+        # Equation 7
+        S[nodej] = _node_entropy(qij, Q[nodej], aij)
     
-    return [S, S_ave]
+    return S, Q
+
+def _count_bits(mask):
+    """Number of bits set in an integer bit mask"""
+    return bin(mask).count('1')
+
+def _bit_positions(mask):
+    """Positions of the bits set in an integer bit mask, in increasing order"""
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
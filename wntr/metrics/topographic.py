@@ -19,6 +19,9 @@ NetworkX MultiDiGraph, which can be created by calling ``G = wn.get_graph()``
 import networkx as nx
 import numpy as np
 import pandas as pd
+import scipy.sparse
+import scipy.sparse.csgraph
+from collections import Counter
 import logging
 
 logger = logging.getLogger(__name__)
@@ -152,10 +155,29 @@ def critical_ratio_defrag(G):
     return fc
 
 
-def _links_in_simple_paths(G, sources, sinks):
+def _links_in_simple_paths(G, sources, sinks, max_paths=10000, num_samples=1000, seed=None):
     """
     Count all links in a simple path between sources and sinks
 
+    A link is counted once for each simple path (as listed by 
+    nx.all_simple_paths, which repeats a path for each parallel link) 
+    from a source to a sink that passes through its start and end nodes.
+    Paths are counted, not listed. The strongly connected components of the
+    graph form an acyclic graph, and the number of paths from the sources
+    to each node and from each node to the sinks are accumulated over the
+    components in topological order. Within a component that contains
+    cycles, the simple paths from each node where paths enter the
+    component are listed, up to max_paths paths. A component with more
+    paths is estimated by sampling random simple paths (Knuth's estimator),
+    which is unbiased but can have a large variance when a component has 
+    very many paths; increase num_samples to reduce it.
+    
+    With the default max_paths and seed, a graph with large looped 
+    components (such as an undirected network graph) is therefore 
+    estimated, and the counts are floats that change from call to call
+    instead of exact integers. Set seed for reproducible estimates, or set 
+    max_paths to None for exact counts, which can take a very long time.
+
     Parameters
     -----------
     G: networkx MultiDiGraph
@@ -164,27 +186,204 @@ def _links_in_simple_paths(G, sources, sinks):
         List of source nodes
     sinks: list
         List of sink nodes
+    max_paths: int (optional)
+        Maximum number of simple paths listed from a node within a 
+        component before the component is estimated by sampling, default = 
+        10000. If None, all paths are listed and the counts are exact.
+    num_samples: int (optional)
+        Number of random simple paths sampled from each node where paths 
+        enter a component that is estimated, default = 1000
+    seed: int (optional)
+        Seed of the random number generator used for sampling
 
     Returns
     -------
-    Dictionary with the number of times each link is involved in a path
+    pandas Series with the number of times each link is involved in a path,
+    indexed by link name. The counts are integers unless a component is 
+    estimated by sampling.
     
+    Notes
+    -----
+    Acyclic graphs (such as a graph directed by flow) are counted exactly in 
+    O(V+E) time. The cost of a component with cycles is at most max_paths 
+    listed paths, or num_samples paths of at most the size of the component,
+    per node where paths enter the component.
     """
     link_names = [name for (node1, node2, name) in list(G.edges(keys=True))]
-    link_count = pd.Series(data = 0, index=link_names)
-
-    for sink in sinks:
-        for source in sources:
-            if nx.has_path(G, source, sink):
-                paths = nx.all_simple_paths(G,source,target=sink)
-                for path in paths:
-                    for i in range(len(path)-1):
-                        links = list(G[path[i]][path[i+1]].keys())
-                        for link in links:
-                            link_count[link] = link_count[link]+1
+    if not G.is_directed():
+        G = G.to_directed()
+    rng = np.random.RandomState(seed)
+    
+    # Number of parallel links between each pair of nodes, without self loops
+    succ = {node: {} for node in G.nodes()}
+    pred = {node: {} for node in G.nodes()}
+    for node1, node2 in G.edges():
+        if node1 != node2:
+            succ[node1][node2] = succ[node1].get(node2, 0) + 1
+            pred[node2][node1] = succ[node1][node2]
+    source_count = Counter(sources)
+    sink_count = Counter(sinks)
+    
+    C = nx.condensation(G)
+    components = [C.nodes[c]['members'] for c in nx.topological_sort(C)]
+    
+    # Forward pass: number of paths from the sources that enter each 
+    # component at each node (paths_in) and that end at each node (paths_to)
+    paths_in = {}
+    paths_to = {}
+    paths_within = {} # component index -> {entry node: {node: paths}}
+    for c, members in enumerate(components):
+        for node in members:
+            paths_in[node] = source_count[node] + sum(n*paths_to[node1] 
+                for node1, n in pred[node].items() if node1 not in members)
+        if len(members) == 1:
+            for node in members:
+                paths_to[node] = paths_in[node]
+            continue
+        paths_within[c] = {}
+        for node in members:
+            paths_to[node] = 0
+        for entry in members:
+            if paths_in[entry] == 0:
+                continue
+            counts = _component_paths(succ, members, entry, max_paths)
+            if counts is None:
+                counts = _sample_component_paths(succ, members, entry, num_samples, rng)
+            paths_within[c][entry] = counts
+            for node, count in counts.items():
+                paths_to[node] += paths_in[entry]*count
+    
+    # Backward pass: number of paths to the sinks that leave each component 
+    # at each node (paths_out) and that start at each node (paths_from), and
+    # link counts
+    paths_from = {}
+    pair_count = {}
+    for c in reversed(range(len(components))):
+        members = components[c]
+        paths_out = {}
+        for node in members:
+            paths_out[node] = sink_count[node] + sum(n*paths_from[node2] 
+                for node2, n in succ[node].items() if node2 not in members)
+            for node2, n in succ[node].items():
+                if node2 not in members:
+                    pair_count[node, node2] = paths_to[node]*n*paths_from[node2]
+        if len(members) == 1:
+            for node in members:
+                paths_from[node] = paths_out[node]
+            continue
+        for node in members:
+            paths_from[node] = 0
+        for entry, counts in paths_within[c].items():
+            if _count_component_links(succ, members, entry, paths_out, paths_in[entry], 
+                                      max_paths, pair_count, paths_from) is None:
+                _sample_component_links(succ, members, entry, paths_out, paths_in[entry], 
+                                        num_samples, rng, pair_count, paths_from)
+    
+    counts = {}
+    for node1, node2, name in G.edges(keys=True):
+        counts[name] = counts.get(name, 0) + pair_count.get((node1, node2), 0)
+    link_count = pd.Series(data=[counts[name] for name in link_names], index=link_names)
 
     return link_count
 
+def _component_paths(succ, members, entry, max_paths):
+    """Number of simple paths within a component from the entry node to each
+    node (including the path with no links), or None if there are more than 
+    max_paths paths"""
+    counts = {entry: 1}
+    num_paths = 1
+    visited = set([entry])
+    stack = [(entry, 1, iter(succ[entry].items()))]
+    while stack:
+        node, weight, children = stack[-1]
+        for child, n in children:
+            if child in members and child not in visited:
+                num_paths += 1
+                if max_paths is not None and num_paths > max_paths:
+                    return None
+                counts[child] = counts.get(child, 0) + weight*n
+                visited.add(child)
+                stack.append((child, weight*n, iter(succ[child].items())))
+                break
+        else:
+            stack.pop()
+            visited.discard(node)
+    return counts
+
+def _count_component_links(succ, members, entry, paths_out, paths_in, max_paths, 
+                           pair_count, paths_from):
+    """Add the number of paths through each link within a component, for 
+    paths that enter at the entry node, and set the number of paths from 
+    the entry node to the sinks; returns None if there are more than 
+    max_paths paths"""
+    num_paths = 1
+    visited = set([entry])
+    # stack entries: node, weight, children, number of paths to the sinks
+    stack = [[entry, 1, iter(succ[entry].items()), paths_out[entry]]]
+    pairs = {}
+    while stack:
+        frame = stack[-1]
+        node, weight, children = frame[0], frame[1], frame[2]
+        for child, n in children:
+            if child in members and child not in visited:
+                num_paths += 1
+                if max_paths is not None and num_paths > max_paths:
+                    return None
+                visited.add(child)
+                stack.append([child, weight*n, iter(succ[child].items()), weight*n*paths_out[child]])
+                break
+        else:
+            stack.pop()
+            visited.discard(node)
+            if stack:
+                parent = stack[-1]
+                parent[3] += frame[3]
+                pairs[parent[0], node] = pairs.get((parent[0], node), 0) + frame[3]
+    for pair, count in pairs.items():
+        pair_count[pair] = pair_count.get(pair, 0) + paths_in*count
+    paths_from[entry] = frame[3]
+    return True
+
+def _random_simple_path(succ, members, entry, rng):
+    """Random simple path within a component from the entry node, extended 
+    until it cannot be extended, and the weight of each of its prefixes 
+    (the inverse of its probability, times the number of parallel links)"""
+    path = [entry]
+    weights = [1.0]
+    visited = set([entry])
+    while True:
+        children = [(child, n) for child, n in succ[path[-1]].items() 
+                    if child in members and child not in visited]
+        if len(children) == 0:
+            return path, weights
+        child, n = children[rng.randint(len(children))]
+        path.append(child)
+        weights.append(weights[-1]*len(children)*n)
+        visited.add(child)
+
+def _sample_component_paths(succ, members, entry, num_samples, rng):
+    """Estimate of the number of simple paths within a component from the 
+    entry node to each node"""
+    counts = {}
+    for i in range(num_samples):
+        path, weights = _random_simple_path(succ, members, entry, rng)
+        for node, weight in zip(path, weights):
+            counts[node] = counts.get(node, 0) + weight/num_samples
+    return counts
+
+def _sample_component_links(succ, members, entry, paths_out, paths_in, num_samples, rng, 
+                            pair_count, paths_from):
+    """Estimate of _count_component_links"""
+    paths_from[entry] = 0
+    for i in range(num_samples):
+        path, weights = _random_simple_path(succ, members, entry, rng)
+        # Number of paths to the sinks through each prefix of the path
+        to_sinks = np.cumsum([w*paths_out[node] for node, w in zip(path, weights)][::-1])[::-1]
+        paths_from[entry] += to_sinks[0]/num_samples
+        for k in range(1, len(path)):
+            pair = (path[k-1], path[k])
+            pair_count[pair] = pair_count.get(pair, 0) + paths_in*to_sinks[k]/num_samples
+
 def valve_segments(G, valve_layer):
     """
     Valve segmentation
@@ -214,130 +413,44 @@ def valve_segments(G, valve_layer):
     # Node and link names
     nodes = list(uG.nodes()) # list of node names
     links = list(uG.edges(keys=True)) # list of tuples with start node, end node, link name
+    num_nodes = len(nodes)
+    num_links = len(links)
+    node_index = dict(zip(nodes, range(num_nodes)))
+    valves = set(zip(valve_layer['link'], valve_layer['node']))
     
-    # Append N_ and L_ to node and link names, used in matrices
-    matrix_node_names = ['N_'+n for n in nodes]
-    matrix_link_names = ['L_'+k for u,v,k in links]
-
-    # Pipe-node connectivity matrix
-    A = nx.incidence_matrix(uG).todense().T
-    AC = pd.DataFrame(A, columns=matrix_node_names, index=matrix_link_names, dtype=int)
-    
-    # Valve-node connectivity matrix
-    VC = pd.DataFrame(0, columns=matrix_node_names, index=matrix_link_names)
-    for i, row in valve_layer.iterrows():
-        VC.at['L_'+row['link'], 'N_'+row['node']] = 1
-    
-    # Valve deficient matrix (anti-valve matrix)
-    VD = AC - VC
-
-    # Direct connectivity matrix
-    NI = pd.DataFrame(np.identity(len(matrix_node_names)),
-                      index = matrix_node_names, columns = matrix_node_names)
-    LI = pd.DataFrame(np.identity(len(matrix_link_names)),
-                      index = matrix_link_names, columns = matrix_link_names)
-    DC_left = pd.concat([NI, VD], sort=False)
-    DC_right = pd.concat([VD.T, LI], sort=False)
-    DC = pd.concat([DC_left, DC_right], axis=1, sort=False)
-    DC = DC.astype(int)
-
-    # initialization for looping routine
-    seg_index = 0
+    # Valve deficient connectivity between nodes and links: elements 
+    # 0..num_nodes-1 are nodes and the following elements are links. 
+    # A link is connected to each of its end nodes that is not protected 
+    # by a valve on the link.
+    link_elements = []
+    node_elements = []
+    for i, (start_node, end_node, link_name) in enumerate(links):
+        for node_name in set([start_node, end_node]):
+            if (link_name, node_name) not in valves:
+                link_elements.append(num_nodes + i)
+                node_elements.append(node_index[node_name])
+    num_elements = num_nodes + num_links
+    connectivity = scipy.sparse.csr_matrix(
+        (np.ones(len(link_elements), dtype=np.int8), (link_elements, node_elements)), 
+        shape=(num_elements, num_elements))
+    num_segments, labels = scipy.sparse.csgraph.connected_components(connectivity, directed=False)
     
-    # pre-processing to find isolated elements before looping
-    seg_label = {}
-
-    for start_node, end_node, link_name in links:
-        link_valves = valve_layer[valve_layer['link']==link_name]
-        if set(link_valves['node']) >= set([start_node, end_node]):
-            seg_index += 1
-            seg_label['L_'+link_name] = seg_index
-            
-    for node_name in nodes:
-        node_valves = valve_layer[valve_layer['node']==node_name]
-        node_links = [k for u,v,k in uG.edges(node_name, keys=True)]
-        if set(node_valves['link']) >= set(node_links):
-            seg_index += 1
-            seg_label['N_'+node_name] = seg_index
+    # Number the segments: isolated links (valves on both ends) first, then 
+    # isolated nodes (valves on all links), then the other segments in order 
+    # of their first node or link
+    isolated = np.bincount(labels, minlength=num_segments)[labels] == 1
+    elements = np.arange(num_elements)
+    first = np.concatenate([elements[num_nodes:][isolated[num_nodes:]], 
+                            elements[:num_nodes][isolated[:num_nodes]], 
+                            elements[~isolated]])
+    segments, first_index = np.unique(labels[first], return_index=True)
+    seg_number = np.empty(num_segments, dtype=int)
+    seg_number[segments[np.argsort(first_index)]] = np.arange(1, num_segments+1)
+    seg_label = seg_number[labels]
     
-    # drop previously found isolated elements before looping
-    DC = DC.drop(seg_label.keys())
-    DC = DC.drop(seg_label.keys(), axis=1)   
-    
-    DC_np = DC.to_numpy() # requires Pandas v.0.24.0
-
-    # vector of length nodes+links where the ith entry is the segment number of node/link i
-    seg_label_DC = np.zeros(shape=(len(DC.index)), dtype=int)
-
-    # Loop over all nodes and links to grow segments
-    for i in range(len(seg_label_DC)):
-        
-        # Only assign a seg_label if node/link doesn't already have one
-        if seg_label_DC[i] == 0:
-            
-            # Advance segment label and assign to node/link, mark as assigned
-            seg_index += 1
-            seg_label_DC[i] = seg_index
-           
-            # Initialize segment size
-            seg_size = (seg_label_DC == seg_index).sum()
-             
-            flag = True
-            
-            #print(i)
-    
-            # Nodes and links that are part of the segment
-            seg = np.where(seg_label_DC == seg_index)[0]
-        
-            # Connectivity of the segment
-            seg_DC = np.zeros(shape=(DC_np.shape[0]), dtype=int)
-            seg_DC[seg] = 1
-    
-            while flag:          
-               
-                # Potential connectivity of the segment      
-                p_seg_DC = DC_np + seg_DC[:,None] # this is slow
-                
-                # Nodes and links that are connected to the segment
-                temp = np.max(p_seg_DC,axis=0) # this is somewhat slow
-                connected_to_seg = np.where(temp > 1)[0]   
-                seg_DC[connected_to_seg] = 1
-      
-                # Label nodes/links connected to the segment
-                seg_label_DC[connected_to_seg] = seg_index
-                
-                # Find new segment size
-                new_seg_size = (seg_label_DC == seg_index).sum()
-                    
-                # Check for progress
-                if seg_size == new_seg_size:
-                    flag = False
-                else:
-                    seg_size = new_seg_size
-          
-                # Update seg_DC and DC_np
-                seg_DC = DC_np[:,i] + np.sum(
-                                        p_seg_DC[:,connected_to_seg],axis=1
-                                        ) # this is slow
-                seg_DC = np.clip(seg_DC,0,1)          
-                DC_np[:,connected_to_seg] = np.repeat(
-                                            seg_DC,len(connected_to_seg)).reshape(
-                                            len(seg_DC),len(connected_to_seg))
-                                            # this is somewhat slow
-    
-    #        print(i, seg_size)
-    
-    # combine pre-processed and looped results
-    seg_labels = list(seg_label.values()) + list(seg_label_DC)
-    seg_labels_index = list(seg_label.keys()) + list(DC.index)
-    seg_label = pd.Series(seg_labels, index=seg_labels_index, dtype=int)
-
     # Separate node and link segments
-    # remove leading N_ and L_ from node and link names
-    node_segments = seg_label[matrix_node_names]
-    link_segments = seg_label[matrix_link_names]
-    node_segments.index = node_segments.index.str[2::]
-    link_segments.index = link_segments.index.str[2::]  
+    node_segments = pd.Series(seg_label[:num_nodes], index=nodes)
+    link_segments = pd.Series(seg_label[num_nodes:], index=[k for u,v,k in links])
     
     # Extract segment sizes, for nodes and links
     seg_link_sizes = link_segments.value_counts().rename('link')
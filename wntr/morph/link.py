@@ -2,7 +2,6 @@
 The wntr.morph.link module contains functions to split/break pipes.
 """
 import logging
-import copy
 from wntr.network.elements import Reservoir, Pipe
 
 logger = logging.getLogger(__name__)
@@ -135,7 +134,7 @@ def _split_or_break_pipe(wn, pipe_name_to_split, new_pipe_name,
                          flag, return_copy):
     
     if return_copy: # Get a copy of the WaterNetworkModel
-        wn2 = copy.deepcopy(wn)
+        wn2 = wn.clone()
     else:
         wn2 = wn
     
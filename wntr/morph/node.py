@@ -2,7 +2,6 @@
 The wntr.morph.node module contains functions to modify node coordinates.
 """
 import logging
-import copy
 import numpy as np
 from scipy.spatial.distance import pdist
 try:
@@ -33,7 +32,7 @@ def scale_node_coordinates(wn, scale, return_copy=True):
         Water network model with updated node coordinates
     """
     if return_copy: # Get a copy of the WaterNetworkModel
-        wn2 = copy.deepcopy(wn)
+        wn2 = wn.clone()
     else:
         wn2 = wn
     
@@ -66,7 +65,7 @@ def translate_node_coordinates(wn, offset_x, offset_y, return_copy=True):
         Water network model with updated node coordinates
     """
     if return_copy: # Get a copy of the WaterNetworkModel
-        wn2 = copy.deepcopy(wn)
+        wn2 = wn.clone()
     else:
         wn2 = wn
     
@@ -97,7 +96,7 @@ def rotate_node_coordinates(wn, theta, return_copy=True):
         Water network model with updated node coordinates
     """
     if return_copy: # Get a copy of the WaterNetworkModel
-        wn2 = copy.deepcopy(wn)
+        wn2 = wn.clone()
     else:
         wn2 = wn
     
@@ -136,7 +135,7 @@ def convert_node_coordinates_UTM_to_longlat(wn, zone_number, zone_letter, return
         raise ImportError('utm package is required')
     
     if return_copy: # Get a copy of the WaterNetworkModel
-        wn2 = copy.deepcopy(wn)
+        wn2 = wn.clone()
     else:
         wn2 = wn
     
@@ -169,7 +168,7 @@ def convert_node_coordinates_longlat_to_UTM(wn, return_copy=True):
         raise ImportError('utm package is required')
     
     if return_copy: # Get a copy of the WaterNetworkModel
-        wn2 = copy.deepcopy(wn)
+        wn2 = wn.clone()
     else:
         wn2 = wn
     
@@ -248,7 +247,7 @@ def _convert_with_map(wn, node_map, flag, return_copy):
         return
     
     if return_copy: # Get a copy of the WaterNetworkModel
-        wn2 = copy.deepcopy(wn)
+        wn2 = wn.clone()
     else:
         wn2 = wn
     
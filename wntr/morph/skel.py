@@ -3,7 +3,6 @@ The wntr.morph.skel module contains functions to skeletonize water
 network models.
 """
 import logging
-import copy
 import itertools
 import networkx as nx
     
@@ -77,7 +76,7 @@ class _Skeletonize(object):
         
         if return_copy:
             # Get a copy of the WaterNetworkModel
-            self.wn = copy.deepcopy(wn)
+            self.wn = wn.clone()
         else:
             self.wn = wn
         
@@ -9,6 +9,9 @@ the network model.
     AbstractModel
     Subject
     Observer
+    ColumnAttribute
+    ColumnStore
+    JournaledAttribute
     Node
     Link
     Registry
@@ -18,6 +21,7 @@ the network model.
 
 """
 import logging
+import numpy as np
 import six
 from six import string_types
 import types
@@ -71,7 +75,222 @@ class Observer(six.with_metaclass(abc.ABCMeta, object)):
         pass
 
 
-class Node(six.with_metaclass(abc.ABCMeta, object)):
+class ColumnAttribute(object):
+    """Element attribute that can be stored in a :class:`~wntr.network.base.ColumnStore`.
+
+    Until the element is attached to a column store (see
+    :meth:`~wntr.network.base.Registry.enable_columns`), the value is kept in
+    the element's ``__dict__`` as an ordinary attribute. Once attached, it is
+    read from and written to the store's column at the element's row.
+
+    Parameters
+    ----------
+    column : str
+        Name of the column in the store
+    key : str, optional
+        Key used for the value in the element's ``__dict__``, default = column
+    """
+    __slots__ = ('column', 'key')
+
+    def __init__(self, column, key=None):
+        self.column = column
+        self.key = column if key is None else key
+
+    def __get__(self, obj, objtype=None):
+        # Attached elements no longer hold the value in their __dict__
+        try:
+            return obj.__dict__[self.key]
+        except KeyError:
+            return obj._columns.get(self.column, obj._row)
+        except AttributeError:
+            if obj is None:
+                return self
+            raise
+
+    def __set__(self, obj, value):
+        columns = obj._columns
+        if columns is None:
+            obj.__dict__[self.key] = value
+        else:
+            columns.set(self.column, obj._row, value)
+        if obj._journal is not None and self.key[0] != '_':
+            obj._journal.record('modified', obj.__class__.__name__, obj.name, self.key)
+
+
+class JournaledAttribute(object):
+    """Element attribute whose changes are recorded in the model's change journal.
+
+    The value is kept in the element's ``__dict__`` as an ordinary attribute,
+    so it is read at the speed of an ordinary attribute; only setting it
+    goes through the descriptor. Public properties with a setter and public 
+    :class:`~wntr.network.base.ColumnAttribute` attributes of nodes and links
+    are journaled without this descriptor.
+
+    Parameters
+    ----------
+    name : str
+        Name of the attribute
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+        if obj._journal is not None:
+            obj._journal.record('modified', obj.__class__.__name__, obj.name, self.name)
+
+
+def _journaled_property(attribute, prop):
+    """Wrap a property so that setting it is recorded in the model's change journal"""
+    fset = prop.fset
+    def setter(obj, value):
+        fset(obj, value)
+        if obj._journal is not None:
+            obj._journal.record('modified', obj.__class__.__name__, obj.name, attribute)
+    return property(prop.fget, setter, prop.fdel, prop.__doc__)
+
+
+class _ElementMeta(abc.ABCMeta):
+    """Metaclass for nodes and links that journals the public property setters"""
+    def __init__(cls, name, bases, namespace):
+        super(_ElementMeta, cls).__init__(name, bases, namespace)
+        untracked = getattr(cls, '_untracked_attributes', ())
+        for attribute, value in list(namespace.items()):
+            if isinstance(value, property) and value.fset is not None and \
+                    attribute[0] != '_' and attribute not in untracked:
+                setattr(cls, attribute, _journaled_property(attribute, value))
+
+
+_class_column_attributes = {}
+
+def _column_attributes(cls):
+    """Get the column attributes defined for an element class"""
+    try:
+        return _class_column_attributes[cls]
+    except KeyError:
+        attributes = OrderedDict()
+        for klass in reversed(cls.__mro__):
+            for value in vars(klass).values():
+                if isinstance(value, ColumnAttribute):
+                    attributes[value.column] = value
+        attributes = list(attributes.values())
+        _class_column_attributes[cls] = attributes
+        return attributes
+
+# Marks attributes that an object does not have
+_missing = object()
+
+_numeric_types = frozenset([bool, float, np.float64, np.int64, np.bool_] + list(six.integer_types))
+
+def _column_value(kind, value):
+    """Convert a value read from a column into the element attribute value"""
+    if kind == 'status':
+        return LinkStatus(int(value))
+    elif kind == 'bool':
+        return bool(value)
+    elif kind == 'nullable' and value != value:
+        return None
+    return float(value)
+
+
+class ColumnStore(object):
+    """Typed NumPy columns for element attributes, indexed by integer row.
+
+    Each element attached to the store is given a row, and every
+    :class:`~wntr.network.base.ColumnAttribute` of its class is kept in the
+    column with the same name. Columns an element does not have are NaN
+    (or 0 for integer and boolean columns). Rows of detached elements are 
+    reused.
+
+    Parameters
+    ----------
+    spec : OrderedDict
+        Column name to column kind; one of ``'float'``, ``'nullable'`` (a float
+        where None is stored as NaN), ``'bool'`` or ``'status'`` (a 
+        :class:`LinkStatus` stored as an integer)
+    capacity : int
+        Initial number of rows to allocate
+    """
+    _dtypes = {'float': np.float64, 'nullable': np.float64, 'bool': np.bool_, 'status': np.int8}
+    _fill = {'float': np.nan, 'nullable': np.nan, 'bool': False, 'status': 0}
+
+    def __init__(self, spec, capacity=16):
+        self._spec = spec
+        self._capacity = max(int(capacity), 1)
+        self._data = OrderedDict()
+        for column, kind in spec.items():
+            self._data[column] = self._empty(kind, self._capacity)
+        self._num_rows = 0
+        self._free = []
+
+    def _empty(self, kind, size):
+        return np.full(size, self._fill[kind], dtype=self._dtypes[kind])
+
+    def _grow(self):
+        capacity = 2*self._capacity
+        for column, kind in self._spec.items():
+            values = self._empty(kind, capacity)
+            values[:self._capacity] = self._data[column]
+            self._data[column] = values
+        self._capacity = capacity
+
+    @property
+    def columns(self):
+        """list of str: The column names"""
+        return list(self._spec.keys())
+
+    def attach(self, obj):
+        """Move the column attributes of an element into the store."""
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._num_rows == self._capacity:
+                self._grow()
+            row = self._num_rows
+            self._num_rows += 1
+        values = obj.__dict__
+        for attribute in _column_attributes(type(obj)):
+            self.set(attribute.column, row, values.pop(attribute.key))
+        values['_row'] = row
+        values['_columns'] = self
+        # A dictionary does not shrink when keys are removed; replace it by
+        # a copy sized for the attributes left on the element
+        obj.__dict__ = dict(values)
+
+    def detach(self, obj):
+        """Move the column attributes of an element back onto the element."""
+        row = obj._row
+        values = {}
+        for attribute in _column_attributes(type(obj)):
+            values[attribute.key] = self.get(attribute.column, row)
+            self._data[attribute.column][row] = self._fill[self._spec[attribute.column]]
+        del obj._columns
+        del obj._row
+        obj.__dict__.update(values)
+        self._free.append(row)
+
+    def get(self, column, row):
+        """Get the value of a column at a row, as a Python object."""
+        return _column_value(self._spec[column], self._data[column][row])
+
+    def set(self, column, row, value):
+        """Set the value of a column at a row."""
+        if value is None and self._spec[column] == 'nullable':
+            value = np.nan
+        self._data[column][row] = value
+
+    def take(self, column, rows):
+        """Get a copy of the values of a column at an array of rows."""
+        return self._data[column].take(rows)
+
+    def put(self, column, rows, values):
+        """Set the values of a column at an array of rows."""
+        self._data[column][rows] = values
+
+
+class Node(six.with_metaclass(_ElementMeta, object)):
     """Base class for nodes.
     
     For details about the different subclasses, see one of the following:
@@ -88,6 +307,20 @@ class Node(six.with_metaclass(abc.ABCMeta, object)):
 
 
     """
+    # Column store and row, set when the node registry keeps attributes in columns
+    _columns = None
+    _row = None
+    _head = ColumnAttribute('head', '_head')
+    _demand = ColumnAttribute('demand', '_demand')
+    _leak_demand = ColumnAttribute('leak_demand', '_leak_demand')
+    _leak_area = ColumnAttribute('leak_area', '_leak_area')
+    _leak_discharge_coeff = ColumnAttribute('leak_discharge_coeff', '_leak_discharge_coeff')
+    _is_isolated = ColumnAttribute('isolated', '_is_isolated')
+    # Change journal, set while the node is in a model
+    _journal = None
+    # Simulation results written back to the node are not journaled
+    _untracked_attributes = frozenset(['head', 'demand', 'leak_demand'])
+
     def __init__(self, wn, name):
         self._name = name
         self._head = None
@@ -224,7 +457,7 @@ class Node(six.with_metaclass(abc.ABCMeta, object)):
         return d
 
 
-class Link(six.with_metaclass(abc.ABCMeta, object)):
+class Link(six.with_metaclass(_ElementMeta, object)):
     """Base class for links.
 
     For details about the different subclasses, see one of the following:
@@ -244,6 +477,19 @@ class Link(six.with_metaclass(abc.ABCMeta, object)):
         Name of the end node
     
     """
+    # Column store and row, set when the link registry keeps attributes in columns
+    _columns = None
+    _row = None
+    _flow = ColumnAttribute('flow', '_flow')
+    _user_status = ColumnAttribute('status', '_user_status')
+    _internal_status = ColumnAttribute('internal_status', '_internal_status')
+    _is_isolated = ColumnAttribute('isolated', '_is_isolated')
+    # Change journal, set while the link is in a model
+    _journal = None
+    # Simulation results and the current status and setting, which controls 
+    # change during a simulation, are not journaled
+    _untracked_attributes = frozenset(['flow', 'status', 'setting'])
+
     def __init__(self, wn, link_name, start_node_name, end_node_name):
         # Set the registries
         self._options = wn._options
@@ -261,13 +507,13 @@ class Link(six.with_metaclass(abc.ABCMeta, object)):
         self._end_node = self._node_reg[end_node_name]
         self._node_reg.add_usage(end_node_name, (link_name, self.link_type))
         # Set up other metadata fields
-        self._initial_status = LinkStatus.opened
+        self._initial_status = LinkStatus['opened']
         self._initial_setting = None
         self._vertices = []
         self._tag = None
         # Model state variables
-        self._user_status = LinkStatus.opened
-        self._internal_status = LinkStatus.active
+        self._user_status = LinkStatus['opened']
+        self._internal_status = LinkStatus.Active
         self._prev_setting = None
         self._setting = None
         self._flow = None
@@ -338,6 +584,7 @@ class Link(six.with_metaclass(abc.ABCMeta, object)):
         self._node_reg.remove_usage(self.start_node_name, (self._link_name, self.link_type))
         self._node_reg.add_usage(node.name, (self._link_name, self.link_type))
         self._start_node = self._node_reg[node.name]
+        self._node_reg._reconnect(self)
 
     @property
     def end_node(self):
@@ -348,6 +595,7 @@ class Link(six.with_metaclass(abc.ABCMeta, object)):
         self._node_reg.remove_usage(self.end_node_name, (self._link_name, self.link_type))
         self._node_reg.add_usage(node.name, (self._link_name, self.link_type))
         self._end_node = self._node_reg[node.name]
+        self._node_reg._reconnect(self)
 
     @property
     def start_node_name(self):
@@ -430,6 +678,7 @@ class Registry(MutableMapping):
     wn : :class:`~wntr.network.model.WaterNetworkModel`
         WaterNetworkModel object
     """
+    _column_spec = None
     
     def __init__(self, wn):
         if not isinstance(wn, AbstractModel):
@@ -437,6 +686,10 @@ class Registry(MutableMapping):
 #        self._m = model
         self._data = OrderedDict()
         self._usage = OrderedDict()
+        self._columns = None
+        self._version = 0
+        self._cache = {}
+        self._journal = None
 
     def _finalize_(self, wn):
         self._options = wn._options
@@ -446,6 +699,7 @@ class Registry(MutableMapping):
         self._link_reg = wn._link_reg
         self._controls = wn._controls
         self._sources = wn._sources
+        self._journal = wn._journal
     
     def __getitem__(self, key):
         if not key:
@@ -462,7 +716,9 @@ class Registry(MutableMapping):
     def __setitem__(self, key, value):
         if not isinstance(key, string_types):
             raise ValueError('Registry keys must be strings')
+        self._record('replaced' if key in self._data else 'added', key, value)
         self._data[key] = value
+        self._bump_version()
     
     def __delitem__(self, key):
         try:
@@ -473,7 +729,10 @@ class Registry(MutableMapping):
                                    self._usage[key])
             elif key in self._usage:
                 self._usage.pop(key)
-            return self._data.pop(key)
+            value = self._data.pop(key)
+            self._bump_version()
+            self._record('removed', key, value)
+            return value
         except KeyError:
             # Do not raise an exception if there is no key of that name
             return
@@ -488,6 +747,208 @@ class Registry(MutableMapping):
         for key, value in self._data.items():
             yield key, value
 
+    @property
+    def version(self):
+        """int: Counter incremented by every structural change to the registry"""
+        return self._version
+
+    def _bump_version(self):
+        """Record a structural change and drop the cached name and index arrays"""
+        self._version += 1
+        if self._cache:
+            self._cache.clear()
+
+    def _record(self, action, key, value):
+        """Record an added, replaced or removed object in the model change journal"""
+        journal = self._journal
+        if journal is not None:
+            journal.record(action, value.__class__.__name__, key)
+
+    def _cached(self, key, build):
+        """Return the cached value for key, calling build() if it is missing"""
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = self._cache[key] = build()
+            return value
+
+    def _subset(self, element_type):
+        """Return the ordered names of all objects of a given type"""
+        if element_type is None:
+            return self._data
+        raise RuntimeError('element_type, '+str(element_type)+', not recognized.')
+
+    def _names(self, element_type=None):
+        """Return a cached tuple of the names of all objects of a given type"""
+        return self._cached(('names', element_type),
+                            lambda: tuple(self._subset(element_type)))
+
+    def _items(self, element_type=None):
+        """Return a cached tuple of (name, object) pairs of a given type"""
+        data = self._data
+        return self._cached(('items', element_type),
+                            lambda: tuple((name, data[name]) for name in self._names(element_type)))
+
+    def name_array(self, element_type=None):
+        """
+        Returns a read-only array of names, optionally filtered by type.
+        
+        The array is cached on the registry and reused until the next
+        structural change (an object is added, replaced or removed).
+
+        Parameters
+        ----------
+        element_type : class, optional
+            Object type, such as wntr.network.model.Junction or
+            wntr.network.model.Pipe. Default = None (all objects).
+
+        Returns
+        -------
+        numpy.ndarray of object
+        """
+        def build():
+            names = self._names(element_type)
+            array = np.empty(len(names), dtype=object)
+            array[:] = names
+            array.flags.writeable = False
+            return array
+        return self._cached(('name_array', element_type), build)
+
+    def index_array(self, element_type=None):
+        """
+        Returns a read-only array with the position of each object of a 
+        given type in the registry.
+        
+        Positions follow the order of the registry (the order of 
+        ``list(registry)``), so the array can be used to select the columns
+        of a type from data that is ordered by all names. The array is cached 
+        on the registry and reused until the next structural change.
+
+        Parameters
+        ----------
+        element_type : class, optional
+            Object type, such as wntr.network.model.Junction or
+            wntr.network.model.Pipe. Default = None (all objects).
+
+        Returns
+        -------
+        numpy.ndarray of int
+        """
+        def build():
+            names = self._names(element_type)
+            if element_type is None:
+                array = np.arange(len(names), dtype=np.intp)
+            else:
+                positions = self._cached('positions', 
+                                         lambda: dict((name, i) for i, name in enumerate(self._data)))
+                array = np.fromiter((positions[name] for name in names), 
+                                    dtype=np.intp, count=len(names))
+            array.flags.writeable = False
+            return array
+        return self._cached(('index_array', element_type), build)
+
+    def attribute_values(self, attribute, element_type=None):
+        """
+        Returns the values of an attribute for all objects of a given type.
+
+        Values are gathered in one pass over the objects; objects without 
+        the attribute are left out. Numeric values are returned in a 
+        numeric array and other values in an object array. Attributes whose
+        changes are all recorded in the model change journal (such as 
+        elevation, length or diameter) are cached and reused until the next 
+        change to the model. When the registry keeps attributes in columns 
+        (see :meth:`enable_columns`), numeric column attributes are read 
+        from the column store without visiting the objects.
+
+        Parameters
+        ----------
+        attribute : str
+            Name of the attribute
+        element_type : class, optional
+            Object type, such as wntr.network.model.Junction or
+            wntr.network.model.Pipe. Default = None (all objects).
+
+        Returns
+        -------
+        names : numpy.ndarray of object
+            Names of the objects that have the attribute, in registry order
+        values : numpy.ndarray
+            The attribute values (read-only)
+        """
+        journal = self._journal
+        key = ('attribute_values', attribute, element_type)
+        cached = self._cache.get(key)
+        if cached is not None and journal is not None and cached[0] == journal.version:
+            return cached[1], cached[2]
+        if self._columns is not None:
+            values = self._column_values(attribute, element_type)
+            if values is not None:
+                return self.name_array(element_type), values
+        items = self._items(element_type)
+        values = [getattr(obj, attribute, _missing) for name, obj in items]
+        names = self.name_array(element_type)
+        if any(value is _missing for value in values):
+            present = np.fromiter((value is not _missing for value in values), dtype=bool, count=len(values))
+            names = names[present]
+            names.flags.writeable = False
+            values = [value for value in values if value is not _missing]
+        if _numeric_types.issuperset(map(type, values)):
+            values = np.array(values, dtype=float if len(values) == 0 else None)
+        else:
+            array = np.empty(len(values), dtype=object)
+            for i, value in enumerate(values):
+                array[i] = value
+            values = array
+        values.flags.writeable = False
+        if journal is not None and self._journaled(attribute, set(type(obj) for name, obj in items)):
+            self._cache[key] = (journal.version, names, values)
+        return names, values
+
+    def _column_values(self, attribute, element_type):
+        """Read a public attribute of all objects of a type from the column 
+        store, or return None if it is not a numeric column of every object
+        or if a value is None"""
+        items = self._items(element_type)
+        classes = self._cached(('classes', element_type), 
+                               lambda: set(type(obj) for name, obj in items))
+        columns = set()
+        for cls in classes:
+            descriptor = getattr(cls, attribute, None)
+            if not isinstance(descriptor, ColumnAttribute) or descriptor.key != attribute:
+                return None
+            columns.add(descriptor.column)
+        if len(columns) != 1:
+            return None
+        column = columns.pop()
+        kind = self._column_spec[column]
+        if kind == 'status':
+            return None
+        rows = self._cached(('rows', element_type), 
+                            lambda: np.array([obj._row for name, obj in items], dtype=np.intp))
+        values = self._columns.take(column, rows)
+        if kind != 'bool' and np.isnan(values).any():
+            return None
+        values.flags.writeable = False
+        return values
+
+    def _journaled(self, attribute, classes):
+        """Check that every change to an attribute of objects of the given 
+        classes is recorded in the change journal"""
+        for cls in classes:
+            descriptor = None
+            for klass in cls.__mro__:
+                if attribute in vars(klass):
+                    descriptor = vars(klass)[attribute]
+                    break
+            if attribute in getattr(cls, '_untracked_attributes', ()):
+                return False
+            if isinstance(descriptor, JournaledAttribute):
+                continue
+            if isinstance(descriptor, ColumnAttribute) and descriptor.key == attribute:
+                continue
+            return False
+        return True
+
     def usage(self):
         """Generator to get the usage for all objects in the registry
         
@@ -580,6 +1041,124 @@ class Registry(MutableMapping):
         if len(self._usage[key]) < 1:
             self._usage.pop(key)
 
+    @property
+    def columnar(self):
+        """bool: True if element attributes are kept in a column store"""
+        return self._columns is not None
+
+    def enable_columns(self):
+        """Keep the numeric element attributes in typed NumPy columns.
+
+        The attributes listed in the registry's column specification (for
+        example elevation, diameter, roughness, head, flow and status) are
+        moved from each element into a :class:`~wntr.network.base.ColumnStore`.
+        Elements keep working as before, but read and write the store, and
+        whole columns can be read and written with :meth:`column` and
+        :meth:`set_column`. The store is allocated for the current elements
+        and grows as elements are added.
+        """
+        if self._columns is not None or self._column_spec is None:
+            return
+        store = ColumnStore(self._column_spec, capacity=len(self._data))
+        for obj in self._data.values():
+            store.attach(obj)
+        self._columns = store
+        self._cache.clear()
+
+    def disable_columns(self):
+        """Move the column attributes back onto the elements."""
+        if self._columns is None:
+            return
+        for obj in self._data.values():
+            self._columns.detach(obj)
+        self._columns = None
+        self._cache.clear()
+
+    def _attach(self, obj):
+        if self._columns is not None and obj._columns is not self._columns:
+            self._columns.attach(obj)
+
+    def _detach(self, obj):
+        if self._columns is not None and obj._columns is self._columns:
+            self._columns.detach(obj)
+
+    def column(self, attribute, names=None):
+        """Get the values of an attribute for many elements as an array.
+
+        Parameters
+        ----------
+        attribute : str
+            Name of a column, see :attr:`column_names`
+        names : list of str, optional
+            Element names, default = all elements in registry order
+
+        Returns
+        -------
+        numpy.ndarray
+            The values; NaN for elements without the attribute (or with a
+            value of None). Statuses are returned as integers.
+        """
+        if self._column_spec is None or attribute not in self._column_spec:
+            raise KeyError('%s has no column %s' % (self.__class__.__name__, attribute))
+        objs = self._data.values() if names is None else [self._data[name] for name in names]
+        if self._columns is not None:
+            rows = np.fromiter((obj._row for obj in objs), dtype=np.intp, count=len(objs))
+            return self._columns.take(attribute, rows)
+        kind = self._column_spec[attribute]
+        values = np.empty(len(objs), dtype=ColumnStore._dtypes[kind])
+        for i, obj in enumerate(objs):
+            value = None
+            for column_attribute in _column_attributes(type(obj)):
+                if column_attribute.column == attribute:
+                    value = getattr(obj, column_attribute.key)
+                    break
+            if value is None:
+                value = ColumnStore._fill[kind]
+            values[i] = value
+        return values
+
+    def set_column(self, attribute, values, names=None):
+        """Set the values of an attribute for many elements.
+
+        Values given for elements without the attribute are ignored.
+
+        Parameters
+        ----------
+        attribute : str
+            Name of a column, see :attr:`column_names`
+        values : array-like
+            The new values, one per element
+        names : list of str, optional
+            Element names, default = all elements in registry order
+        """
+        if self._column_spec is None or attribute not in self._column_spec:
+            raise KeyError('%s has no column %s' % (self.__class__.__name__, attribute))
+        objs = list(self._data.values()) if names is None else [self._data[name] for name in names]
+        if len(values) != len(objs):
+            raise ValueError('Expected %d values, got %d' % (len(objs), len(values)))
+        if self._columns is not None:
+            keep = [i for i, obj in enumerate(objs)
+                    if any(a.column == attribute for a in _column_attributes(type(obj)))]
+            rows = np.array([objs[i]._row for i in keep], dtype=np.intp)
+            self._columns.put(attribute, rows, np.asarray(values)[keep])
+            # Values written to the store are not journaled
+            for key in [key for key in self._cache if key[0] == 'attribute_values']:
+                del self._cache[key]
+            return
+        kind = self._column_spec[attribute]
+        for obj, value in zip(objs, values):
+            for column_attribute in _column_attributes(type(obj)):
+                if column_attribute.column == attribute:
+                    setattr(obj, column_attribute.key, _column_value(kind, value))
+                    break
+
+    @property
+    def column_names(self):
+        """list of str: Names of the attributes that can be stored in columns"""
+        if self._column_spec is None:
+            return []
+        return list(self._column_spec.keys())
+
     def todict(self):
         """Dictionary representation of the registry"""
         d = dict()
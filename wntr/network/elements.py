@@ -41,7 +41,7 @@ if sys.version_info[0] == 2:
 else:
     from collections.abc import MutableSequence
 
-from .base import Node, Link, Registry, LinkStatus
+from .base import Node, Link, Registry, LinkStatus, ColumnAttribute, JournaledAttribute
 from .options import TimeOptions
 
 logger = logging.getLogger(__name__)
@@ -59,6 +59,11 @@ class Junction(Node):
         WaterNetworkModel object the junction will belong to
 
     """
+    elevation = ColumnAttribute('elevation')
+    demand_timeseries_list = JournaledAttribute('demand_timeseries_list')
+    nominal_pressure = ColumnAttribute('nominal_pressure')
+    minimum_pressure = ColumnAttribute('minimum_pressure')
+    _emitter_coefficient = ColumnAttribute('emitter_coefficient', '_emitter_coefficient')
 
     def __init__(self, name, wn):
         super(Junction, self).__init__(wn, name)
@@ -118,6 +123,8 @@ class Junction(Node):
         if pattern_name is not None:
             self._pattern_reg.add_usage(pattern_name, (self.name, 'Junction'))
         self.demand_timeseries_list.append((base, pattern_name, category))
+        if self._journal is not None:
+            self._journal.record('modified', 'Junction', self._name, 'demand_timeseries_list')
 
     @property
     def base_demand(self):
@@ -209,6 +216,12 @@ class Tank(Node):
         WaterNetworkModel object the tank will belong to
 
     """
+    elevation = ColumnAttribute('elevation')
+    min_level = JournaledAttribute('min_level')
+    max_level = JournaledAttribute('max_level')
+    diameter = JournaledAttribute('diameter')
+    min_vol = JournaledAttribute('min_vol')
+    bulk_rxn_coeff = JournaledAttribute('bulk_rxn_coeff')
 
     def __init__(self, name, wn):
         super(Tank, self).__init__(wn, name)
@@ -423,6 +436,13 @@ class Pipe(Link):
         The water network model this pipe will belong to.
 
     """
+    length = ColumnAttribute('length')
+    diameter = ColumnAttribute('diameter')
+    roughness = ColumnAttribute('roughness')
+    minor_loss = ColumnAttribute('minor_loss')
+    cv = ColumnAttribute('cv')
+    bulk_rxn_coeff = ColumnAttribute('bulk_rxn_coeff')
+    wall_rxn_coeff = ColumnAttribute('wall_rxn_coeff')
 
     def __init__(self, name, start_node_name, end_node_name, wn):
         super(Pipe, self).__init__(wn, name, start_node_name, end_node_name)
@@ -489,6 +509,9 @@ class Pump(Link):
         The water network model this pump will belong to.
 
     """
+    efficiency = JournaledAttribute('efficiency')
+    energy_price = JournaledAttribute('energy_price')
+    energy_pattern = JournaledAttribute('energy_pattern')
 
     def __init__(self, name, start_node_name, end_node_name, wn):
         super(Pump, self).__init__(wn, name, start_node_name, end_node_name)
@@ -783,6 +806,9 @@ class Valve(Link):
         The water network model this valve will belong to.
 
     """
+    diameter = ColumnAttribute('diameter')
+    minor_loss = ColumnAttribute('minor_loss')
+
     def __init__(self, name, start_node_name, end_node_name, wn):
         super(Valve, self).__init__(wn, name, start_node_name, end_node_name)
         self.diameter = 0.3048
@@ -1001,7 +1027,9 @@ class Pattern(object):
     name : string
         Name of the pattern.
     multipliers : list
-        A list of multipliers that makes up the pattern.
+        A list of multipliers that makes up the pattern. The multipliers 
+        are kept in a read-only array, which the pattern registry can share
+        between identical patterns.
     time_options : wntr TimeOptions or tuple
         The water network model options.time object or a tuple of (pattern_start, 
         pattern_timestep) in seconds.
@@ -1015,7 +1043,7 @@ class Pattern(object):
         self.name = name
         if isinstance(multipliers, (int, float)):
             multipliers = [multipliers]
-        self._multipliers = np.array(multipliers)
+        self._multipliers = self._readonly(multipliers)
         if time_options:
             if isinstance(time_options, (tuple, list)) and len(time_options) >= 2:
                 tmp = TimeOptions()
@@ -1044,7 +1072,7 @@ class Pattern(object):
         return '%s'%self.name
 
     def __repr__(self):
-        return "<Pattern '{}', multipliers={}>".format(self.name, repr(self.multipliers))
+        return "<Pattern '{}', multipliers={}>".format(self.name, repr(self._multipliers))
         
     def __len__(self):
         return len(self._multipliers)
@@ -1095,16 +1123,24 @@ class Pattern(object):
         pattern_list[patternstart:patternend] = [1.0]*(patternend-patternstart)
         return cls(name, multipliers=pattern_list, time_options=None, wrap=wrap)
     
+    @staticmethod
+    def _readonly(values):
+        """Copy multipliers to a new read-only array"""
+        values = np.array(values)
+        values.flags.writeable = False
+        return values
+
     @property
     def multipliers(self):
-        """Returns the pattern multiplier values"""
+        """Returns the pattern multiplier values, as a read-only array 
+        (which can be a row of the pattern registry's table, shared with 
+        identical patterns); assign new values to modify the pattern"""
         return self._multipliers
     @multipliers.setter
     def multipliers(self, values):
         if isinstance(values, (int, float, complex)):
-            self._multipliers = np.array([values])
-        else:
-            self._multipliers = np.array(values)
+            values = [values]
+        self._multipliers = self._readonly(values)
 
     @property
     def time_options(self):
@@ -1143,6 +1179,34 @@ class Pattern(object):
         elif step < 0 or step >= nmult:    return 0.0
         return self._multipliers[step]
     
+    def at_many(self, times):
+        """
+        Returns the pattern values at many times
+        
+        Parameters
+        ----------
+        times : array-like of int
+            Times in seconds
+        
+        Returns
+        -------
+        numpy.ndarray
+            Pattern values, with the same shape as times
+        """
+        times = np.asarray(times, dtype=float)
+        nmult = len(self._multipliers)
+        if nmult == 0: return np.ones(times.shape)
+        if nmult == 1: return np.full(times.shape, self._multipliers[0], dtype=float)
+        if self._time_options is None:
+            raise RuntimeError('Pattern->time_options cannot be None at runtime')
+        steps = ((times+self._time_options.pattern_start)//self._time_options.pattern_timestep).astype(np.int64)
+        if self.wrap:
+            return self._multipliers[steps%nmult].astype(float)
+        values = np.zeros(times.shape)
+        inside = (steps >= 0) & (steps < nmult)
+        values[inside] = self._multipliers[steps[inside]]
+        return values
+    
 
 class TimeSeries(object): 
     """
@@ -12,9 +12,16 @@ model.
     SourceRegistry
     NodeRegistry
     LinkRegistry
+    AdjacencyIndex
+    ChangeJournal
+    ChangeRecord
+    SparseGraph
 
 """
 import logging
+import copy
+import gc
+import operator
 import six
 
 import sys
@@ -26,9 +33,10 @@ else:
 import numpy as np
 import networkx as nx
 import pandas as pd
+import scipy.sparse
 
 from .options import WaterNetworkOptions
-from .base import Link, Registry, LinkStatus, AbstractModel
+from .base import Node, Link, Registry, LinkStatus, AbstractModel
 from .elements import Junction, Reservoir, Tank
 from .elements import Pipe, Pump, HeadPump, PowerPump
 from .elements import Valve, PRValve, PSValve, PBValve, TCValve, FCValve, GPValve
@@ -39,7 +47,10 @@ from .controls import ControlPriority, _ControlType, TimeOfDayCondition, SimTime
     _ClosePRVCondition, _OpenPRVCondition, _ActivePRVCondition, _ClosePSVCondition, _OpenPSVCondition, \
     _ActivePSVCondition, _OpenFCVCondition, _ActiveFCVCondition, ControlAction, _InternalControlAction, Control, \
     ControlManager, Comparison, Rule
-from collections import OrderedDict
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+from enum import Enum
+from itertools import islice, chain, repeat
 from wntr.utils.ordered_set import OrderedSet
 
 import wntr.epanet
@@ -70,6 +81,9 @@ class WaterNetworkModel(AbstractModel):
         self._curve_reg = CurveRegistry(self)
         self._controls = OrderedDict()
         self._sources = OrderedDict()
+        self._version = 0
+        self._journal = ChangeJournal()
+        self._cache = {}
 
         self._node_reg._finalize_(self)
         self._link_reg._finalize_(self)
@@ -94,6 +108,29 @@ class WaterNetworkModel(AbstractModel):
         # Time parameters
         self.sim_time = 0.0
         self._prev_sim_time = None  # the last time at which results were accepted
+
+    def clone(self):
+        """
+        Returns an independent copy of the water network model.
+        
+        The result is equivalent to ``copy.deepcopy(wn)``, but much faster
+        on large models. Objects of the model are copied attribute by 
+        attribute in a single pass that also rewires references to 
+        registries, nodes and links, and immutable values (names, numbers,
+        statuses, tuples such as coordinates) are shared instead of copied.
+        Cached name arrays and connectivity arrays are rebuilt on demand.
+
+        Returns
+        -------
+        WaterNetworkModel
+        """
+        refs = {id(self._cache): {}}
+        for registry in (self._node_reg, self._link_reg, self._pattern_reg, self._curve_reg):
+            refs[id(registry._cache)] = {}
+        with _gc_paused():
+            wn = _ModelCloner(refs).copy_model(self)
+        wn._node_reg._adjacency._arrays = None
+        return wn
     
     def _compare(self, other):
         """
@@ -507,6 +544,214 @@ class WaterNetworkModel(AbstractModel):
         self._link_reg.add_valve(name, start_node_name, end_node_name, diameter, 
                                  valve_type, minor_loss, setting)
 
+    def add_junctions(self, data):
+        """
+        Adds junctions in bulk to the water network model
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict of lists
+            One row per junction. Names are taken from the ``name`` column,
+            or from the index if there is no such column. Other columns are 
+            named after the arguments of :meth:`add_junction` 
+            (``base_demand``, ``demand_pattern``, ``elevation``,
+            ``coordinates`` and ``demand_category``); missing columns take 
+            the defaults of :meth:`add_junction`.
+
+        Raises
+        ------
+        ValueError
+            If a name is duplicated or already used by a node, if a column is
+            unknown, or if a column holds invalid values
+        """
+        table = _element_table(data, 'junction', self._node_reg, 
+                               base_demand=0.0, demand_pattern=None, elevation=0.0, 
+                               coordinates=None, demand_category=None)
+        self._node_reg._add_junctions(table['name'],
+                                      _float_values(table, 'base_demand'),
+                                      _name_values(table, 'demand_pattern'),
+                                      _float_values(table, 'elevation'),
+                                      _coordinate_values(table),
+                                      _name_values(table, 'demand_category'))
+
+    def add_tanks(self, data):
+        """
+        Adds tanks in bulk to the water network model
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict of lists
+            One row per tank, names in the ``name`` column or the index, and
+            columns named after the arguments of :meth:`add_tank`
+            (``elevation``, ``init_level``, ``min_level``, ``max_level``, 
+            ``diameter``, ``min_vol``, ``vol_curve`` and ``coordinates``).
+
+        Raises
+        ------
+        ValueError
+            If a name is duplicated or already used by a node, if a column is
+            unknown or holds invalid values, or if `init_level` is greater 
+            than `max_level` or less than `min_level`
+        """
+        table = _element_table(data, 'tank', self._node_reg, 
+                               elevation=0.0, init_level=3.048, min_level=0.0, 
+                               max_level=6.096, diameter=15.24, min_vol=0.0, 
+                               vol_curve=None, coordinates=None)
+        columns = dict((column, _float_values(table, column)) for column in 
+                       ['elevation', 'init_level', 'min_level', 'max_level', 'diameter', 'min_vol'])
+        init_level = np.array(columns['init_level'])
+        invalid = (init_level < columns['min_level']) | (init_level > columns['max_level'])
+        if invalid.any():
+            raise ValueError('Initial tank level must be between the minimum and maximum level, tank %s' 
+                             % table['name'][np.argmax(invalid)])
+        node_reg = self._node_reg
+        tanks = [node_reg._new_tank(*row) for row in 
+                 zip(table['name'], columns['elevation'], columns['init_level'], 
+                     columns['min_level'], columns['max_level'], columns['diameter'],
+                     columns['min_vol'], _name_values(table, 'vol_curve'), 
+                     _coordinate_values(table))]
+        node_reg._add_nodes(tanks)
+
+    def add_reservoirs(self, data):
+        """
+        Adds reservoirs in bulk to the water network model
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict of lists
+            One row per reservoir, names in the ``name`` column or the index,
+            and columns named after the arguments of :meth:`add_reservoir`
+            (``base_head``, ``head_pattern`` and ``coordinates``).
+
+        Raises
+        ------
+        ValueError
+            If a name is duplicated or already used by a node, if a column is
+            unknown, or if a column holds invalid values
+        """
+        table = _element_table(data, 'reservoir', self._node_reg, 
+                               base_head=0.0, head_pattern=None, coordinates=None)
+        node_reg = self._node_reg
+        reservoirs = [node_reg._new_reservoir(*row) for row in 
+                      zip(table['name'], _float_values(table, 'base_head'),
+                          _name_values(table, 'head_pattern'), _coordinate_values(table))]
+        node_reg._add_nodes(reservoirs)
+
+    def add_pipes(self, data):
+        """
+        Adds pipes in bulk to the water network model
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict of lists
+            One row per pipe, names in the ``name`` column or the index, and
+            columns named after the arguments of :meth:`add_pipe` 
+            (``start_node_name``, ``end_node_name``, ``length``, 
+            ``diameter``, ``roughness``, ``minor_loss``, ``status`` and
+            ``check_valve_flag``). The start and end node names are 
+            required.
+
+        Raises
+        ------
+        ValueError
+            If a name is duplicated or already used by a link, if a start or
+            end node does not exist, if a column is unknown, or if a column 
+            holds invalid values
+        """
+        table = _element_table(data, 'pipe', self._link_reg, 
+                               required=('start_node_name', 'end_node_name'),
+                               length=304.8, diameter=0.3048, roughness=100, 
+                               minor_loss=0.0, status='OPEN', check_valve_flag=False)
+        start_node_names, end_node_names = _endpoint_values(table, self._node_reg)
+        statuses = []
+        for status in table['status']:
+            if isinstance(status, six.string_types):
+                try:
+                    status = LinkStatus[status]
+                except KeyError:
+                    raise ValueError('Invalid pipe status: %s' % status)
+            statuses.append(status)
+        check_valve_flags = [bool(flag) for flag in table['check_valve_flag']]
+        self._link_reg._add_pipes(table['name'], start_node_names, end_node_names,
+                                  _float_values(table, 'length'), 
+                                  _float_values(table, 'diameter'),
+                                  _float_values(table, 'roughness'), 
+                                  _float_values(table, 'minor_loss'), 
+                                  statuses, check_valve_flags)
+        self._check_valves.extend([name for name, flag in zip(table['name'], check_valve_flags) if flag])
+
+    def add_pumps(self, data):
+        """
+        Adds pumps in bulk to the water network model
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict of lists
+            One row per pump, names in the ``name`` column or the index, and 
+            columns named after the arguments of :meth:`add_pump` 
+            (``start_node_name``, ``end_node_name``, ``pump_type``, 
+            ``pump_parameter``, ``speed`` and ``pattern``). The start and 
+            end node names are required.
+
+        Raises
+        ------
+        ValueError
+            If a name is duplicated or already used by a link, if a start or
+            end node does not exist, if a column is unknown, or if a column 
+            holds invalid values
+        """
+        table = _element_table(data, 'pump', self._link_reg, 
+                               required=('start_node_name', 'end_node_name'),
+                               pump_type='POWER', pump_parameter=50.0, speed=1.0,
+                               pattern=None)
+        start_node_names, end_node_names = _endpoint_values(table, self._node_reg)
+        pump_types = [str(pump_type).upper() for pump_type in table['pump_type']]
+        invalid = set(pump_types).difference(['POWER', 'HEAD'])
+        if invalid:
+            raise ValueError('pump_type must be "POWER" or "HEAD", not %s' % ', '.join(sorted(invalid)))
+        link_reg = self._link_reg
+        pumps = [link_reg._new_pump(*row) for row in 
+                 zip(table['name'], start_node_names, end_node_names, pump_types,
+                     table['pump_parameter'], _float_values(table, 'speed'), 
+                     _name_values(table, 'pattern'))]
+        link_reg._add_links(pumps)
+
+    def add_valves(self, data):
+        """
+        Adds valves in bulk to the water network model
+
+        Parameters
+        ----------
+        data : pandas DataFrame or dict of lists
+            One row per valve, names in the ``name`` column or the index, and
+            columns named after the arguments of :meth:`add_valve` 
+            (``start_node_name``, ``end_node_name``, ``diameter``, 
+            ``valve_type``, ``minor_loss`` and ``setting``). The start and 
+            end node names are required.
+
+        Raises
+        ------
+        ValueError
+            If a name is duplicated or already used by a link, if a start or
+            end node does not exist, if a column is unknown, or if a column 
+            holds invalid values
+        """
+        table = _element_table(data, 'valve', self._link_reg, 
+                               required=('start_node_name', 'end_node_name'),
+                               diameter=0.3048, valve_type='PRV', minor_loss=0.0,
+                               setting=0.0)
+        start_node_names, end_node_names = _endpoint_values(table, self._node_reg)
+        valve_types = [str(valve_type).upper() for valve_type in table['valve_type']]
+        invalid = set(valve_types).difference(['PRV', 'PSV', 'PBV', 'FCV', 'TCV', 'GPV'])
+        if invalid:
+            raise ValueError('Invalid valve_type: %s' % ', '.join(sorted(invalid)))
+        link_reg = self._link_reg
+        valves = [link_reg._new_valve(*row) for row in 
+                  zip(table['name'], start_node_names, end_node_names, 
+                      _float_values(table, 'diameter'), valve_types,
+                      _float_values(table, 'minor_loss'), table['setting'])]
+        link_reg._add_links(valves)
+
     def add_pattern(self, name, pattern=None):
         """
         Adds a pattern to the water network model
@@ -590,6 +835,7 @@ class WaterNetworkModel(AbstractModel):
         self._sources[source.name] = source
         self._pattern_reg.add_usage(source.strength_timeseries.pattern_name, (source.name, 'Source'))
         self._node_reg.add_usage(source.node_name, (source.name, 'Source'))
+        self._record_change('added', source.name, source)
 
     def add_control(self, name, control_object):
         """
@@ -605,6 +851,7 @@ class WaterNetworkModel(AbstractModel):
         if name in self._controls:
             raise ValueError('The name provided for the control is already used. Please either remove the control with that name first or use a different name for this control.')
         self._controls[name] = control_object
+        self._record_change('added', name, control_object)
     
     
     ### # 
@@ -668,10 +915,12 @@ class WaterNetworkModel(AbstractModel):
         self._pattern_reg.remove_usage(source.strength_timeseries.pattern_name, (source.name, 'Source'))
         self._node_reg.remove_usage(source.node_name, (source.name, 'Source'))            
         del self._sources[name]
+        self._record_change('removed', name, source)
         
     def remove_control(self, name): 
         """Removes a control from the water network model"""
-        del self._controls[name]
+        control = self._controls.pop(name)
+        self._record_change('removed', name, control)
 
     def _discard_control(self, name):
         """Removes a control from the water network model
@@ -683,10 +932,14 @@ class WaterNetworkModel(AbstractModel):
         name : string
            The name of the control object to be removed.
         """
-        try:
-            del self._controls[name]
-        except KeyError:
-            pass
+        control = self._controls.pop(name, None)
+        if control is not None:
+            self._record_change('removed', name, control)
+
+    def _record_change(self, action, name, obj):
+        """Record an added or removed source or control"""
+        self._version += 1
+        self._journal.record(action, obj.__class__.__name__, name)
     
     ### # 
     ### Get elements from the model
@@ -1101,6 +1354,29 @@ class WaterNetworkModel(AbstractModel):
 
     ### #
     ### Name lists
+    @property
+    def structure_version(self):
+        """int: Counter incremented by every structural change to the model
+        
+        Adding, replacing or removing nodes, links, patterns, curves, sources
+        or controls, and reconnecting a link to different nodes, all 
+        increment the counter. Values computed from the model structure can be
+        reused for as long as the counter is unchanged.
+        """
+        return (self._node_reg._version + self._link_reg._version +
+                self._pattern_reg._version + self._curve_reg._version + 
+                self._version)
+
+    @property
+    def journal(self):
+        """:class:`~wntr.network.model.ChangeJournal`: The journal of changes made to the model
+        
+        Consumers that derive data from the model can store 
+        ``wn.journal.version`` and later use ``wn.journal.changes(version)``
+        to update only what changed.
+        """
+        return self._journal
+
     @property
     def node_name_list(self): 
         """Get a list of node names
@@ -1110,7 +1386,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
         
         """
-        return list(self._node_reg.keys())
+        return list(self._node_reg._names())
 
     @property
     def junction_name_list(self): 
@@ -1121,7 +1397,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
         
         """
-        return list(self._node_reg.junction_names)
+        return list(self._node_reg._names(Junction))
 
     @property
     def tank_name_list(self): 
@@ -1132,7 +1408,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
         
         """
-        return list(self._node_reg.tank_names)
+        return list(self._node_reg._names(Tank))
 
     @property
     def reservoir_name_list(self): 
@@ -1143,7 +1419,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
         
         """
-        return list(self._node_reg.reservoir_names)
+        return list(self._node_reg._names(Reservoir))
 
     @property
     def link_name_list(self): 
@@ -1154,7 +1430,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
         
         """
-        return list(self._link_reg.keys())
+        return list(self._link_reg._names())
 
     @property
     def pipe_name_list(self): 
@@ -1165,7 +1441,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
         
         """
-        return list(self._link_reg.pipe_names)
+        return list(self._link_reg._names(Pipe))
 
     @property
     def pump_name_list(self):
@@ -1176,7 +1452,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.pump_names)
+        return list(self._link_reg._names(Pump))
 
     @property
     def head_pump_name_list(self):
@@ -1187,7 +1463,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.head_pump_names)
+        return list(self._link_reg._names(HeadPump))
 
     @property
     def power_pump_name_list(self):
@@ -1198,7 +1474,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.power_pump_names)
+        return list(self._link_reg._names(PowerPump))
 
     @property
     def valve_name_list(self):
@@ -1209,7 +1485,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.valve_names)
+        return list(self._link_reg._names(Valve))
 
     @property
     def prv_name_list(self):
@@ -1220,7 +1496,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.prv_names)
+        return list(self._link_reg._names(PRValve))
 
     @property
     def psv_name_list(self):
@@ -1231,7 +1507,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.psv_names)
+        return list(self._link_reg._names(PSValve))
 
     @property
     def pbv_name_list(self):
@@ -1242,7 +1518,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.pbv_names)
+        return list(self._link_reg._names(PBValve))
 
     @property
     def tcv_name_list(self):
@@ -1253,7 +1529,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.tcv_names)
+        return list(self._link_reg._names(TCValve))
 
     @property
     def fcv_name_list(self):
@@ -1264,7 +1540,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.fcv_names)
+        return list(self._link_reg._names(FCValve))
 
     @property
     def gpv_name_list(self):
@@ -1275,7 +1551,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
 
         """
-        return list(self._link_reg.gpv_names)
+        return list(self._link_reg._names(GPValve))
 
     @property
     def pattern_name_list(self): 
@@ -1286,7 +1562,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
         
         """
-        return list(self._pattern_reg.keys())
+        return list(self._pattern_reg._names())
 
     @property
     def curve_name_list(self): 
@@ -1297,7 +1573,7 @@ class WaterNetworkModel(AbstractModel):
         list of strings
         
         """
-        return list(self._curve_reg.keys())
+        return list(self._curve_reg._names())
 
     @property
     def source_name_list(self): 
@@ -1473,45 +1749,98 @@ class WaterNetworkModel(AbstractModel):
         Returns
         --------
         networkx MultiDiGraph
+
+        Notes
+        -----
+        The nodes and edges of the unweighted graph are cached until the 
+        model structure or a node coordinate changes, so repeated calls 
+        only build a new graph from the cached lists. Nodes and links 
+        missing from node_weight and link_weight are not given a weight.
         """
+        nodes, edges = self._graph_elements()
+        if link_weight is not None:
+            edges = _weighted_edges(edges, _weight_dict(link_weight, self.link_name_list), 
+                                   modify_direction)
+        
         G = nx.MultiDiGraph()
+        with _gc_paused():
+            G.add_nodes_from(nodes)
+            G.add_edges_from(edges)
         
-        for name, node in self.nodes():
-            G.add_node(name)
-            nx.set_node_attributes(G, name='pos', values={name: node.coordinates})
-            nx.set_node_attributes(G, name='type', values={name: node.node_type})
-            
-            if node_weight is not None:
-                try: # weight nodes
-                    value = node_weight[name]
-                    nx.set_node_attributes(G, name='weight', values={name: value})
-                except:
-                    pass
-            
-        for name, link in self.links():
-            start_node = link.start_node_name
-            end_node = link.end_node_name
-            G.add_edge(start_node, end_node, key=name)
-            nx.set_edge_attributes(G, name='type', 
-                        values={(start_node, end_node, name): link.link_type})
-                
-            if link_weight is not None:
-                try: # weight links
-                    value = link_weight[name]
-                    if modify_direction and value < 0: # change the direction of the link and value
-                        G.remove_edge(start_node, end_node, name)
-                        G.add_edge(end_node, start_node, name)
-                        nx.set_edge_attributes(G, name='type', 
-                                values={(end_node, start_node, name): link.link_type})
-                        nx.set_edge_attributes(G, name='weight', 
-                                values={(end_node, start_node, name): -value})
-                    else:
-                        nx.set_edge_attributes(G, name='weight', 
-                            values={(start_node, end_node, name): value})
-                except:
-                    pass
+        if node_weight is not None:
+            nx.set_node_attributes(G, name='weight', values=_weight_dict(node_weight, self.node_name_list))
             
         return G
+
+    def _graph_elements(self):
+        """Get the node and edge lists of the unweighted graph, cached until 
+        the model structure or a node coordinate changes"""
+        structure_version = self.structure_version
+        journal_version = self._journal.version
+        cached = self._cache.get('graph')
+        if cached is not None and cached[0] == structure_version:
+            if cached[1] == journal_version:
+                return cached[2], cached[3]
+            if self._journal.covers(cached[1]) and not any(record.attribute == 'coordinates' 
+                    for record in self._journal.changes(cached[1])):
+                self._cache['graph'] = (structure_version, journal_version, cached[2], cached[3])
+                return cached[2], cached[3]
+        nodes = [(name, {'pos': node.coordinates, 'type': node.node_type}) 
+                 for name, node in self.nodes()]
+        edges = [(link.start_node_name, link.end_node_name, name, {'type': link.link_type}) 
+                 for name, link in self.links()]
+        self._cache['graph'] = (structure_version, journal_version, nodes, edges)
+        return nodes, edges
+
+    def get_sparse_graph(self):
+        """
+        Returns the connectivity of the water network model as sparse matrices
+        
+        Nodes and links are numbered in the order of node_name_list and 
+        link_name_list. The result is cached until the model structure 
+        changes and is shared between calls, so the index maps should not 
+        be modified (the arrays and matrices are read-only).
+
+        Returns
+        --------
+        :class:`~wntr.network.model.SparseGraph`
+            Named tuple with fields
+
+            * node_names, link_names: arrays of node and link names
+            * node_index, link_index: dictionaries from name to position
+            * start_nodes, end_nodes: positions of the start and end node 
+              of each link
+            * adjacency: node-by-node scipy.sparse.csr_matrix where entry 
+              (i, j) is the number of links that start at node i and end at 
+              node j
+            * incidence: node-by-link scipy.sparse.csr_matrix, see 
+              :meth:`get_incidence_matrix`
+        """
+        structure_version = self.structure_version
+        cached = self._cache.get('sparse_graph')
+        if cached is not None and cached[0] == structure_version:
+            return cached[1]
+        node_names = self._node_reg.name_array()
+        link_names = self._link_reg.name_array()
+        node_index = dict(zip(node_names, range(len(node_names))))
+        link_index = dict(zip(link_names, range(len(link_names))))
+        adjacency = self._node_reg._adjacency
+        ends = np.array([node_index[name] for link_name in link_names 
+                         for name in adjacency.link_nodes(link_name)], dtype=np.intp).reshape(-1, 2)
+        start_nodes = ends[:, 0]
+        end_nodes = ends[:, 1]
+        num_nodes = len(node_names)
+        adjacency_matrix = scipy.sparse.csr_matrix((np.ones(len(link_names)), (start_nodes, end_nodes)), 
+                                                   shape=(num_nodes, num_nodes))
+        incidence_matrix = adjacency.incidence_matrix(node_names, link_names)
+        for array in (start_nodes, end_nodes, adjacency_matrix.data, adjacency_matrix.indices, 
+                      adjacency_matrix.indptr, incidence_matrix.data, incidence_matrix.indices, 
+                      incidence_matrix.indptr):
+            array.flags.writeable = False
+        graph = SparseGraph(node_names, link_names, node_index, link_index, start_nodes, 
+                            end_nodes, adjacency_matrix, incidence_matrix)
+        self._cache['sparse_graph'] = (structure_version, graph)
+        return graph
     
     def assign_demand(self, demand, pattern_prefix='ResetDemand'):
         """
@@ -1571,16 +1900,37 @@ class WaterNetworkModel(AbstractModel):
         -------
         A list of link names connected to the node
         """
-        link_types = {'Pipe', 'Pump', 'Valve'}
-        if flag.upper() == 'ALL':
-            return [link_name for link_name, link_type in self._node_reg.get_usage(node_name) if link_type in link_types and node_name in {self.get_link(link_name).start_node_name, self.get_link(link_name).end_node_name}]
-        elif flag.upper() == 'INLET':
-            return [link_name for link_name, link_type in self._node_reg.get_usage(node_name) if link_type in link_types and node_name == self.get_link(link_name).end_node_name]
-        elif flag.upper() == 'OUTLET':
-            return [link_name for link_name, link_type in self._node_reg.get_usage(node_name) if link_type in link_types and node_name == self.get_link(link_name).start_node_name]
-        else:
+        flag = flag.upper()
+        if flag not in ('ALL', 'INLET', 'OUTLET'):
             logger.error('Unrecognized flag: {0}'.format(flag))
             raise ValueError('Unrecognized flag: {0}'.format(flag))
+        return self._node_reg._adjacency.links(node_name, flag)
+
+    def get_incidence_matrix(self, node_names=None, link_names=None):
+        """
+        Returns the node-link incidence matrix of the network
+
+        Entry (i, j) is 1 if link j ends at node i and -1 if it starts at 
+        node i, so the matrix times the link flow rates gives the net inflow 
+        at each node.
+
+        Parameters
+        ----------
+        node_names : list of strings (optional)
+            Row order, default = node_name_list
+
+        link_names : list of strings (optional)
+            Column order, default = link_name_list
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+        """
+        if node_names is None:
+            node_names = self.node_name_list
+        if link_names is None:
+            link_names = self.link_name_list
+        return self._node_reg._adjacency.incidence_matrix(node_names, link_names)
 
     def query_node_attribute(self, attribute, operation=None, value=None, node_type=None):
         """
@@ -1621,19 +1971,13 @@ class WaterNetworkModel(AbstractModel):
         If operation and value are both None, the Series will contain the attributes
         for all nodes with the specified attribute.
 
+        The attribute values are gathered into an array (see 
+        :meth:`~wntr.network.base.Registry.attribute_values`) and numeric 
+        values are compared all at once.
+
         """
-        node_attribute_dict = {}
-        for name, node in self.nodes(node_type):
-            try:
-                if operation == None and value == None:
-                    node_attribute_dict[name] = getattr(node, attribute)
-                else:
-                    node_attribute = getattr(node, attribute)
-                    if operation(node_attribute, value):
-                        node_attribute_dict[name] = node_attribute
-            except AttributeError:
-                pass
-        return pd.Series(node_attribute_dict)
+        names, values = self._node_reg.attribute_values(attribute, node_type)
+        return _query_series(names, values, operation, value)
 
     def query_link_attribute(self, attribute, operation=None, value=None, link_type=None):
         """
@@ -1674,19 +2018,43 @@ class WaterNetworkModel(AbstractModel):
         If operation and value are both None, the Series will contain the attributes
         for all links with the specified attribute.
 
+        The attribute values are gathered into an array (see 
+        :meth:`~wntr.network.base.Registry.attribute_values`) and numeric 
+        values are compared all at once.
+
         """
-        link_attribute_dict = {}
-        for name, link in self.links(link_type):
-            try:
-                if operation == None and value == None:
-                    link_attribute_dict[name] = getattr(link, attribute)
-                else:
-                    link_attribute = getattr(link, attribute)
-                    if operation(link_attribute, value):
-                        link_attribute_dict[name] = link_attribute
-            except AttributeError:
-                pass
-        return pd.Series(link_attribute_dict)
+        names, values = self._link_reg.attribute_values(attribute, link_type)
+        return _query_series(names, values, operation, value)
+
+    def enable_columnar_storage(self):
+        """
+        Stores numeric node and link attributes in typed NumPy columns.
+
+        Node elevation, head, demand, leak and pressure attributes, and link 
+        length, diameter, roughness, minor loss, reaction coefficients, 
+        flow, status and check valve flag are moved out of the element 
+        objects into column stores held by the node and link registries, 
+        indexed by an integer row per element. The elements keep the same 
+        interface and stay regular Python objects, with their remaining 
+        attributes. Whole columns can be read or written with 
+        ``wn.nodes.column(attribute)`` and 
+        ``wn.links.set_column(attribute, values)``, and 
+        :meth:`query_node_attribute` and :meth:`query_link_attribute` read 
+        these attributes from the columns.
+
+        The elements hold fewer attributes, which reduces the memory used 
+        by large models somewhat (about 15% for Net6, see 
+        benchmarks/benchmark_columnar_storage.py).
+        """
+        self._node_reg.enable_columns()
+        self._link_reg.enable_columns()
+
+    def disable_columnar_storage(self):
+        """
+        Moves column-stored attributes back onto the node and link objects.
+        """
+        self._node_reg.disable_columns()
+        self._link_reg.disable_columns()
 
     def reset_initial_values(self):
         """
@@ -1741,6 +2109,8 @@ class WaterNetworkModel(AbstractModel):
         inpfile = wntr.epanet.InpFile()
         inpfile.read(filename, wn=self)
         self._inpfile = inpfile
+        # store the pattern multipliers in a single table
+        self._pattern_reg._table()
 
     def write_inpfile(self, filename, units=None):
         """
@@ -1838,6 +2208,113 @@ class PatternRegistry(Registry):
         """A new default pattern object"""
         return self.DefaultPattern(self._options)
 
+    def _table(self):
+        """
+        Get the multiplier table of the registry.
+
+        The multipliers of all patterns are stored as the rows of a single 
+        2-D array, padded with zeros to the longest pattern, and identical 
+        patterns share a row. Patterns with float multipliers are pointed 
+        at (read-only) views of their row, so the table also holds their 
+        multipliers. The table is rebuilt after a pattern is added or 
+        removed, or after the multipliers of a pattern are replaced.
+
+        Returns
+        -------
+        table : numpy.ndarray
+            Unique multipliers, one row per unique pattern
+        lengths : numpy.ndarray
+            Number of multipliers in each row
+        rows : numpy.ndarray
+            Row of each pattern, in registry order
+        """
+        items = self._items()
+        cached = self._cache.get('table')
+        if cached is not None:
+            views = cached[3]
+            if all(pattern._multipliers is view for (name, pattern), view in zip(items, views)):
+                return cached[:3]
+        unique = OrderedDict()
+        rows = np.empty(len(items), dtype=np.intp)
+        multipliers = []
+        for i, (name, pattern) in enumerate(items):
+            values = np.asarray(pattern._multipliers, dtype=float).ravel()
+            multipliers.append(values)
+            rows[i] = unique.setdefault(values.tobytes(), len(unique))
+        lengths = np.zeros(len(unique), dtype=np.intp)
+        for values, row in zip(multipliers, rows):
+            lengths[row] = len(values)
+        table = np.zeros((len(unique), max(lengths.max() if len(lengths) else 0, 1)))
+        for values, row in zip(multipliers, rows):
+            table[row, :len(values)] = values
+        table.flags.writeable = False
+        views = []
+        for (name, pattern), row in zip(items, rows):
+            if pattern._multipliers.dtype == np.float64 and pattern._multipliers.ndim == 1:
+                pattern._multipliers = table[row, :lengths[row]]
+            views.append(pattern._multipliers)
+        lengths.flags.writeable = False
+        rows.flags.writeable = False
+        self._cache['table'] = (table, lengths, rows, views)
+        return table, lengths, rows
+
+    def at_many(self, times, pattern_names=None):
+        """
+        Returns the values of patterns at many times.
+        
+        The values are computed from the multiplier table of the registry
+        in one array operation, with the same rules as 
+        :meth:`~wntr.network.elements.Pattern.at`.
+
+        Parameters
+        ----------
+        times : array-like of int
+            Times in seconds
+        pattern_names : list of strings (optional)
+            Names of the patterns, default = all patterns
+        
+        Returns
+        -------
+        pandas DataFrame
+            Pattern values (index = times, columns = pattern names)
+        """
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        if pattern_names is None:
+            pattern_names = self.name_array()
+            positions = np.arange(len(pattern_names))
+        else:
+            index = self._cached('positions', lambda: dict(zip(self._names(), range(len(self)))))
+            positions = np.array([index[name] for name in pattern_names], dtype=np.intp)
+        values = self._values_at(times, positions)
+        return pd.DataFrame(values, index=times, columns=pattern_names)
+
+    def _values_at(self, times, positions):
+        """Get the values of the patterns at the given registry positions 
+        at an array of times, as an array of shape (times, patterns)"""
+        table, lengths, rows = self._table()
+        items = self._items()
+        patterns = [items[i][1] for i in positions]
+        rows = rows[positions]
+        lengths = lengths[rows]
+        wrap = np.array([pattern.wrap for pattern in patterns], dtype=bool)
+        start = np.zeros(len(patterns))
+        timestep = np.ones(len(patterns))
+        for i, pattern in enumerate(patterns):
+            time_options = pattern._time_options
+            if time_options is not None:
+                start[i] = time_options.pattern_start
+                timestep[i] = time_options.pattern_timestep
+            elif lengths[i] > 1:
+                raise RuntimeError('Pattern->time_options cannot be None at runtime')
+        steps = ((times[:, np.newaxis] + start)//timestep).astype(np.int64)
+        index = np.where(wrap, steps % np.maximum(lengths, 1), steps)
+        inside = wrap | ((steps >= 0) & (steps < lengths))
+        index = np.clip(index, 0, np.maximum(lengths - 1, 0))
+        values = np.where(inside, table[rows, index], 0.0)
+        values[:, lengths == 1] = table[rows[lengths == 1], 0]
+        values[:, lengths == 0] = 1.0
+        return values
+
 #    def tostring(self):
 #        """String representation of the pattern registry"""
 #        s  = 'Pattern Registry:\n'
@@ -1866,9 +2343,11 @@ class CurveRegistry(Registry):
     def __setitem__(self, key, value):
         if not isinstance(key, six.string_types):
             raise ValueError('Registry keys must be strings')
+        self._record('replaced' if key in self._data else 'added', key, value)
         self._data[key] = value
         if value is not None:
             self.set_curve_type(key, value.curve_type)
+        self._bump_version()
     
     def set_curve_type(self, key, curve_type):
         """WARNING -- does not check to make sure key is typed before assigning it - you could end up
@@ -2037,6 +2516,8 @@ class SourceRegistry(Registry):
             elif key in self._usage:
                 self._usage.pop(key)
             source = self._data.pop(key)
+            self._bump_version()
+            self._record('removed', key, source)
             self._pattern_reg.remove_usage(source.strength_timeseries.pattern_name, (source.name, 'Source'))
             self._node_reg.remove_usage(source.node_name, (source.name, 'Source'))            
             return source
@@ -2047,26 +2528,54 @@ class SourceRegistry(Registry):
 
 class NodeRegistry(Registry):
     """A registry for nodes."""
+    _column_spec = OrderedDict([('elevation', 'float'), ('head', 'nullable'),
+                                ('demand', 'nullable'), ('leak_demand', 'nullable'),
+                                ('leak_area', 'nullable'), ('leak_discharge_coeff', 'nullable'),
+                                ('nominal_pressure', 'nullable'), ('minimum_pressure', 'nullable'),
+                                ('emitter_coefficient', 'nullable'), ('isolated', 'bool')])
+
     def __init__(self, model):
         super(NodeRegistry, self).__init__(model)
         self._junctions = OrderedSet()
         self._reservoirs = OrderedSet()
         self._tanks = OrderedSet()
+        self._adjacency = AdjacencyIndex()
     
     def _finalize_(self, model):
         super(self.__class__, self)._finalize_(model)
         self._node_reg = None
+
+    @property
+    def adjacency(self):
+        """:class:`~wntr.network.model.AdjacencyIndex`: The node-to-link adjacency index"""
+        return self._adjacency
+
+    def _reconnect(self, link):
+        """Update the adjacency index after the start or end node of a link changed"""
+        if self._link_reg._data.get(link.name) is link:
+            self._adjacency.set_link_nodes(link.name, link.start_node_name, link.end_node_name)
+            self._link_reg._bump_version()
     
     def __setitem__(self, key, value):
         if not isinstance(key, six.string_types):
             raise ValueError('Registry keys must be strings')
+        if key in self._data:
+            self._record('replaced', key, value)
+            if self._data[key] is not value:
+                self._detach(self._data[key])
+                self._data[key]._journal = None
+        else:
+            self._record('added', key, value)
         self._data[key] = value
+        self._attach(value)
+        value._journal = self._journal
         if isinstance(value, Junction):
             self._junctions.add(key)
         elif isinstance(value, Tank):
             self._tanks.add(key)
         elif isinstance(value, Reservoir):
             self._reservoirs.add(key)
+        self._bump_version()
     
     def __delitem__(self, key):
         try:
@@ -2078,9 +2587,13 @@ class NodeRegistry(Registry):
             elif key in self._usage:
                 self._usage.pop(key)
             node = self._data.pop(key)
+            self._detach(node)
+            node._journal = None
+            self._record('removed', key, node)
             self._junctions.discard(key)
             self._reservoirs.discard(key)
             self._tanks.discard(key)
+            self._bump_version()
             if isinstance(node, Junction):
                 for pat_name in node.demand_timeseries_list.pattern_list():
                     if pat_name:
@@ -2112,20 +2625,19 @@ class NodeRegistry(Registry):
         -------
         A generator in the format (name, object).
         """
-        if node_type==None:
-            for node_name, node in self._data.items():
-                yield node_name, node
-        elif node_type==Junction:
-            for node_name in self._junctions:
-                yield node_name, self._data[node_name]
-        elif node_type==Tank:
-            for node_name in self._tanks:
-                yield node_name, self._data[node_name]
-        elif node_type==Reservoir:
-            for node_name in self._reservoirs:
-                yield node_name, self._data[node_name]
-        else:
-            raise RuntimeError('node_type, '+str(node_type)+', not recognized.')
+        for node_name, node in self._items(node_type):
+            yield node_name, node
+
+    def _subset(self, node_type):
+        if node_type is None or node_type is Node:
+            return self._data
+        elif node_type is Junction:
+            return self._junctions
+        elif node_type is Tank:
+            return self._tanks
+        elif node_type is Reservoir:
+            return self._reservoirs
+        raise RuntimeError('node_type, '+str(node_type)+', not recognized.')
 
     def add_junction(self, name, base_demand=0.0, demand_pattern=None, 
                      elevation=0.0, coordinates=None, demand_category=None):
@@ -2156,6 +2668,73 @@ class NodeRegistry(Registry):
         if coordinates is not None:
             junction.coordinates = coordinates
 
+    def _add_junctions(self, names, base_demands, demand_patterns, elevations,
+                       coordinates=None, demand_categories=None):
+        """
+        Adds junctions in bulk, without the per-junction argument checks
+        of :meth:`add_junction`.
+
+        Parameters
+        -------------------
+        names : list of string
+            Names of the junctions.
+        base_demands : list of float
+            Base demand at each junction.
+        demand_patterns : list of string
+            Name of the demand pattern of each junction.
+        elevations : list of float
+            Elevation of each junction.
+        coordinates : list of tuples, optional
+            X-Y coordinates of each junction, or None.
+        demand_categories : list of string, optional
+            Demand category of each junction, or None.
+
+        """
+        n = len(names)
+        if coordinates is None:
+            coordinates = [None] * n
+        if demand_categories is None:
+            demand_categories = [None] * n
+        data = self._data
+        junctions = self._junctions
+        journal = self._journal
+        with _gc_paused():
+            for name, base_demand, demand_pattern, elevation, xy, category in \
+                    zip(names, base_demands, demand_patterns, elevations, coordinates, demand_categories):
+                junction = Junction(name, self)
+                junction.elevation = elevation
+                junction.add_demand(base_demand, demand_pattern, category)
+                if xy is not None:
+                    junction.coordinates = xy
+                self._record('replaced' if name in data else 'added', name, junction)
+                data[name] = junction
+                junctions.add(name)
+                self._attach(junction)
+                junction._journal = journal
+        self._bump_version()
+
+    def _add_nodes(self, nodes):
+        """
+        Adds node objects in bulk.
+
+        Parameters
+        ----------
+        nodes : list of Node
+            Nodes created with this registry.
+
+        """
+        data = self._data
+        journal = self._journal
+        with _gc_paused():
+            for node in nodes:
+                name = node.name
+                self._record('replaced' if name in data else 'added', name, node)
+                data[name] = node
+                self._subset(type(node)).add(name)
+                self._attach(node)
+                node._journal = journal
+        self._bump_version()
+
     def add_tank(self, name, elevation=0.0, init_level=3.048,
                  min_level=0.0, max_level=6.096, diameter=15.24,
                  min_vol=0.0, vol_curve=None, coordinates=None):
@@ -2189,6 +2768,12 @@ class NodeRegistry(Registry):
             If `init_level` greater than `max_level` or less than `min_level`
             
         """
+        self[name] = self._new_tank(name, elevation, init_level, min_level, max_level, 
+                                    diameter, min_vol, vol_curve, coordinates)
+
+    def _new_tank(self, name, elevation, init_level, min_level, max_level, 
+                  diameter, min_vol, vol_curve, coordinates):
+        """Create a tank, see :meth:`add_tank`"""
         elevation = float(elevation)
         init_level = float(init_level)
         min_level = float(min_level)
@@ -2209,9 +2794,9 @@ class NodeRegistry(Registry):
         tank.diameter = diameter
         tank.min_vol = min_vol
         tank.vol_curve_name = vol_curve
-        self[name] = tank
         if coordinates is not None:
             tank.coordinates = coordinates
+        return tank
 
     def add_reservoir(self, name, base_head=0.0, head_pattern=None, coordinates=None):
         """
@@ -2229,15 +2814,19 @@ class NodeRegistry(Registry):
             X-Y coordinates of the node location.
         
         """
+        self[name] = self._new_reservoir(name, base_head, head_pattern, coordinates)
+
+    def _new_reservoir(self, name, base_head, head_pattern, coordinates):
+        """Create a reservoir, see :meth:`add_reservoir`"""
         base_head = float(base_head)
         if head_pattern and not isinstance(head_pattern, six.string_types):
             raise ValueError('Head pattern must be a string')
         reservoir = Reservoir(name, self)
         reservoir.base_head = base_head
         reservoir.head_pattern_name = head_pattern
-        self[name] = reservoir
         if coordinates is not None:
             reservoir.coordinates = coordinates
+        return reservoir
 
     @property
     def junction_names(self):
@@ -2313,6 +2902,15 @@ class NodeRegistry(Registry):
 class LinkRegistry(Registry):
     """A registry for links."""
     __subsets = ['_pipes', '_pumps', '_head_pumps', '_power_pumps', '_prvs', '_psvs', '_pbvs', '_tcvs', '_fcvs', '_gpvs', '_valves']
+    _type_subsets = {Pipe: '_pipes', Pump: '_pumps', HeadPump: '_head_pumps', 
+                     PowerPump: '_power_pumps', Valve: '_valves', PRValve: '_prvs', 
+                     PSValve: '_psvs', PBValve: '_pbvs', TCValve: '_tcvs', 
+                     FCValve: '_fcvs', GPValve: '_gpvs'}
+    _column_spec = OrderedDict([('length', 'float'), ('diameter', 'float'),
+                                ('roughness', 'float'), ('minor_loss', 'float'),
+                                ('bulk_rxn_coeff', 'nullable'), ('wall_rxn_coeff', 'nullable'),
+                                ('cv', 'bool'), ('flow', 'nullable'), ('status', 'status'),
+                                ('internal_status', 'status'), ('isolated', 'bool')])
 
     def __init__(self, model):
         super(LinkRegistry, self).__init__(model)
@@ -2335,7 +2933,17 @@ class LinkRegistry(Registry):
     def __setitem__(self, key, value):
         if not isinstance(key, six.string_types):
             raise ValueError('Registry keys must be strings')
+        if key in self._data:
+            self._record('replaced', key, value)
+            if self._data[key] is not value:
+                self._detach(self._data[key])
+                self._data[key]._journal = None
+        else:
+            self._record('added', key, value)
         self._data[key] = value
+        self._attach(value)
+        value._journal = self._journal
+        self._node_reg._adjacency.add_link(key, value.start_node_name, value.end_node_name)
         if isinstance(value, Pipe):
             self._pipes.add(key)
         elif isinstance(value, Pump):
@@ -2358,6 +2966,7 @@ class LinkRegistry(Registry):
                 self._fcvs.add(key)
             elif isinstance(value, GPValve):
                 self._gpvs.add(key)
+        self._bump_version()
     
     def __delitem__(self, key):
         try:
@@ -2369,6 +2978,10 @@ class LinkRegistry(Registry):
             elif key in self._usage:
                 self._usage.pop(key)
             link = self._data.pop(key)
+            self._detach(link)
+            link._journal = None
+            self._record('removed', key, link)
+            self._node_reg._adjacency.remove_link(key)
             self._node_reg.remove_usage(link.start_node_name, (link.name, link.link_type))
             self._node_reg.remove_usage(link.end_node_name, (link.name, link.link_type))
             if isinstance(link, GPValve):
@@ -2380,6 +2993,7 @@ class LinkRegistry(Registry):
             for ss in self.__subsets:
                 # Go through the _pipes, _prvs, ..., and remove this link
                 getattr(self, ss).discard(key)
+            self._bump_version()
             return link
         except KeyError:
             return
@@ -2403,19 +3017,15 @@ class LinkRegistry(Registry):
         -------
         A generator in the format (name, object).
         """
-        if link_type==None:
-            for name, node in self._data.items():
-                yield name, node
-        elif link_type==Pipe:
-            for name in self._pipes:
-                yield name, self._data[name]
-        elif link_type==Pump:
-            for name in self._pumps:
-                yield name, self._data[name]
-        elif link_type==Valve:
-            for name in self._valves:
-                yield name, self._data[name]
-        else:
+        for name, link in self._items(link_type):
+            yield name, link
+
+    def _subset(self, link_type):
+        if link_type is None or link_type is Link:
+            return self._data
+        try:
+            return getattr(self, self._type_subsets[link_type])
+        except KeyError:
             raise RuntimeError('link_type, '+str(link_type)+', not recognized.')
 
     def add_pipe(self, name, start_node_name, end_node_name, length=304.8,
@@ -2462,6 +3072,78 @@ class LinkRegistry(Registry):
         pipe.cv = check_valve_flag
         self[name] = pipe
 
+    def _add_pipes(self, names, start_node_names, end_node_names, lengths, diameters,
+                   roughnesses, minor_losses, statuses, check_valve_flags):
+        """
+        Adds pipes in bulk, without the per-pipe argument checks of
+        :meth:`add_pipe`.
+
+        Parameters
+        ----------
+        names : list of string
+            Names of the pipes.
+        start_node_names : list of string
+             Name of the start node of each pipe.
+        end_node_names : list of string
+             Name of the end node of each pipe.
+        lengths, diameters, roughnesses, minor_losses : list of float
+            Pipe length, diameter, roughness and minor loss coefficient.
+        statuses : list of LinkStatus
+            Initial status of each pipe.
+        check_valve_flags : list of bool
+            True if the pipe has a check valve.
+
+        """
+        data = self._data
+        pipes = self._pipes
+        adjacency = self._node_reg._adjacency
+        journal = self._journal
+        with _gc_paused():
+            for name, start_node_name, end_node_name, length, diameter, roughness, minor_loss, status, cv in \
+                    zip(names, start_node_names, end_node_names, lengths, diameters,
+                        roughnesses, minor_losses, statuses, check_valve_flags):
+                pipe = Pipe(name, start_node_name, end_node_name, self)
+                pipe.length = length
+                pipe.diameter = diameter
+                pipe.roughness = roughness
+                pipe.minor_loss = minor_loss
+                pipe._initial_status = status
+                pipe._user_status = status
+                pipe.cv = cv
+                self._record('replaced' if name in data else 'added', name, pipe)
+                data[name] = pipe
+                pipes.add(name)
+                self._attach(pipe)
+                pipe._journal = journal
+                adjacency.add_link(name, start_node_name, end_node_name)
+        self._bump_version()
+
+    def _add_links(self, links):
+        """
+        Adds link objects in bulk.
+
+        Parameters
+        ----------
+        links : list of Link
+            Links created with this registry.
+
+        """
+        data = self._data
+        adjacency = self._node_reg._adjacency
+        journal = self._journal
+        with _gc_paused():
+            for link in links:
+                name = link.name
+                self._record('replaced' if name in data else 'added', name, link)
+                data[name] = link
+                for cls in type(link).__mro__:
+                    if cls in self._type_subsets:
+                        getattr(self, self._type_subsets[cls]).add(name)
+                self._attach(link)
+                link._journal = journal
+                adjacency.add_link(name, link.start_node_name, link.end_node_name)
+        self._bump_version()
+
     def add_pump(self, name, start_node_name, end_node_name, pump_type='POWER',
                  pump_parameter=50.0, speed=1.0, pattern=None):
         """
@@ -2485,6 +3167,12 @@ class LinkRegistry(Registry):
             ID of pattern for speed setting
         
         """
+        self[name] = self._new_pump(name, start_node_name, end_node_name, pump_type, 
+                                    pump_parameter, speed, pattern)
+
+    def _new_pump(self, name, start_node_name, end_node_name, pump_type, 
+                  pump_parameter, speed, pattern):
+        """Create a pump, see :meth:`add_pump`"""
         if pump_type.upper() == 'POWER':
             pump = PowerPump(name, start_node_name, end_node_name, self)
             pump.power = pump_parameter
@@ -2501,7 +3189,7 @@ class LinkRegistry(Registry):
             pump.speed_pattern_name = pattern.name
         else:
             pump.speed_pattern_name = pattern
-        self[name] = pump
+        return pump
     
     def add_valve(self, name, start_node_name, end_node_name,
                  diameter=0.3048, valve_type='PRV', minor_loss=0.0, setting=0.0):
@@ -2529,6 +3217,12 @@ class LinkRegistry(Registry):
             name of headloss curve for GPV.
         
         """
+        self[name] = self._new_valve(name, start_node_name, end_node_name, diameter, 
+                                     valve_type, minor_loss, setting)
+
+    def _new_valve(self, name, start_node_name, end_node_name, diameter, 
+                   valve_type, minor_loss, setting):
+        """Create a valve, see :meth:`add_valve`"""
         start_node = self._node_reg[start_node_name]
         end_node = self._node_reg[end_node_name]
         if type(start_node)==Tank or type(end_node)==Tank:
@@ -2559,7 +3253,7 @@ class LinkRegistry(Registry):
             valve.headloss_curve_name = setting
         valve.diameter = diameter
         valve.minor_loss = minor_loss
-        self[name] = valve
+        return valve
 
     def check_valves(self):
         """Generator to get all pipes with check valves
@@ -2825,3 +3519,733 @@ class LinkRegistry(Registry):
 #                s += '   - {}: {}\n'.format(orphan, self._usage[orphan])
 #        return s
 
+
+def _query_series(names, values, operation, value):
+    """Select the attribute values that satisfy an operation for 
+    query_node_attribute and query_link_attribute"""
+    if operation is None and value is None:
+        if values.dtype == object:
+            # let pandas infer the dtype, as it does for a list of values
+            return pd.Series(values.tolist(), index=names)
+        return pd.Series(values.copy(), index=names)
+    mask = None
+    if values.dtype != object:
+        try:
+            mask = np.asarray(operation(values, value))
+        except Exception:
+            mask = None
+        if mask is not None and (mask.dtype != bool or mask.shape != values.shape):
+            mask = None
+    if mask is None:
+        # Compare the values one by one
+        mask = np.zeros(len(values), dtype=bool)
+        for i, attribute_value in enumerate(values):
+            try:
+                mask[i] = bool(operation(attribute_value, value))
+            except AttributeError:
+                pass
+    if values.dtype == object:
+        return pd.Series(values[mask].tolist(), index=names[mask])
+    return pd.Series(values[mask], index=names[mask])
+
+def _weight_dict(weight, names):
+    """Get the node or link weights of get_graph as a dictionary; weights 
+    that cannot be looked up by name are ignored"""
+    if isinstance(weight, pd.Series):
+        # Keep numpy scalars, as returned by weight[name]
+        return dict(zip(weight.index, weight.values))
+    if isinstance(weight, dict):
+        return weight
+    values = {}
+    for name in names:
+        try:
+            values[name] = weight[name]
+        except (KeyError, IndexError, TypeError):
+            pass
+    return values
+
+def _weighted_edges(edges, link_weight, modify_direction):
+    """Add link weights to the edges of get_graph; if modify_direction, 
+    edges with a negative weight are reversed and given the absolute weight"""
+    for start_node, end_node, name, data in edges:
+        value = link_weight.get(name, _missing)
+        if value is _missing:
+            yield start_node, end_node, name, data
+        elif modify_direction and value < 0: # change the direction of the link and value
+            yield end_node, start_node, name, {'type': data['type'], 'weight': -value}
+        else:
+            yield start_node, end_node, name, {'type': data['type'], 'weight': value}
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector while many small objects are 
+    created, as when reading an INP file"""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _element_table(data, element, registry, required=(), **defaults):
+    """Read the table of element attributes given to a bulk add method
+    
+    Returns an OrderedDict that maps ``name``, each required attribute and
+    each attribute in defaults to a list of values. Missing columns are 
+    filled with the default.
+    """
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame(data)
+    unknown = set(data.columns).difference(defaults).difference(required).difference(['name'])
+    if unknown:
+        raise ValueError('Unknown %s attributes: %s' % (element, ', '.join(sorted(map(str, unknown)))))
+    if 'name' in data.columns:
+        names = data['name'].tolist()
+    else:
+        names = data.index.tolist()
+    if not set(map(type, names)).issubset(six.string_types):
+        raise ValueError('%s names must be strings' % element.capitalize())
+    index = pd.Index(names)
+    if index.has_duplicates:
+        raise ValueError('Duplicate %s names: %s' % (element, ', '.join(index[index.duplicated()].unique()[0:5])))
+    existing = [name for name in names if name in registry._data]
+    if existing:
+        raise ValueError('%s names already in the model: %s' % (element.capitalize(), ', '.join(existing[0:5])))
+    table = OrderedDict([('name', names)])
+    for column in required:
+        if column not in data.columns:
+            raise ValueError('The %s attributes must include %s' % (element, column))
+        table[column] = data[column].tolist()
+    for column, default in defaults.items():
+        if column in data.columns:
+            table[column] = data[column].tolist()
+        else:
+            table[column] = [default] * len(names)
+    return table
+
+def _float_values(table, column):
+    """Return a column of a bulk add table as a list of floats"""
+    try:
+        values = np.asarray(table[column], dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError('%s must be numbers' % column)
+    invalid = ~np.isfinite(values)
+    if invalid.any():
+        raise ValueError('Invalid %s for %s' % (column, table['name'][np.argmax(invalid)]))
+    return values.tolist()
+
+def _name_values(table, column):
+    """Return a column of pattern, curve or category names of a bulk add 
+    table, with None where there is no name"""
+    values = [getattr(value, 'name', value) for value in table[column]]
+    missing = pd.isnull(values)
+    values = [None if is_missing or value == '' else value for value, is_missing in zip(values, missing)]
+    if not set(map(type, values)).issubset(set(six.string_types).union([type(None)])):
+        raise ValueError('%s must be names' % column)
+    return values
+
+def _coordinate_values(table):
+    """Return the coordinates column of a bulk add table as tuples, with 
+    None where coordinates are not given"""
+    values = []
+    for name, xy in zip(table['name'], table['coordinates']):
+        if isinstance(xy, (list, tuple, np.ndarray)) and len(xy) == 2:
+            xy = (xy[0], xy[1])
+        elif xy is not None and not (isinstance(xy, float) and np.isnan(xy)):
+            raise ValueError('Invalid coordinates for %s, must be a 2-tuple' % name)
+        else:
+            xy = None
+        values.append(xy)
+    return values
+
+def _endpoint_values(table, node_reg):
+    """Return the start and end node names of a bulk add table, checking 
+    that the nodes exist"""
+    start_node_names = table['start_node_name']
+    end_node_names = table['end_node_name']
+    missing = set(start_node_names).union(end_node_names).difference(node_reg._data)
+    if missing:
+        raise ValueError('Nodes not found: %s' % ', '.join(sorted(map(str, missing))[0:5]))
+    return start_node_names, end_node_names
+
+
+# Values of these types are shared by a model and its clones; tuples are
+# assumed to hold immutable values (such as coordinates)
+_immutable_types = frozenset([type(None), bool, float, complex, tuple, frozenset, 
+                              bytes, LinkStatus, np.float64, np.int64, np.bool_, 
+                              np.ufunc] + 
+                             list(six.string_types) + list(six.integer_types))
+
+_missing = object()
+
+def _tuple_getter(keys):
+    """Return a function that gets the values of keys from a dict as a tuple"""
+    if len(keys) == 0:
+        return lambda attributes: ()
+    elif len(keys) == 1:
+        key = keys[0]
+        return lambda attributes: (attributes[key],)
+    return operator.itemgetter(*keys)
+
+
+class _ModelCloner(object):
+    """Copies the objects of a water network model for 
+    :meth:`WaterNetworkModel.clone`
+    
+    Objects of the same class (for example, all the pipes of a registry) 
+    are copied together: their attribute dictionaries are copied, checked
+    against the layout of the class, and updated key by key for the group.
+
+    Parameters
+    ----------
+    refs : dict
+        Maps the id of objects that were already copied to their copy, in 
+        the format of the memo dictionary of copy.deepcopy
+    """
+    def __init__(self, refs):
+        self.refs = refs
+        # Per class, how the attributes of its instances are copied
+        self.layouts = {}
+        # Per class, whether its instances are copied through their __dict__
+        self.plain = {}
+
+    def _is_plain(self, cls, value):
+        plain = self.plain.get(cls)
+        if plain is None:
+            # Instances are created with object.__new__; a __new__ that 
+            # takes arguments (given by __getnewargs__) only picks the class
+            plain = self.plain[cls] = bool(cls.__module__.startswith('wntr.') and 
+                                           (cls.__new__ is object.__new__ or 
+                                            hasattr(cls, '__getnewargs__')) and 
+                                           hasattr(value, '__dict__') and 
+                                           not isinstance(value, (type, Enum)))
+        return plain
+
+    def _layout(self, cls, attributes, previous):
+        """Sort the attributes of an object by how they are copied
+        
+        Attributes that refer to the same, already copied, object (such as
+        a registry) in every instance are shared; they are replaced by the
+        copy of that object. Attributes that held another mutable value in
+        any instance are copied, and all other attributes are immutable and
+        kept.
+        """
+        refs = self.refs
+        if previous is None:
+            shared = None
+            mutable = ()
+        else:
+            shared = dict(zip(previous['shared_keys'], previous['shared_ids']))
+            mutable = set(previous['mutable_keys'])
+        shared_keys, mutable_keys, other_keys = [], [], []
+        for key, item in attributes.items():
+            if key in mutable:
+                mutable_keys.append(key)
+            elif type(item) not in _immutable_types:
+                if id(item) in refs and (shared is None or shared.get(key) == id(item)):
+                    shared_keys.append(key)
+                else:
+                    mutable_keys.append(key)
+            elif shared is not None and key in shared:
+                mutable_keys.append(key)
+            else:
+                other_keys.append(key)
+        layout = {'size': len(attributes),
+                  'shared_keys': shared_keys,
+                  'shared': _tuple_getter(shared_keys),
+                  'shared_ids': tuple(id(attributes[key]) for key in shared_keys),
+                  'shared_values': dict((key, refs[id(attributes[key])]) for key in shared_keys),
+                  'mutable_keys': mutable_keys,
+                  'other': _tuple_getter(other_keys)}
+        self.layouts[cls] = layout
+        return layout
+
+    def _matches(self, layout, dicts):
+        """Check that the attribute dictionaries follow a layout"""
+        if layout is None:
+            return False
+        if set(map(len, dicts)) != set([layout['size']]):
+            return False
+        for key, shared_id in zip(layout['shared_keys'], layout['shared_ids']):
+            if set(map(id, map(operator.itemgetter(key), dicts))) != set([shared_id]):
+                return False
+        return _immutable_types.issuperset(map(type, chain.from_iterable(map(layout['other'], dicts))))
+
+    def _copy_objects(self, cls, values, copies=None):
+        """Copy wntr objects of one class that were not copied yet, or fill
+        the given empty copies"""
+        dicts = [value.__dict__.copy() for value in values]
+        layout = self.layouts.get(cls)
+        if layout is None:
+            # Attributes that refer to different objects in the first two
+            # objects are mutable
+            for attributes in dicts[:2]:
+                layout = self._layout(cls, attributes, layout)
+        if not self._matches(layout, dicts):
+            if len(values) > 1:
+                for i, value in enumerate(values):
+                    self._copy_objects(cls, [value], None if copies is None else [copies[i]])
+                return [self.refs[id(value)] for value in values]
+            layout = self._layout(cls, dicts[0], layout)
+        if copies is None:
+            copies = [object.__new__(cls) for value in values]
+            self.refs.update(zip(map(id, values), copies))
+        shared_values = layout['shared_values']
+        for attributes in dicts:
+            attributes.update(shared_values)
+        for key in layout['mutable_keys']:
+            items = self.copy_many([attributes[key] for attributes in dicts])
+            for attributes, item in zip(dicts, items):
+                attributes[key] = item
+        for new, attributes in zip(copies, dicts):
+            new.__dict__ = attributes
+        return copies
+
+    def _copy_lists(self, values):
+        """Copy lists that were not copied yet"""
+        if _immutable_types.issuperset(map(type, chain.from_iterable(values))):
+            copies = list(map(list, values))
+        else:
+            items = self.copy_many(chain.from_iterable(values))
+            copies = []
+            start = 0
+            for value in values:
+                copies.append(items[start:start + len(value)])
+                start += len(value)
+        self.refs.update(zip(map(id, values), copies))
+        return copies
+
+    def _copy_dicts(self, cls, values):
+        """Copy dictionaries that were not copied yet"""
+        if _immutable_types.issuperset(map(type, chain.from_iterable(map(cls.values, values)))):
+            copies = list(map(cls.copy, values))
+            self.refs.update(zip(map(id, values), copies))
+            return copies
+        return [self.copy(value) for value in values]
+
+    def _copy_group(self, cls, values):
+        """Copy values of one class that were not copied yet, returns None
+        if values of the class are not copied in groups"""
+        if cls is list:
+            return self._copy_lists(values)
+        elif cls is OrderedDict or cls is dict:
+            return self._copy_dicts(cls, values)
+        elif self._is_plain(cls, values[0]):
+            return self._copy_objects(cls, values)
+        return None
+
+    def _lookup(self, values, ids, types):
+        """Return the copies of values, with _missing for values that were 
+        not copied yet"""
+        get = self.refs.get
+        if types.isdisjoint(_immutable_types):
+            return list(map(get, ids, repeat(_missing)))
+        return [value if type(value) in _immutable_types else get(value_id, _missing) 
+                for value, value_id in zip(values, ids)]
+
+    def copy_many(self, values):
+        """Copy several values, grouping the wntr objects by class"""
+        values = list(values)
+        types = set(map(type, values))
+        if _immutable_types.issuperset(types):
+            return values
+        ids = list(map(id, values))
+        if len(types) == 1 and len(set(ids)) == len(values) and self.refs.keys().isdisjoint(ids):
+            # Distinct values of one class, none copied yet
+            copies = self._copy_group(next(iter(types)), values)
+            if copies is not None:
+                return copies
+        result = self._lookup(values, ids, types)
+        if not any(map(operator.is_, result, repeat(_missing))):
+            return result
+        pending = OrderedDict((id(value), value) for value, copied in zip(values, result)
+                              if copied is _missing)
+        pending = list(pending.values())
+        for cls in sorted(set(map(type, pending)), key=lambda cls: cls.__name__):
+            group = [value for value in pending if type(value) is cls and id(value) not in self.refs]
+            if group:
+                self._copy_group(cls, group)
+        result = self._lookup(values, ids, types)
+        if any(map(operator.is_, result, repeat(_missing))):
+            result = [self.copy(value) for value in values]
+        return result
+
+    def copy(self, value):
+        """Copy a value, reusing the copies of objects copied earlier"""
+        cls = type(value)
+        if cls in _immutable_types:
+            return value
+        refs = self.refs
+        new = refs.get(id(value))
+        if new is not None:
+            return new
+        if cls is list:
+            self._copy_lists([value])
+            new = refs[id(value)]
+        elif cls is OrderedDict or cls is dict:
+            if _immutable_types.issuperset(map(type, value.values())):
+                new = refs[id(value)] = cls(value)
+            else:
+                new = refs[id(value)] = cls()
+                new.update(zip(value.keys(), self.copy_many(value.values())))
+        elif cls is set or cls is deque:
+            items = self.copy_many(value)
+            new = refs[id(value)] = set(items) if cls is set else deque(items, value.maxlen)
+        elif cls is np.ndarray:
+            new = refs[id(value)] = value.copy()
+            new.flags.writeable = value.flags.writeable
+        elif self._is_plain(cls, value):
+            self._copy_objects(cls, [value])
+            new = refs[id(value)]
+        elif isinstance(value, Enum):
+            # Members are singletons, deepcopy would reduce them through 
+            # their values
+            new = value
+        else:
+            new = copy.deepcopy(value, refs)
+        return new
+
+    def copy_model(self, wn):
+        """Copy a water network model
+        
+        Empty copies of the model and the objects it holds (registries, 
+        options, controls) are registered first, so that every element 
+        refers to them from the start and they are treated as shared.
+        """
+        refs = self.refs
+        shells = []
+        others = []
+        for value in [wn] + list(wn.__dict__.values()):
+            cls = type(value)
+            if cls in _immutable_types or id(value) in refs:
+                continue
+            elif cls is OrderedDict or cls is dict or self._is_plain(cls, value):
+                refs[id(value)] = cls() if cls is OrderedDict or cls is dict else object.__new__(cls)
+                shells.append(value)
+            else:
+                others.append(value)
+        # Copy other objects (such as the options) before they are met 
+        # through the elements
+        self.copy_many(others)
+        # Fill the shells, the model last
+        for value in shells[1:] + shells[:1]:
+            new = refs[id(value)]
+            if isinstance(new, dict):
+                new.update(zip(value.keys(), self.copy_many(value.values())))
+            else:
+                self._copy_objects(type(value), [value], [new])
+        return refs[id(wn)]
+
+
+class AdjacencyIndex(object):
+    """Node-to-link adjacency index, maintained as links are added, removed
+    and reconnected.
+
+    For each node, the connected links are kept in insertion order along with
+    the direction of the connection, so that the links of a node are found in
+    O(degree). CSR arrays and a sparse incidence matrix can be exported for
+    vectorized use; these are rebuilt only after the connectivity changes.
+    """
+    _OUTLET = 1  # node is the start node of the link
+    _INLET = 2  # node is the end node of the link
+
+    def __init__(self):
+        self._node_links = OrderedDict()
+        self._link_nodes = OrderedDict()
+        self._arrays = None
+
+    def __len__(self):
+        return len(self._link_nodes)
+
+    def _connect(self, node_name, link_name, direction):
+        links = self._node_links.get(node_name)
+        if links is None:
+            links = self._node_links[node_name] = OrderedDict()
+        links[link_name] = links.get(link_name, 0) | direction
+
+    def _disconnect(self, node_name, link_name, direction):
+        links = self._node_links[node_name]
+        flags = links[link_name] & ~direction
+        if flags:
+            links[link_name] = flags
+        else:
+            del links[link_name]
+            if not links:
+                del self._node_links[node_name]
+
+    def add_link(self, link_name, start_node_name, end_node_name):
+        """Add a link to the index."""
+        if link_name in self._link_nodes:
+            self.remove_link(link_name)
+        self._link_nodes[link_name] = (start_node_name, end_node_name)
+        self._connect(start_node_name, link_name, self._OUTLET)
+        self._connect(end_node_name, link_name, self._INLET)
+        self._arrays = None
+
+    def remove_link(self, link_name):
+        """Remove a link from the index."""
+        start_node_name, end_node_name = self._link_nodes.pop(link_name)
+        self._disconnect(start_node_name, link_name, self._OUTLET)
+        self._disconnect(end_node_name, link_name, self._INLET)
+        self._arrays = None
+
+    def set_link_nodes(self, link_name, start_node_name, end_node_name):
+        """Reconnect a link in the index to new start and end nodes."""
+        old_start, old_end = self._link_nodes[link_name]
+        if old_start != start_node_name:
+            self._disconnect(old_start, link_name, self._OUTLET)
+            self._connect(start_node_name, link_name, self._OUTLET)
+        if old_end != end_node_name:
+            self._disconnect(old_end, link_name, self._INLET)
+            self._connect(end_node_name, link_name, self._INLET)
+        self._link_nodes[link_name] = (start_node_name, end_node_name)
+        self._arrays = None
+
+    def link_nodes(self, link_name):
+        """Get the (start node name, end node name) of a link."""
+        return self._link_nodes[link_name]
+
+    def links(self, node_name, flag='ALL'):
+        """Get the names of the links connected to a node.
+
+        Parameters
+        ----------
+        node_name : str
+            Name of the node
+        flag : str
+            'ALL', 'INLET' (links ending at the node) or 'OUTLET' (links
+            starting at the node)
+
+        Returns
+        -------
+        list of str
+        """
+        links = self._node_links.get(node_name)
+        if links is None:
+            return []
+        flag = flag.upper()
+        if flag == 'ALL':
+            return list(links)
+        elif flag == 'INLET':
+            return [name for name, flags in links.items() if flags & self._INLET]
+        elif flag == 'OUTLET':
+            return [name for name, flags in links.items() if flags & self._OUTLET]
+        raise ValueError('Unrecognized flag: {0}'.format(flag))
+
+    def degree(self, node_name):
+        """Get the number of links connected to a node."""
+        links = self._node_links.get(node_name)
+        return 0 if links is None else len(links)
+
+    def _build_arrays(self):
+        if self._arrays is None:
+            node_names = list(self._node_links)
+            link_names = list(self._link_nodes)
+            node_index = dict(zip(node_names, range(len(node_names))))
+            link_index = dict(zip(link_names, range(len(link_names))))
+            ends = np.array([(node_index[start], node_index[end]) for start, end
+                             in self._link_nodes.values()], dtype=np.intp).reshape(-1, 2)
+            indptr = np.zeros(len(node_names)+1, dtype=np.intp)
+            indices = []
+            directions = []
+            for i, links in enumerate(self._node_links.values()):
+                for name, flags in links.items():
+                    indices.append(link_index[name])
+                    directions.append((1 if flags & self._INLET else 0) - (1 if flags & self._OUTLET else 0))
+                indptr[i+1] = len(indices)
+            self._arrays = (node_names, link_names, node_index, link_index, ends, indptr,
+                            np.array(indices, dtype=np.intp), np.array(directions, dtype=np.int8))
+        return self._arrays
+
+    def csr(self):
+        """Get the adjacency as CSR-style integer arrays.
+
+        Returns
+        -------
+        node_names : list of str
+            Names of the nodes that have links, in index order
+        link_names : list of str
+            Names of the links, in index order
+        indptr : numpy.ndarray
+            The links of node ``node_names[i]`` are ``indices[indptr[i]:indptr[i+1]]``
+        indices : numpy.ndarray
+            Positions in link_names
+        directions : numpy.ndarray
+            1 if the link ends at the node, -1 if it starts at the node (0 for
+            a link that starts and ends at the same node)
+        """
+        node_names, link_names, node_index, link_index, ends, indptr, indices, directions = self._build_arrays()
+        return list(node_names), list(link_names), indptr.copy(), indices.copy(), directions.copy()
+
+    def incidence_matrix(self, node_names=None, link_names=None):
+        """Get the node-link incidence matrix.
+
+        Entry (i, j) is 1 if link j ends at node i and -1 if it starts at node
+        i, so that the matrix times link flows gives the net inflow at each
+        node.
+
+        Parameters
+        ----------
+        node_names : list of str, optional
+            Row order, default = nodes in index order
+        link_names : list of str, optional
+            Column order, default = links in index order. Links not in the
+            list are left out.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+        """
+        index_nodes, index_links, node_index, link_index, ends, indptr, indices, directions = self._build_arrays()
+        starts = ends[:, 0]
+        finishes = ends[:, 1]
+        num_links = len(index_links)
+        if link_names is None:
+            columns = np.arange(num_links)
+        else:
+            columns = np.full(num_links, -1, dtype=np.intp)
+            positions = np.array([link_index[name] for name in link_names], dtype=np.intp)
+            columns[positions] = np.arange(len(positions))
+        if node_names is None:
+            num_nodes = len(index_nodes)
+        else:
+            num_nodes = len(node_names)
+            position = dict(zip(node_names, range(num_nodes)))
+            rows = np.array([position.get(name, -1) for name in index_nodes], dtype=np.intp)
+            starts = rows[starts]
+            finishes = rows[finishes]
+        num_columns = num_links if link_names is None else len(link_names)
+        start_keep = (columns >= 0) & (starts >= 0)
+        finish_keep = (columns >= 0) & (finishes >= 0)
+        row = np.concatenate([starts[start_keep], finishes[finish_keep]])
+        col = np.concatenate([columns[start_keep], columns[finish_keep]])
+        data = np.concatenate([-np.ones(start_keep.sum()), np.ones(finish_keep.sum())])
+        return scipy.sparse.csr_matrix((data, (row, col)), shape=(num_nodes, num_columns))
+
+
+ChangeRecord = namedtuple('ChangeRecord', ['version', 'action', 'element_type', 'name', 'attribute'])
+
+
+SparseGraph = namedtuple('SparseGraph', ['node_names', 'link_names', 'node_index', 'link_index', 
+                                         'start_nodes', 'end_nodes', 'adjacency', 'incidence'])
+
+
+class ChangeJournal(object):
+    """Bounded journal of the changes made to a water network model.
+
+    Every change is given the next version number and stored as a
+    :class:`ChangeRecord` ``(version, action, element_type, name, attribute)``,
+    where action is 'added', 'replaced', 'removed' or 'modified', and 
+    attribute is the name of the modified attribute (None otherwise). 
+    Nodes, links, patterns, curves, sources and controls are journaled 
+    when added, replaced or removed; attributes of nodes and links are 
+    journaled when they are set while the node or link is in the model.
+    Simulation state written back to the model (head, demand, 
+    leak_demand, flow, and the current link status and setting, which 
+    controls change during a simulation) and model options are not 
+    journaled; changes to initial_status and initial_setting are.
+
+    Only the most recent records are kept. A consumer that stored the
+    version at which it last updated can use :meth:`covers` to check
+    whether the records since then are still available, and recompute 
+    everything if they are not.
+
+    Parameters
+    ----------
+    maxlen : int
+        Maximum number of records kept, default = 10000
+    """
+    def __init__(self, maxlen=10000):
+        self._records = deque(maxlen=maxlen)
+        self._version = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return map(ChangeRecord._make, self._records)
+
+    @property
+    def version(self):
+        """int: The version of the most recent change (0 if there are none)"""
+        return self._version
+
+    @property
+    def maxlen(self):
+        """int: The maximum number of records kept"""
+        return self._records.maxlen
+
+    def record(self, action, element_type, name, attribute=None):
+        """
+        Record a change and return its version.
+
+        Parameters
+        ----------
+        action : str
+            'added', 'replaced', 'removed' or 'modified'
+        element_type : str
+            Type of the changed object, such as 'Junction' or 'Pipe'
+        name : str
+            Name of the changed object
+        attribute : str, optional
+            Name of the modified attribute
+
+        Returns
+        -------
+        int
+        """
+        self._version += 1
+        self._records.append((self._version, action, element_type, name, attribute))
+        return self._version
+
+    def covers(self, since):
+        """
+        Check if all changes made after a version are still in the journal.
+
+        Parameters
+        ----------
+        since : int
+            Version
+
+        Returns
+        -------
+        bool
+        """
+        if since >= self._version:
+            return True
+        return len(self._records) > 0 and self._records[0][0] <= since + 1
+
+    def changes(self, since=0, until=None):
+        """
+        Get the changes made after one version, up to and including another.
+
+        Parameters
+        ----------
+        since : int
+            Version after which changes are returned, default = 0
+        until : int, optional
+            Last version returned, default = the current version
+
+        Returns
+        -------
+        list of :class:`ChangeRecord`
+
+        Raises
+        ------
+        ValueError
+            If changes made after since are no longer in the journal
+        """
+        if until is None or until > self._version:
+            until = self._version
+        if since >= until:
+            return []
+        if not self.covers(since):
+            raise ValueError('changes since version %d are no longer in the journal' % since)
+        first = self._records[0][0]
+        return [ChangeRecord._make(record) for record in 
+                islice(self._records, since + 1 - first, until + 1 - first)]
+
+    def clear(self):
+        """Remove all records; the version is kept"""
+        self._records.clear()
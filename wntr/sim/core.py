@@ -1,6 +1,7 @@
 import wntr.sim.hydraulics
 from wntr.sim.solvers import NewtonSolver, SolverStatus
 import wntr.sim.results
+import wntr.sim.sinks
 from wntr.network.controls import ControlManager, _ControlType
 import numpy as np
 import warnings
@@ -782,7 +783,8 @@ class WNTRSimulator(WaterNetworkSimulator):
 
     def run_sim(self, solver=NewtonSolver, backup_solver=None, solver_options=None,
                 backup_solver_options=None, convergence_error=True, HW_approx='default',
-                diagnostics=False):
+                diagnostics=False, results_dtype=np.float64, sinks=None, report_nodes=None, 
+                report_links=None, report_variables=None):
         """
         Run an extended period simulation (hydraulics only).
 
@@ -813,6 +815,29 @@ class WNTRSimulator(WaterNetworkSimulator):
             see the WNTR documentation on hydraulics for details.
         diagnostics: bool
             If True, then run with diagnostics on
+        results_dtype: numpy dtype
+            Type of the numeric results, for example numpy.float32 to halve 
+            the memory used by the results. Default = numpy.float64
+        sinks: list of wntr.sim.sinks.ResultsSink
+            Objects that receive the results of each report step (for example,
+            to write them to disk or to keep summaries only). Functions are 
+            wrapped in a :class:`~wntr.sim.sinks.CallbackSink`. The node and
+            link results are kept in memory only if a 
+            :class:`~wntr.sim.sinks.MemorySink` is included. 
+            Default = [MemorySink()]
+        report_nodes: list of str, bool, or str
+            Nodes to report, following the NODES option of the EPANET [REPORT]
+            section (see :class:`~wntr.network.options.ResultsOptions`): 'ALL' or 
+            True, 'NONE' or False, or a list of node names. Results are 
+            ordered as in the water network model. Default = 'ALL'
+        report_links: list of str, bool, or str
+            Links to report ('ALL' or True, 'NONE' or False, or a list of link
+            names). Default = 'ALL'
+        report_variables: list of str
+            Variables to report, from 'head', 'demand', 'pressure', 
+            'leak_demand', 'flowrate' (or 'flow'), 'velocity', and 'status'. 
+            Results that are not reported are not gathered. Default = all 
+            variables
         """
         logger.debug('creating hydraulic model')
         self._model, self._model_updater = wntr.sim.hydraulics.create_hydraulic_model(wn=self._wn, mode=self.mode, HW_approx=HW_approx)
@@ -827,7 +852,21 @@ class WNTRSimulator(WaterNetworkSimulator):
 
         self._get_control_managers()
 
-        node_res, link_res = wntr.sim.hydraulics.initialize_results_dict(self._wn)
+        capacity = None
+        if type(self._report_timestep) in (float, int) and self._report_timestep > 0:
+            capacity = int(self._wn.options.time.duration // self._report_timestep) + 1
+        if sinks is None:
+            sinks = [wntr.sim.sinks.MemorySink()]
+        elif callable(sinks) or isinstance(sinks, wntr.sim.sinks.ResultsSink):
+            sinks = [sinks]
+        sinks = [sink if isinstance(sink, wntr.sim.sinks.ResultsSink) else wntr.sim.sinks.CallbackSink(sink) 
+                 for sink in sinks]
+        node_res, link_res = wntr.sim.hydraulics.initialize_results_dict(
+            self._wn, results_dtype, report_nodes=report_nodes, report_links=report_links, 
+            report_variables=report_variables)
+        gatherer = wntr.sim.hydraulics.ResultsGatherer(self._wn, node_res, link_res)
+        for sink in sinks:
+            sink.start(node_res, link_res, capacity)
         results = wntr.sim.results.SimulationResults()
         results.error_code = None
         results.time = []
@@ -926,12 +965,12 @@ class WNTRSimulator(WaterNetworkSimulator):
             resolve = False
             if type(self._report_timestep) == float or type(self._report_timestep) == int:
                 if self._wn.sim_time % self._report_timestep == 0:
-                    wntr.sim.hydraulics.save_results(self._wn, node_res, link_res)
+                    gatherer.save_results(sinks, int(self._wn.sim_time))
                     if len(results.time) > 0 and int(self._wn.sim_time) == results.time[-1]:
                         raise RuntimeError('Simulation already solved this timestep')
                     results.time.append(int(self._wn.sim_time))
             elif self._report_timestep.upper() == 'ALL':
-                wntr.sim.hydraulics.save_results(self._wn, node_res, link_res)
+                gatherer.save_results(sinks, int(self._wn.sim_time))
                 if len(results.time) > 0 and int(self._wn.sim_time) == results.time[-1]:
                     raise RuntimeError('Simulation already solved this timestep')
                 results.time.append(int(self._wn.sim_time))
@@ -944,7 +983,7 @@ class WNTRSimulator(WaterNetworkSimulator):
             if self._wn.sim_time > self._wn.options.time.duration:
                 break
 
-        wntr.sim.hydraulics.get_results(self._wn, results, node_res, link_res)
+        wntr.sim.hydraulics.get_results(self._wn, results, sinks)
         return results
 
     def _initialize_name_id_maps(self):
@@ -0,0 +1,397 @@
+"""
+The wntr.sim.ensemble module includes a class to collect the results of
+many simulations (e.g., Monte Carlo realizations) and reduce them to
+summary statistics as the results are added.
+
+.. rubric:: Contents
+
+.. autosummary::
+
+    EnsembleResults
+
+"""
+import os
+import json
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from wntr.sim.sinks import P2Quantile
+
+
+class EnsembleResults(object):
+    """
+    Results of an ensemble of simulations, reduced on the fly.
+
+    Each added scenario contributes one (time, element) array per
+    variable. The mean, standard deviation, minimum, maximum, quantiles
+    (estimated with :class:`~wntr.sim.sinks.P2Quantile`), and exceedance
+    counts of each variable are updated as scenarios are added, so memory
+    grows with the size of the summaries, not with the number of
+    scenarios. Optionally, the stacked (scenario, time, element) arrays
+    are kept in memory or written to disk.
+
+    Parameters
+    ----------
+    variables : list of strings or dict
+        Variables to collect. Strings name a node or link result (e.g.,
+        'pressure', 'flowrate'). A dictionary maps variable names to
+        functions that compute a DataFrame (index = times, columns =
+        element names) from the SimulationResults of a scenario, for
+        example water service availability; None selects the node or link
+        result of that name.
+    quantiles : list of floats (optional)
+        Quantiles to estimate, between 0 and 1, default = [0.05, 0.5, 0.95]
+    thresholds : dict (optional)
+        Exceedance counts to keep, as a dictionary of lists of
+        (operation, value) tuples keyed by variable name, where operation
+        is a numpy comparison function (e.g.,
+        ``{'pressure': [(np.less, 20)]}``)
+    store : str (optional)
+        None (default) to keep only the summaries, 'memory' to also keep the
+        stacked arrays in memory, or the name of a directory where the
+        stacked arrays are written. The arrays are appended to one file per
+        variable as scenarios are added; the scenarios, times, and element
+        names are written to ``metadata.json`` by :meth:`flush`.
+    dtype : numpy dtype (optional)
+        Type of the stored arrays, default = float64
+    """
+
+    def __init__(self, variables, quantiles=(0.05, 0.5, 0.95), thresholds=None, store=None,
+                 dtype=np.float64):
+        if isinstance(variables, str):
+            variables = [variables]
+        if not isinstance(variables, dict):
+            variables = OrderedDict((name, None) for name in variables)
+        self._functions = OrderedDict(variables)
+        self.quantiles = list(quantiles)
+        self._thresholds = OrderedDict()
+        for name, values in (thresholds or {}).items():
+            if name not in self._functions:
+                raise ValueError('Thresholds of unknown variable ' + str(name))
+            self._thresholds[name] = [tuple(value) for value in values]
+        self._store = store
+        self._dtype = np.dtype(dtype)
+        self.scenarios = []
+        self._times = None
+        self._names = {}
+        self._stats = {}
+        self._arrays = {}
+        self._unflushed = False
+        if store is not None and store != 'memory':
+            os.makedirs(store, exist_ok=True)
+
+    def __len__(self):
+        return len(self.scenarios)
+
+    def __repr__(self):
+        return '<EnsembleResults: {} scenarios, variables={}>'.format(len(self.scenarios),
+                                                                      list(self._functions))
+
+    @property
+    def variables(self):
+        """list of strings: Names of the variables"""
+        return list(self._functions)
+
+    @property
+    def times(self):
+        """numpy.ndarray: Times of the results"""
+        return self._times
+
+    def names(self, variable):
+        """
+        Returns the element names of a variable.
+
+        Parameters
+        ----------
+        variable : str
+            Variable name
+
+        Returns
+        -------
+        list of strings
+        """
+        return list(self._names[variable])
+
+    def _frame(self, results, variable):
+        """DataFrame of one variable of the results of a scenario"""
+        function = self._functions[variable]
+        if function is not None:
+            return function(results)
+        for element_results in (results.node, results.link):
+            if element_results is not None and variable in element_results:
+                return element_results[variable]
+        raise KeyError('The results do not include ' + variable)
+
+    def add(self, results, scenario=None):
+        """
+        Adds the results of a scenario.
+
+        Parameters
+        ----------
+        results : SimulationResults
+            Results of the scenario
+        scenario : str or int (optional)
+            Scenario name, default = the number of scenarios added before
+        """
+        if scenario is None:
+            scenario = len(self.scenarios)
+        if scenario in self.scenarios:
+            raise ValueError('Scenario {} was already added'.format(scenario))
+
+        # Gather and check all variables before changing the summaries
+        values = OrderedDict()
+        times = self._times
+        for variable in self._functions:
+            frame = self._frame(results, variable)
+            if times is None:
+                times = frame.index.values
+            elif not np.array_equal(frame.index.values, times):
+                raise ValueError('The times of scenario {} do not match the ensemble'.format(scenario))
+            if variable in self._names:
+                names = self._names[variable]
+                if len(frame.columns) != len(names) or set(frame.columns) != set(names):
+                    raise ValueError('The {} elements of scenario {} do not match the ensemble'.format(
+                        variable, scenario))
+                if list(frame.columns) != names:
+                    frame = frame.loc[:, names]
+            values[variable] = (frame.columns, np.asarray(frame.values, dtype=np.float64))
+        self._times = times
+
+        self.scenarios.append(scenario)
+        count = len(self.scenarios)
+        with np.errstate(invalid='ignore'):
+            for variable, (columns, x) in values.items():
+                self._add(variable, columns, x, count)
+
+    def _add(self, variable, columns, x, count):
+        if variable not in self._stats:
+            self._start(variable, columns, x.shape)
+        stats = self._stats[variable]
+        delta = x - stats['mean']
+        stats['mean'] += delta/count
+        stats['m2'] += delta*(x - stats['mean'])
+        np.minimum(stats['min'], x, out=stats['min'])
+        np.maximum(stats['max'], x, out=stats['max'])
+        for quantile in stats['quantiles']:
+            quantile.add(x.ravel())
+        for (operation, value), exceedances in zip(self._thresholds.get(variable, []), stats['exceedances']):
+            exceedances += operation(x, value)
+        self._store_array(variable, x)
+
+    def _start(self, variable, columns, shape):
+        self._names[variable] = list(columns)
+        self._stats[variable] = {
+            'mean': np.zeros(shape),
+            'm2': np.zeros(shape),
+            'min': np.full(shape, np.inf),
+            'max': np.full(shape, -np.inf),
+            'quantiles': [P2Quantile(q, shape[0]*shape[1]) for q in self.quantiles],
+            'exceedances': [np.zeros(shape, dtype=np.int64) for threshold in self._thresholds.get(variable, [])]}
+        self._arrays[variable] = []
+
+    def _filename(self, variable):
+        return os.path.join(self._store, 'variable_{:03d}.dat'.format(list(self._functions).index(variable)))
+
+    def _store_array(self, variable, x):
+        if self._store is None:
+            return
+        if self._store == 'memory':
+            self._arrays[variable].append(x.astype(self._dtype))
+            return
+        with open(self._filename(variable), 'ab') as f:
+            x.astype(self._dtype).tofile(f)
+        self._unflushed = True
+
+    def flush(self):
+        """
+        Writes the metadata of the results stored on disk (scenarios, times,
+        and element names) to ``metadata.json``. Call after the last 
+        scenario is added; :meth:`stack` also flushes.
+        """
+        if not self._unflushed:
+            return
+        metadata = {'scenarios': self.scenarios, 'times': self._times.tolist(),
+                    'dtype': self._dtype.str,
+                    'variables': OrderedDict((name, {'file': os.path.basename(self._filename(name)),
+                                                     'names': self._names[name]})
+                                             for name in self._names)}
+        with open(os.path.join(self._store, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+        self._unflushed = False
+
+    def _summary(self, variable, values):
+        return pd.DataFrame(values, index=self._times, columns=self._names[variable])
+
+    def stack(self, variable):
+        """
+        Returns the stacked results of a variable. The results must be
+        stored (see the store parameter).
+
+        Parameters
+        ----------
+        variable : str
+            Variable name
+
+        Returns
+        -------
+        numpy.ndarray
+            Array with shape (scenario, time, element). Results stored on
+            disk are memory-mapped.
+        """
+        if self._store is None:
+            raise ValueError('The ensemble results are not stored')
+        shape = (len(self.scenarios), len(self._times), len(self._names[variable]))
+        if self._store == 'memory':
+            if len(self._arrays[variable]) == 0:
+                return np.zeros(shape, dtype=self._dtype)
+            return np.stack(self._arrays[variable])
+        self.flush()
+        return np.memmap(self._filename(variable), dtype=self._dtype, mode='r', shape=shape)
+
+    def mean(self, variable):
+        """
+        Returns the mean of a variable over the scenarios.
+
+        Parameters
+        ----------
+        variable : str
+            Variable name
+
+        Returns
+        -------
+        pandas DataFrame (index = times, columns = element names)
+        """
+        return self._summary(variable, self._stats[variable]['mean'].copy())
+
+    def std(self, variable):
+        """
+        Returns the sample standard deviation of a variable over the scenarios.
+
+        Parameters
+        ----------
+        variable : str
+            Variable name
+
+        Returns
+        -------
+        pandas DataFrame (index = times, columns = element names)
+        """
+        count = len(self.scenarios)
+        if count < 2:
+            return self._summary(variable, np.full(self._stats[variable]['m2'].shape, np.nan))
+        return self._summary(variable, np.sqrt(self._stats[variable]['m2']/(count - 1)))
+
+    def min(self, variable):
+        """
+        Returns the minimum of a variable over the scenarios.
+
+        Parameters
+        ----------
+        variable : str
+            Variable name
+
+        Returns
+        -------
+        pandas DataFrame (index = times, columns = element names)
+        """
+        return self._summary(variable, self._stats[variable]['min'].copy())
+
+    def max(self, variable):
+        """
+        Returns the maximum of a variable over the scenarios.
+
+        Parameters
+        ----------
+        variable : str
+            Variable name
+
+        Returns
+        -------
+        pandas DataFrame (index = times, columns = element names)
+        """
+        return self._summary(variable, self._stats[variable]['max'].copy())
+
+    def quantile(self, variable, q):
+        """
+        Returns a quantile of a variable over the scenarios.
+
+        Quantiles given when the ensemble was created are estimated with the
+        P-square algorithm; other quantiles are computed exactly from the
+        stored results.
+
+        Parameters
+        ----------
+        variable : str
+            Variable name
+        q : float
+            Quantile, between 0 and 1
+
+        Returns
+        -------
+        pandas DataFrame (index = times, columns = element names)
+        """
+        shape = self._stats[variable]['mean'].shape
+        for quantile in self._stats[variable]['quantiles']:
+            if quantile.q == q:
+                return self._summary(variable, quantile.value.reshape(shape))
+        if self._store is None:
+            raise ValueError('Quantile {} was not estimated and the results are not stored'.format(q))
+        return self._summary(variable, np.percentile(self.stack(variable), 100*q, axis=0))
+
+    def exceedance_probability(self, variable, operation, value):
+        """
+        Returns the fraction of scenarios in which "variable operation value"
+        is True, for example the probability that pressure is below 20 m.
+
+        Thresholds given when the ensemble was created are counted as the
+        scenarios are added; other thresholds are computed from the stored
+        results.
+
+        Parameters
+        ----------
+        variable : str
+            Variable name
+        operation : numpy ufunc
+            Numpy universal comparison function, options = np.greater,
+            np.greater_equal, np.less, np.less_equal, np.equal, np.not_equal
+        value : float
+            Threshold
+
+        Returns
+        -------
+        pandas DataFrame (index = times, columns = element names)
+        """
+        count = max(len(self.scenarios), 1)
+        for threshold, exceedances in zip(self._thresholds.get(variable, []),
+                                          self._stats[variable]['exceedances']):
+            if threshold == (operation, value):
+                return self._summary(variable, exceedances/count)
+        if self._store is None:
+            raise ValueError('The threshold was not counted and the results are not stored')
+        return self._summary(variable, operation(self.stack(variable), value).mean(axis=0))
+
+    def population_impacted(self, pop, variable, operation, value):
+        """
+        Returns the expected population impacted over the scenarios, using
+        comparison operators (see :class:`~wntr.metrics.misc.population_impacted`).
+        For example, this can be used to find the expected population
+        impacted when water service availability < 0.9.
+
+        Parameters
+        ----------
+        pop : pandas Series (index = node names)
+            Population per node
+        variable : str
+            Variable name
+        operation : numpy ufunc
+            Numpy universal comparison function, options = np.greater,
+            np.greater_equal, np.less, np.less_equal, np.equal, np.not_equal
+        value : float
+            Threshold
+
+        Returns
+        -------
+        pandas DataFrame (index = times, columns = node names)
+        """
+        return self.exceedance_probability(variable, operation, value).multiply(pop)
@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 import scipy.sparse as sparse
 import math
+import itertools
 import warnings
 import logging
 from wntr.network.model import WaterNetworkModel
@@ -14,6 +15,7 @@ from wntr.utils.ordered_set import OrderedSet
 from wntr.sim import aml
 from wntr.sim.models import constants, var, param, constraint
 from wntr.sim.models.utils import ModelUpdater
+from wntr.sim.results import ElementResults
 
 logger = logging.getLogger(__name__)
 
@@ -167,118 +169,164 @@ def update_tank_heads(wn):
         tank.head = tank._prev_head + delta_h
 
 
-def initialize_results_dict(wn):
+NODE_RESULTS = ['head', 'demand', 'pressure', 'leak_demand']
+LINK_RESULTS = ['flowrate', 'velocity', 'status']
+_RESULTS_ALIASES = {'flow': 'flowrate'}
+
+
+def _report_names(names, report, element):
+    """Names selected by a report option (None/True/'ALL', False/'NONE', or a list of names)"""
+    if report is None or report is True or (isinstance(report, str) and report.upper() == 'ALL'):
+        return names
+    if report is False or (isinstance(report, str) and report.upper() == 'NONE'):
+        return []
+    if isinstance(report, str):
+        report = [report]
+    report = set(report)
+    unknown = report.difference(names)
+    if len(unknown) > 0:
+        raise ValueError('Unknown {} names in report: {}'.format(element, sorted(unknown)[:10]))
+    return [name for name in names if name in report]
+
+
+def initialize_results_dict(wn, dtype=np.float64, capacity=None, report_nodes=None, report_links=None, 
+                            report_variables=None):
     """
     Parameters
     ----------
     wn: wntr.network.WaterNetworkModel
+    dtype: numpy dtype
+        Type of the numeric results
+    capacity: int
+        Expected number of report times
+    report_nodes: list of str, bool, or str
+        Nodes to report ('ALL' or True, 'NONE' or False, or a list of names)
+    report_links: list of str, bool, or str
+        Links to report
+    report_variables: list of str
+        Variables to report (see NODE_RESULTS and LINK_RESULTS)
 
     Returns
     -------
-    res: dict
+    node_res: wntr.sim.results.ElementResults
+    link_res: wntr.sim.results.ElementResults
     """
-    node_res = OrderedDict()
-    link_res = OrderedDict()
-
-    node_res['head'] = OrderedDict((name, list()) for name, obj in wn.nodes())
-    node_res['demand'] = OrderedDict((name, list()) for name, obj in wn.nodes())
-    node_res['pressure'] = OrderedDict((name, list()) for name, obj in wn.nodes())
-    node_res['leak_demand'] = OrderedDict((name, list()) for name, obj in wn.nodes())
-
-    link_res['flowrate'] = OrderedDict((name, list()) for name, obj in wn.links())
-    link_res['velocity'] = OrderedDict((name, list()) for name, obj in wn.links())
-    link_res['status'] = OrderedDict((name, list()) for name, obj in wn.links())
+    node_names = wn.junction_name_list + wn.tank_name_list + wn.reservoir_name_list
+    link_names = wn.pipe_name_list + wn.head_pump_name_list + wn.power_pump_name_list + wn.valve_name_list
+    node_names = _report_names(node_names, report_nodes, 'node')
+    link_names = _report_names(link_names, report_links, 'link')
+
+    node_variables = NODE_RESULTS
+    link_variables = LINK_RESULTS
+    if report_variables is not None:
+        if isinstance(report_variables, str):
+            report_variables = [report_variables]
+        report_variables = set(_RESULTS_ALIASES.get(key, key) for key in report_variables)
+        unknown = report_variables.difference(NODE_RESULTS + LINK_RESULTS)
+        if len(unknown) > 0:
+            raise ValueError('Unknown report variables: {}'.format(sorted(unknown)))
+        node_variables = [key for key in NODE_RESULTS if key in report_variables]
+        link_variables = [key for key in LINK_RESULTS if key in report_variables]
+
+    node_res = ElementResults(node_names, node_variables, dtype=dtype, capacity=capacity)
+    link_res = ElementResults(link_names, link_variables, ['status'], dtype=dtype, capacity=capacity)
 
     return node_res, link_res
 
 
-def save_results(wn, node_res, link_res):
+class ResultsGatherer(object):
     """
+    Gathers the reported results from the network at each report step.
+
     Parameters
     ----------
     wn: wntr.network.WaterNetworkModel
-    node_res: OrderedDict
-    link_res: OrderedDict
+    node_res: wntr.sim.results.ElementResults
+        Reported nodes and variables, see initialize_results_dict
+    link_res: wntr.sim.results.ElementResults
+        Reported links and variables
     """
-    for name, node in wn.junctions():
-        node_res['head'][name].append(node.head)
-        node_res['demand'][name].append(node.demand)
-        if node._is_isolated:
-            node_res['pressure'][name].append(0.0)
-        else:
-            node_res['pressure'][name].append(node.head - node.elevation)
-        node_res['leak_demand'][name].append(node.leak_demand)
-
-    for name, node in wn.tanks():
-        node_res['head'][name].append(node.head)
-        node_res['demand'][name].append(node.demand)
-        node_res['pressure'][name].append(node.head - node.elevation)
-        node_res['leak_demand'][name].append(node.leak_demand)
-
-    for name, node in wn.reservoirs():
-        node_res['head'][name].append(node.head)
-        node_res['demand'][name].append(node.demand)
-        node_res['pressure'][name].append(0.0)
-        node_res['leak_demand'][name].append(0.0)
-
-    for name, link in wn.pipes():
-        link_res['flowrate'][name].append(link.flow)
-        link_res['velocity'][name].append(abs(link.flow)*4.0 / (math.pi*link.diameter**2))
-        link_res['status'][name].append(link.status)
-
-    for name, link in wn.head_pumps():
-        link_res['flowrate'][name].append(link.flow)
-        link_res['velocity'][name].append(0)
-        link_res['status'][name].append(link.status)
-
-        A, B, C = link.get_head_curve_coefficients()
-        if link.flow > (A/B)**(1.0/C):
-            start_node_name = link.start_node_name
-            end_node_name = link.end_node_name
-            start_node = wn.get_node(start_node_name)
-            end_node = wn.get_node(end_node_name)
-            start_head = start_node.head
-            end_head = end_node.head
-            warnings.warn('Pump ' + name + ' has exceeded its maximum flow.')
-            logger.warning(
-                'Pump {0} has exceeded its maximum flow. Pump head: {1}; Pump flow: {2}; Max pump flow: {3}'.format(
-                    name, end_head - start_head, link.flow, (A/B)**(1.0/C)))
-
-    for name, link in wn.power_pumps():
-        link_res['flowrate'][name].append(link.flow)
-        link_res['velocity'][name].append(0)
-        link_res['status'][name].append(link.status)
-
-    for name, link in wn.valves():
-        link_res['flowrate'][name].append(link.flow)
-        link_res['velocity'][name].append(abs(link.flow)*4.0 / (math.pi*link.diameter**2))
-        link_res['status'][name].append(link.status)
-
-
-def get_results(wn, results, node_res, link_res):
+    def __init__(self, wn, node_res, link_res):
+        self._wn = wn
+        node_names = set(node_res.names)
+        link_names = set(link_res.names)
+        self._junctions = [node for name, node in wn.junctions() if name in node_names]
+        self._tanks = [node for name, node in wn.tanks() if name in node_names]
+        self._reservoirs = [node for name, node in wn.reservoirs() if name in node_names]
+        self._pipes = [link for name, link in wn.pipes() if name in link_names]
+        self._pumps = [link for name, link in itertools.chain(wn.head_pumps(), wn.power_pumps())
+                       if name in link_names]
+        self._valves = [link for name, link in wn.valves() if name in link_names]
+        self._node_variables = list(node_res)
+        self._link_variables = list(link_res)
+
+    def save_results(self, sinks, time):
+        """
+        Passes the reported results of the current time to the sinks.
+
+        Parameters
+        ----------
+        sinks: list of wntr.sim.sinks.ResultsSink
+        time: int
+        """
+        self._check_pumps()
+        node_values = {key: getattr(self, '_node_' + key)() for key in self._node_variables}
+        link_values = {key: getattr(self, '_link_' + key)() for key in self._link_variables}
+        for sink in sinks:
+            sink.add_time(time, node_values, link_values)
+
+    def _check_pumps(self):
+        for name, link in self._wn.head_pumps():
+            A, B, C = link.get_head_curve_coefficients()
+            if link.flow > (A/B)**(1.0/C):
+                start_head = self._wn.get_node(link.start_node_name).head
+                end_head = self._wn.get_node(link.end_node_name).head
+                warnings.warn('Pump ' + name + ' has exceeded its maximum flow.')
+                logger.warning(
+                    'Pump {0} has exceeded its maximum flow. Pump head: {1}; Pump flow: {2}; Max pump flow: {3}'.format(
+                        name, end_head - start_head, link.flow, (A/B)**(1.0/C)))
+
+    def _node_head(self):
+        return np.array([node.head for node in itertools.chain(self._junctions, self._tanks, self._reservoirs)])
+
+    def _node_demand(self):
+        return np.array([node.demand for node in itertools.chain(self._junctions, self._tanks, self._reservoirs)])
+
+    def _node_pressure(self):
+        pressure = [0.0 if node._is_isolated else node.head - node.elevation for node in self._junctions]
+        pressure.extend(node.head - node.elevation for node in self._tanks)
+        pressure.extend(0.0 for node in self._reservoirs)
+        return np.array(pressure)
+
+    def _node_leak_demand(self):
+        leak_demand = [node.leak_demand for node in itertools.chain(self._junctions, self._tanks)]
+        leak_demand.extend(0.0 for node in self._reservoirs)
+        return np.array(leak_demand)
+
+    def _link_flowrate(self):
+        return np.array([link.flow for link in itertools.chain(self._pipes, self._pumps, self._valves)])
+
+    def _link_velocity(self):
+        velocity = [abs(link.flow)*4.0 / (math.pi*link.diameter**2) for link in self._pipes]
+        velocity.extend(0 for link in self._pumps)
+        velocity.extend(abs(link.flow)*4.0 / (math.pi*link.diameter**2) for link in self._valves)
+        return np.array(velocity)
+
+    def _link_status(self):
+        return np.array([link.status for link in itertools.chain(self._pipes, self._pumps, self._valves)],
+                        dtype=np.int8)
+
+
+def get_results(wn, results, sinks):
     """
     Parameters
     ----------
     wn: wntr.network.WaterNetworkModel
     results: wntr.sim.results.SimulationResults
-    node_res: OrderedDict
-    link_res: OrderedDict
+    sinks: list of wntr.sim.sinks.ResultsSink
     """
-    ntimes = len(results.time)
-    nnodes = wn.num_nodes
-    nlinks = wn.num_links
-    node_names = wn.junction_name_list + wn.tank_name_list + wn.reservoir_name_list
-    link_names = wn.pipe_name_list + wn.head_pump_name_list + wn.power_pump_name_list + wn.valve_name_list
-
-    for key, value in node_res.items():
-        node_res[key] = pd.DataFrame(data=np.array([node_res[key][name] for name in node_names]).transpose(), index=results.time,
-                                     columns=node_names)
-    results.node = node_res
-
-    for key, value in link_res.items():
-        link_res[key] = pd.DataFrame(data=np.array([link_res[key][name] for name in link_names]).transpose(), index=results.time,
-                                            columns=link_names)
-    results.link = link_res
+    for sink in sinks:
+        sink.finish(results)
 
 
 def store_results_in_network(wn, m, mode='DD'):
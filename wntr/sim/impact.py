@@ -0,0 +1,316 @@
+"""
+The wntr.sim.impact module runs contaminant injection scenarios on top of a
+single EPANET hydraulic solution and reduces them to an impact matrix.
+"""
+from wntr.sim.core import WaterNetworkSimulator
+from wntr.epanet.util import EN, FlowUnits, MassUnits, QualParam, HydParam, from_si
+import numpy as np
+import pandas as pd
+import multiprocessing
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import wntr.epanet.toolkit
+except ImportError as e:
+    print('{}'.format(e))
+    logger.critical('%s',e)
+    raise ImportError('Error importing epanet toolkit while running epanet simulator. '
+                      'Make sure libepanet is installed and added to path.')
+
+_injection_pattern = 'WNTR_IMPACT_INJECTION'
+
+_source_types = {'CONCEN': EN.CONCEN, 'MASS': EN.MASS,
+                 'SETPOINT': EN.SETPOINT, 'FLOWPACED': EN.FLOWPACED}
+
+
+class ImpactResults(object):
+    """
+    Contamination impact results class.
+
+    Attributes
+    ----------
+    detection_time : pandas DataFrame
+        First report time (s) at which each sensor (columns) detects each
+        scenario (index), NaN if the scenario is not detected
+    impact : pandas DataFrame
+        Cumulative impact at the time of detection (index = scenarios,
+        columns = sensors), the total impact if the scenario is not detected
+    total_impact : pandas Series
+        Impact at the end of the simulation for each scenario
+    metric : str
+        Impact metric, 'MC' (mass consumed, kg) or 'VC' (volume consumed, m3).
+        For 'TRACE' scenarios, 'MC' is the volume consumed weighted by the
+        percent of water from the injection node (m3 %)
+    """
+
+    def __init__(self):
+        self.detection_time = None
+        self.impact = None
+        self.total_impact = None
+        self.metric = None
+
+    def to_long(self):
+        """
+        Returns the detected scenario-sensor pairs in long format.
+
+        Returns
+        -------
+        pandas DataFrame with columns 'Scenario', 'Sensor', 'Impact' and
+        'Detection time', as expected by sensor placement tools such as Chama
+        """
+        detected = self.detection_time.stack()
+        impact = self.impact.stack().loc[detected.index]
+        df = pd.DataFrame({'Scenario': detected.index.get_level_values(0),
+                           'Sensor': detected.index.get_level_values(1),
+                           'Impact': impact.values,
+                           'Detection time': detected.values})
+        return df[['Scenario', 'Sensor', 'Impact', 'Detection time']]
+
+
+def _reduce_scenario(quality, demand, report_step, sensor_col, impact_col,
+                     detection_limit, metric):
+    """Reduce the quality time series of one scenario to detection times and impacts
+
+    'MC' impacts are in kg for chemical quality in kg/m3 and in m3 % for
+    trace quality in percent.
+    """
+    Q = quality[:, impact_col]
+    D = demand[:, impact_col]
+    contaminated = np.greater(Q, detection_limit) & np.greater(D, 0)
+    if metric == 'MC':
+        step_impact = (D*report_step*Q*contaminated).sum(axis=1) # kg, or m3 % for TRACE
+    else:
+        step_impact = (D*report_step*contaminated).sum(axis=1) # m3
+    cum_impact = np.cumsum(step_impact)
+    total = cum_impact[-1]
+
+    detected = np.greater(quality[:, sensor_col], detection_limit)
+    is_detected = detected.any(axis=0)
+    first = detected.argmax(axis=0)
+    det_index = np.where(is_detected, first, -1)
+    impact = np.where(is_detected, cum_impact[first], total)
+    return det_index, impact, total
+
+
+def _clear_background(enData, nnodes, source_index):
+    """Remove initial quality and existing sources so only the injection is simulated"""
+    for idx in range(1, nnodes+1):
+        enData.ENsetnodevalue(idx, EN.INITQUAL, 0.0)
+    for idx in source_index:
+        enData.ENsetnodevalue(idx, EN.SOURCEQUAL, 0.0)
+
+
+def _simulate_scenarios(args):
+    """Run a chunk of injection scenarios in a single EPANET project"""
+    (inpfile, rptfile, hydfile, scenarios, sensors, impact_nodes, source_nodes, quality_type,
+     source_type, strength, start_time, end_time, detection_limit, metric) = args
+
+    enData = wntr.epanet.toolkit.ENepanet()
+    enData.ENopen(inpfile, rptfile, '')
+    enData.ENusehydfile(hydfile)
+
+    flow_units = FlowUnits(enData.ENgetflowunits())
+    nnodes = enData.ENgetcount(EN.NODECOUNT)
+    source_index = [enData.ENgetnodeindex(name) for name in source_nodes]
+    duration = enData.ENgettimeparam(EN.DURATION)
+    report_start = enData.ENgettimeparam(EN.REPORTSTART)
+    report_step = enData.ENgettimeparam(EN.REPORTSTEP)
+    times = np.arange(report_start, duration+1, report_step)
+    ntimes = len(times)
+
+    sensor_index = [enData.ENgetnodeindex(name) for name in sensors]
+    impact_index = [enData.ENgetnodeindex(name) for name in impact_nodes]
+    read_index = sorted(set(sensor_index) | set(impact_index))
+    column = dict((idx, j) for j, idx in enumerate(read_index))
+    sensor_col = np.array([column[idx] for idx in sensor_index], dtype=int)
+    impact_col = np.array([column[idx] for idx in impact_index], dtype=int)
+
+    quality = np.zeros((ntimes, len(read_index)))
+    demand = None
+
+    if quality_type == 'CHEM':
+        enData.ENsetqualtype(EN.CHEM, 'CHEMICAL', 'mg/L', '')
+        _clear_background(enData, nnodes, source_index)
+        if source_type == 'MASS':
+            en_strength = from_si(flow_units, strength, QualParam.SourceMassInject, MassUnits.mg)
+        else:
+            en_strength = from_si(flow_units, strength, QualParam.Concentration, MassUnits.mg)
+        pattern_index = 0
+        if start_time > 0 or end_time is not None:
+            pattern_step = enData.ENgettimeparam(EN.PATTERNSTEP)
+            pattern_start = enData.ENgettimeparam(EN.PATTERNSTART)
+            if end_time is None:
+                end_time = duration + 1
+            period_start = np.arange(int(duration/pattern_step)+2)*pattern_step - pattern_start
+            factors = np.where((period_start >= start_time) & (period_start < end_time), 1.0, 0.0)
+            enData.ENaddpattern(_injection_pattern)
+            pattern_index = enData.ENgetpatternindex(_injection_pattern)
+            enData.ENsetpattern(pattern_index, factors.tolist())
+
+    det_index = np.zeros((len(scenarios), len(sensors)), dtype=int)
+    impact = np.zeros((len(scenarios), len(sensors)))
+    total = np.zeros(len(scenarios))
+
+    for i, inj_node in enumerate(scenarios):
+        node_index = enData.ENgetnodeindex(inj_node)
+        if quality_type == 'CHEM':
+            enData.ENsetnodevalue(node_index, EN.SOURCEQUAL, en_strength)
+            enData.ENsetnodevalue(node_index, EN.SOURCETYPE, _source_types[source_type])
+            enData.ENsetnodevalue(node_index, EN.SOURCEPAT, pattern_index)
+        else:
+            enData.ENsetqualtype(EN.TRACE, '', '', inj_node)
+            _clear_background(enData, nnodes, source_index)
+
+        read_demand = demand is None
+        if read_demand:
+            demand = np.zeros((ntimes, len(read_index)))
+        enData.ENopenQ()
+        enData.ENinitQ(0)
+        k = 0
+        while True:
+            t = enData.ENrunQ()
+            while k < ntimes and t >= times[k]:
+                for j, idx in enumerate(read_index):
+                    quality[k, j] = enData.ENgetnodevalue(idx, EN.QUALITY)
+                    if read_demand:
+                        demand[k, j] = enData.ENgetnodevalue(idx, EN.DEMAND)
+                k += 1
+            tstep = enData.ENnextQ()
+            if tstep <= 0:
+                break
+        enData.ENcloseQ()
+
+        if quality_type == 'CHEM':
+            enData.ENsetnodevalue(node_index, EN.SOURCEQUAL, 0.0)
+            quality_si = QualParam.Concentration._to_si(flow_units, quality, mass_units=MassUnits.mg)
+        else:
+            quality_si = quality
+        if read_demand:
+            demand = HydParam.Demand._to_si(flow_units, demand)
+
+        det_index[i,:], impact[i,:], total[i] = _reduce_scenario(quality_si, demand,
+                report_step, sensor_col, impact_col, detection_limit, metric)
+
+    enData.ENclose()
+    det_time = np.where(det_index >= 0, times[det_index], np.nan)
+    return det_time, impact, total
+
+
+class ContaminationImpactSimulator(WaterNetworkSimulator):
+    """
+    Contamination impact simulator class.
+
+    Hydraulics are solved once with the EPANET toolkit and saved to a
+    hydraulics file. Each injection scenario then only changes the water
+    quality source through toolkit setters and reruns water quality, reading
+    node quality for the sensor and demand nodes at each report time.
+    Initial quality and existing sources in the model are cleared, so the
+    injection is the only source of contaminant.
+    Scenario results are reduced on the fly to detection times and to the
+    cumulative mass (MC) or volume (VC) of contaminant consumed, see
+    :class:`~wntr.metrics.water_security.mass_contaminant_consumed` and
+    :class:`~wntr.metrics.water_security.volume_contaminant_consumed`.
+
+    Parameters
+    ----------
+    wn : WaterNetworkModel
+        Water network model
+
+    """
+    def __init__(self, wn):
+        WaterNetworkSimulator.__init__(self, wn)
+
+    def run_sim(self, scenarios=None, sensors=None, quality_type='CHEM',
+                source_type='SETPOINT', strength=1.0, start_time=0, end_time=None,
+                detection_limit=0, metric='MC', processes=1, file_prefix='temp'):
+        """
+        Run the injection scenarios and compute the impact matrix.
+
+        Parameters
+        ----------
+        scenarios : list of str
+            Injection node names, defaults to all junctions
+        sensors : list of str
+            Candidate sensor node names, defaults to all junctions
+        quality_type : str
+            'CHEM' for contaminant injection or 'TRACE' for source tracing
+            from the injection node
+        source_type : str
+            Source type for 'CHEM' injections, 'CONCEN', 'MASS', 'SETPOINT'
+            or 'FLOWPACED'
+        strength : float
+            Source strength in SI units, kg/m3 (kg/s for 'MASS' sources)
+        start_time : int
+            Injection start time (s), rounded to the pattern timestep
+        end_time : int
+            Injection end time (s), defaults to the end of the simulation
+        detection_limit : float
+            Contaminant detection limit (kg/m3, or % for 'TRACE')
+        metric : str
+            Impact metric, 'MC' (mass consumed, kg) or 'VC' (volume consumed,
+            m3).  With 'TRACE', 'MC' is in m3 % (volume consumed times the
+            percent of water from the injection node)
+        processes : int
+            Number of worker processes, 1 runs the scenarios in this process
+        file_prefix : str
+            Default prefix is "temp". The .inp, .hyd and .rpt files use this prefix
+
+        Returns
+        -------
+        ImpactResults
+        """
+        quality_type = quality_type.upper()
+        source_type = source_type.upper()
+        metric = metric.upper()
+        if quality_type not in ['CHEM', 'TRACE']:
+            raise ValueError('quality_type must be CHEM or TRACE')
+        if source_type not in _source_types:
+            raise ValueError('source_type must be one of ' + ', '.join(_source_types))
+        if metric not in ['MC', 'VC']:
+            raise ValueError('metric must be MC or VC')
+        if scenarios is None:
+            scenarios = self._wn.junction_name_list
+        if sensors is None:
+            sensors = self._wn.junction_name_list
+        scenarios = list(scenarios)
+        sensors = list(sensors)
+        impact_nodes = self._wn.junction_name_list
+        source_nodes = list(set(source.node_name for name, source in self._wn.sources()))
+
+        inpfile = file_prefix + '.inp'
+        hydfile = file_prefix + '.hyd'
+        self._wn.write_inpfile(inpfile, units=self._wn.options.hydraulic.en2_units)
+        enData = wntr.epanet.toolkit.ENepanet()
+        enData.ENopen(inpfile, file_prefix + '.rpt', '')
+        enData.ENsolveH()
+        enData.ENsavehydfile(hydfile)
+        enData.ENclose()
+        logger.debug('Solved hydraulics')
+
+        processes = max(1, min(processes, len(scenarios)))
+        chunks = [list(chunk) for chunk in np.array_split(np.array(scenarios, dtype=object), processes)]
+        args = [(inpfile, file_prefix + '_%d.rpt' % i, hydfile, chunk, sensors,
+                 impact_nodes, source_nodes, quality_type, source_type, strength, start_time,
+                 end_time, detection_limit, metric) for i, chunk in enumerate(chunks)]
+        if processes == 1:
+            output = [_simulate_scenarios(arg) for arg in args]
+        else:
+            pool = multiprocessing.Pool(processes)
+            try:
+                output = pool.map(_simulate_scenarios, args)
+            finally:
+                pool.close()
+                pool.join()
+        logger.debug('Solved %d quality scenarios', len(scenarios))
+
+        results = ImpactResults()
+        results.metric = metric
+        results.detection_time = pd.DataFrame(np.vstack([out[0] for out in output]),
+                                              index=scenarios, columns=sensors)
+        results.impact = pd.DataFrame(np.vstack([out[1] for out in output]),
+                                      index=scenarios, columns=sensors)
+        results.total_impact = pd.Series(np.concatenate([out[2] for out in output]),
+                                         index=scenarios)
+        return results
@@ -1,5 +1,27 @@
+"""
+The wntr.sim.results module includes classes to store simulation results.
+
+.. rubric:: Contents
+
+.. autosummary::
+
+    ResultsStatus
+    SimulationResults
+    ElementResults
+
+"""
 import datetime
 import enum
+import json
+import os
+import platform
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+import numpy as np
+import pandas as pd
 
 
 class ResultsStatus(enum.IntEnum):
@@ -10,6 +32,23 @@ class ResultsStatus(enum.IntEnum):
 class SimulationResults(object):
     """
     Water network simulation results class.
+
+    Attributes
+    ----------
+    timestamp : str
+        Time when the results were created
+    network_name : str
+        Name of the water network model
+    node : dict of pandas DataFrames or ElementResults
+        Node results, keyed by result attribute (e.g., 'pressure'). The
+        simulators store node results in an
+        :class:`~wntr.sim.results.ElementResults` object, which behaves
+        like a dictionary of DataFrames.
+    link : dict of pandas DataFrames or ElementResults
+        Link results, keyed by result attribute (e.g., 'flowrate')
+    provenance : dict
+        Information about how the results were created (units, software
+        versions, and any user supplied entries), stored by :meth:`save`
     """
 
     def __init__(self):
@@ -19,3 +58,670 @@ class SimulationResults(object):
         self.network_name = None
         self.link = None
         self.node = None
+        self.provenance = {}
+
+    def save(self, path, chunk_size=None, compress=False, provenance=None):
+        """
+        Saves the results to a directory of NumPy files.
+
+        The directory contains a ``metadata.json`` file (network name,
+        timestamp, units, provenance, element names and variables) and one
+        subdirectory for the node results and one for the link results.
+        The results of each subdirectory are split by time into chunks, each
+        stored as an array with shape (variable, time, element). 
+        Uncompressed chunks are ``.npy`` files that :meth:`load` memory-maps;
+        compressed chunks are ``.npz`` files.
+
+        Parameters
+        ----------
+        path : str
+            Name of the directory, which is created if it does not exist
+        chunk_size : int (optional)
+            Number of times per chunk, default = all times in one chunk
+        compress : bool (optional)
+            If True, the chunks are compressed, default = False
+        provenance : dict (optional)
+            Additional JSON serializable entries to record with the results
+            (e.g., scenario name, model version)
+        """
+        os.makedirs(path, exist_ok=True)
+        metadata = self._metadata(compress, provenance)
+        for group, element_results in self._element_results().items():
+            if element_results is None:
+                continue
+            metadata['groups'][group] = element_results._save(
+                os.path.join(path, group), chunk_size, compress)
+        _write_metadata(path, metadata)
+
+    def _element_results(self):
+        """Node and link results as ElementResults, keyed by group"""
+        groups = {}
+        for group in _GROUPS:
+            element_results = getattr(self, group)
+            if element_results is not None and not isinstance(element_results, ElementResults):
+                element_results = ElementResults.from_frames(element_results)
+            groups[group] = element_results
+        return groups
+
+    def reserve(self, num_times):
+        """
+        Allocates memory for node and link results at a number of times,
+        for example before appending the results of a known number of
+        simulation chunks.
+
+        Parameters
+        ----------
+        num_times : int
+            Total number of times
+        """
+        for group, element_results in self._element_results().items():
+            if element_results is not None:
+                element_results.reserve(num_times)
+                setattr(self, group, element_results)
+
+    def append(self, other):
+        """
+        Appends the results of a later simulation (e.g., a simulation 
+        restarted from the last time of these results), in place.
+
+        The node and link results are copied into the arrays of these
+        results (see :meth:`ElementResults.append`). Node and link results
+        must include the same elements and variables; otherwise a ValueError
+        is raised and the results are not changed.
+
+        Parameters
+        ----------
+        other : SimulationResults
+            Results to append
+        """
+        groups = self._element_results()
+        other_groups = other._element_results()
+        for group in _GROUPS:
+            if (groups[group] is None) != (other_groups[group] is None):
+                raise ValueError('Only one of the results includes {} results'.format(group))
+            if groups[group] is not None:
+                groups[group]._check_append(other_groups[group])
+        for group in _GROUPS:
+            if groups[group] is not None:
+                groups[group].append(other_groups[group])
+                setattr(self, group, groups[group])
+
+    def slice(self, start_time=None, end_time=None):
+        """
+        Returns the results of a time window. The node and link results 
+        share memory with these results.
+
+        Parameters
+        ----------
+        start_time : int (optional)
+            First time (s) to include, default = the first time
+        end_time : int (optional)
+            Last time (s) to include, default = the last time
+
+        Returns
+        -------
+        SimulationResults
+        """
+        results = SimulationResults()
+        results.timestamp = self.timestamp
+        results.network_name = self.network_name
+        results.provenance = dict(self.provenance)
+        for group, element_results in self._element_results().items():
+            if element_results is not None:
+                setattr(results, group, element_results.slice(start_time, end_time))
+        return results
+
+    def _metadata(self, compress, provenance):
+        """Metadata of the saved results, without the element groups"""
+        info = dict(self.provenance)
+        if provenance is not None:
+            info.update(provenance)
+        info.setdefault('units', 'SI')
+        info['saved'] = str(datetime.datetime.now())
+        info['wntr_version'] = _wntr_version()
+        info['numpy_version'] = np.__version__
+        info['pandas_version'] = pd.__version__
+        info['python_version'] = platform.python_version()
+        return {'format': _FORMAT, 'version': _FORMAT_VERSION,
+                'timestamp': self.timestamp,
+                'network_name': _network_name(self.network_name),
+                'compressed': bool(compress),
+                'provenance': info,
+                'groups': {}}
+
+    @classmethod
+    def load(cls, path, variables=None, elements=None, time=None, mmap=True):
+        """
+        Loads results saved with :meth:`save`.
+
+        Only the chunks that overlap the selected times are opened, and only
+        the selected variables and elements are read from them. When all 
+        variables and elements of one uncompressed chunk are selected, 
+        the results are memory-mapped (copy-on-write) instead of read.
+
+        Parameters
+        ----------
+        path : str
+            Name of the directory
+        variables : list of strings (optional)
+            Variables to load (e.g., ['pressure', 'flowrate']), 
+            default = all variables
+        elements : list of strings or dict (optional)
+            Names of the nodes and links to load, or a dictionary of names
+            keyed by 'node' and 'link', default = all elements
+        time : tuple (optional)
+            First and last time (s) to load, default = all times
+        mmap : bool (optional)
+            If True (default), uncompressed chunks are memory-mapped
+
+        Returns
+        -------
+        SimulationResults
+        """
+        with open(os.path.join(path, _METADATA), 'r') as f:
+            metadata = json.load(f)
+        if metadata.get('format') != _FORMAT:
+            raise ValueError('{} does not contain WNTR simulation results'.format(path))
+        if metadata['version'] > _FORMAT_VERSION:
+            raise ValueError('Results format version {} is not supported'.format(metadata['version']))
+
+        results = cls()
+        results.timestamp = metadata['timestamp']
+        results.network_name = metadata['network_name']
+        results.provenance = metadata['provenance']
+        for group, group_metadata in metadata['groups'].items():
+            names = elements.get(group) if isinstance(elements, dict) else elements
+            setattr(results, group, ElementResults._load(
+                os.path.join(path, group), group_metadata, metadata['compressed'], 
+                variables, names, time, mmap))
+        return results
+
+
+_FORMAT = 'wntr-results'
+_FORMAT_VERSION = 1
+_METADATA = 'metadata.json'
+_GROUPS = ('node', 'link')
+
+
+def _write_metadata(path, metadata):
+    with open(os.path.join(path, _METADATA), 'w') as f:
+        json.dump(metadata, f, indent=1)
+
+
+def _write_chunk(directory, index, data, codes, compress):
+    """Write one chunk of (variable, time, element) arrays and return its name"""
+    name = 'chunk_{:05d}'.format(index)
+    if compress:
+        np.savez_compressed(os.path.join(directory, name + '.npz'), data=data, codes=codes)
+    else:
+        np.save(os.path.join(directory, name + '.npy'), data)
+        np.save(os.path.join(directory, name + '_codes.npy'), codes)
+    return name
+
+
+def _network_name(name):
+    """Network name as a string (the EPANET binary file stores it as bytes)"""
+    if isinstance(name, np.ndarray):
+        name = name.tobytes()
+    if isinstance(name, bytes):
+        name = name.rstrip(b'\x00').decode('utf-8', 'replace')
+    return name
+
+
+def _wntr_version():
+    try:
+        from wntr import __version__
+    except ImportError:
+        return None
+    return __version__
+
+
+class ElementResults(MutableMapping):
+    """
+    Results of one class of elements (nodes or links).
+
+    Numeric results are stored in one contiguous array with shape
+    (variable, time, element) and categorical results, such as link status,
+    in an int8 array of codes with the same layout. The results behave like
+    a dictionary of pandas DataFrames keyed by variable; each DataFrame
+    (index = times, columns = element names) is built on first access as a
+    view of the array, so changes to a DataFrame change the stored results.
+    DataFrames assigned to a variable are stored as they are.
+
+    Parameters
+    ----------
+    names : list of strings
+        Element names
+    variables : list of strings
+        Names of the variables
+    categorical : list of strings (optional)
+        Names of the variables that are categorical, stored as int8 codes
+    times : array-like (optional)
+        Times of the results, in seconds. Results of additional times can be
+        added with :meth:`add_time`.
+    dtype : numpy dtype (optional)
+        Type of the numeric results, for example float32 to halve memory
+        use, default = float64
+    capacity : int (optional)
+        Number of times to allocate memory for, default = len(times)
+    """
+
+    def __init__(self, names, variables, categorical=(), times=None, dtype=np.float64, capacity=None):
+        if times is None:
+            times = np.zeros(0, dtype=np.int64)
+        times = np.asarray(times)
+        self._names = list(names)
+        self._keys = list(variables)
+        self._variables = [key for key in self._keys if key not in categorical]
+        self._categorical = [key for key in self._keys if key in categorical]
+        self._length = len(times)
+        if capacity is None or capacity < self._length:
+            capacity = self._length
+        self._times = np.zeros(capacity, dtype=times.dtype)
+        self._times[:self._length] = times
+        self._data = np.zeros((len(self._variables), capacity, len(self._names)), dtype=dtype)
+        self._codes = np.zeros((len(self._categorical), capacity, len(self._names)), dtype=np.int8)
+        self._assigned = {}
+        self._frames = {}
+        self._index = None
+        self._columns = pd.Index(self._names, name=getattr(names, 'name', None))
+
+    @classmethod
+    def from_frames(cls, frames, categorical=('status',), dtype=None):
+        """
+        Creates element results from a dictionary of DataFrames.
+
+        The times and element names are taken from the first DataFrame; the 
+        other DataFrames are aligned to them.
+
+        Parameters
+        ----------
+        frames : dict of pandas DataFrames
+            Results keyed by variable name
+        categorical : list of strings (optional)
+            Names of the variables that are categorical, default = ['status']
+        dtype : numpy dtype (optional)
+            Type of the numeric results, default = the common type of the 
+            DataFrames
+
+        Returns
+        -------
+        ElementResults
+        """
+        keys = list(frames)
+        categorical = [key for key in keys if key in categorical]
+        if len(keys) == 0:
+            return cls([], [])
+        first = frames[keys[0]]
+        if dtype is None:
+            dtypes = [dt for key in keys if key not in categorical for dt in frames[key].dtypes]
+            dtype = np.result_type(*dtypes) if dtypes else np.float64
+        results = cls(first.columns, keys, categorical, times=first.index.values, dtype=dtype)
+        for key in keys:
+            results.array(key)[:] = frames[key].reindex(index=first.index, columns=first.columns).values
+        return results
+
+    @classmethod
+    def _from_arrays(cls, names, keys, categorical, times, data, codes):
+        """Create element results that use the given arrays"""
+        results = cls(names, keys, categorical, dtype=data.dtype)
+        results._times = times
+        results._data = data
+        results._codes = codes
+        results._length = len(times)
+        return results
+
+    def _empty(self, capacity=None):
+        """Create empty element results with the same elements and variables"""
+        return ElementResults(self._columns, self._keys, self._categorical, dtype=self._data.dtype, 
+                              capacity=capacity)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_frames'] = {}
+        state['_index'] = None
+        return state
+
+    def __getitem__(self, key):
+        frame = self._assigned.get(key)
+        if frame is None:
+            frame = self._frames.get(key)
+        if frame is None:
+            frame = pd.DataFrame(self.array(key), index=self.index, columns=self._columns, copy=False)
+            self._frames[key] = frame
+        return frame
+
+    def __setitem__(self, key, frame):
+        if key not in self._keys:
+            self._keys.append(key)
+        self._assigned[key] = frame
+
+    def __delitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        self._keys.remove(key)
+        self._assigned.pop(key, None)
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return '<ElementResults: {} times, {} elements, variables={}>'.format(
+            self._length, len(self._names), self._keys)
+
+    @property
+    def names(self):
+        """list of strings: Element names"""
+        return list(self._names)
+
+    @property
+    def times(self):
+        """numpy.ndarray: Times of the results (read-only view)"""
+        times = self._times[:self._length]
+        times.flags.writeable = False
+        return times
+
+    @property
+    def index(self):
+        """pandas Index: Times of the results, used as the DataFrame index"""
+        if self._index is None:
+            self._index = pd.Index(self._times[:self._length])
+        return self._index
+
+    @property
+    def dtype(self):
+        """numpy dtype: Type of the numeric results"""
+        return self._data.dtype
+
+    @property
+    def nbytes(self):
+        """int: Memory used by the stored results, in bytes"""
+        return self._data.nbytes + self._codes.nbytes + self._times.nbytes
+
+    def array(self, key):
+        """
+        Returns the results of one variable as an array.
+
+        Parameters
+        ----------
+        key : str
+            Variable name
+
+        Returns
+        -------
+        numpy.ndarray
+            Array with shape (time, element), which is a view of the stored
+            results (a copy of the values for assigned DataFrames)
+        """
+        if key not in self._keys:
+            raise KeyError(key)
+        if key in self._assigned:
+            return self._assigned[key].values
+        if key in self._variables:
+            return self._data[self._variables.index(key), :self._length]
+        return self._codes[self._categorical.index(key), :self._length]
+
+    def reserve(self, capacity):
+        """
+        Allocates memory for results at a number of times, so that times can
+        be added up to that number without copying the results.
+
+        Parameters
+        ----------
+        capacity : int
+            Total number of times
+        """
+        if capacity <= len(self._times):
+            return
+        times = np.zeros(capacity, dtype=self._times.dtype)
+        times[:self._length] = self._times[:self._length]
+        data = np.zeros((self._data.shape[0], capacity, self._data.shape[2]), dtype=self._data.dtype)
+        data[:, :self._length] = self._data[:, :self._length]
+        codes = np.zeros((self._codes.shape[0], capacity, self._codes.shape[2]), dtype=np.int8)
+        codes[:, :self._length] = self._codes[:, :self._length]
+        self._times, self._data, self._codes = times, data, codes
+
+    def add_time(self, time, values):
+        """
+        Adds the results of one time.
+
+        Parameters
+        ----------
+        time : int
+            Time, in seconds
+        values : dict
+            Values of each variable (array-like over the elements), keyed
+            by variable name; variables that are not given are set to 0
+        """
+        if self._length == len(self._times):
+            self.reserve(max(2*self._length, 1))
+        i = self._length
+        self._times[i] = time
+        for j, key in enumerate(self._variables):
+            if key in values:
+                self._data[j, i] = values[key]
+        for j, key in enumerate(self._categorical):
+            if key in values:
+                self._codes[j, i] = values[key]
+        self._length += 1
+        self._frames = {}
+        self._index = None
+
+    def compact(self):
+        """Releases the memory allocated for times that were not added"""
+        if self._length < len(self._times):
+            self._times = self._times[:self._length].copy()
+            self._data = self._data[:, :self._length].copy()
+            self._codes = self._codes[:, :self._length].copy()
+            self._frames = {}
+
+    def _check_append(self, other):
+        """Raise an error if other cannot be appended to these results"""
+        if set(other._names) != set(self._names):
+            raise ValueError('The element names of the results do not match')
+        if set(other._keys) != set(self._keys):
+            raise ValueError('The variables of the results do not match: {} and {}'.format(
+                self._keys, other._keys))
+        if self._length > 0 and other._length > 0 and other._times[0] < self._times[self._length-1]:
+            raise ValueError('The results to append start at time {}, before the last time {}'.format(
+                other._times[0], self._times[self._length-1]))
+
+    def append(self, other):
+        """
+        Appends results of later times, in place.
+
+        The results must have the same elements (in any order) and variables.
+        If the first time of other equals the last time of these results (as 
+        in a simulation restarted from the last time), that time is not 
+        appended again. Memory grows geometrically; use :meth:`reserve` 
+        when the total number of times is known.
+
+        Parameters
+        ----------
+        other : ElementResults
+            Results to append
+        """
+        self._check_append(other)
+        start = 0
+        if self._length > 0 and other._length > 0 and other._times[0] == self._times[self._length-1]:
+            start = 1
+        count = other._length - start
+        if count <= 0:
+            return
+        if other._names == self._names:
+            columns = slice(None)
+        else:
+            position = dict(zip(other._names, range(len(other._names))))
+            columns = np.array([position[name] for name in self._names], dtype=np.intp)
+        if self._length + count > len(self._times):
+            self.reserve(max(self._length + count, 2*len(self._times)))
+
+        rows = slice(self._length, self._length + count)
+        self._times[rows] = other._times[start:other._length]
+        for j, key in enumerate(self._variables):
+            if key in self._keys and key not in self._assigned:
+                self._data[j, rows] = other._frame_values(key)[start:, columns]
+        for j, key in enumerate(self._categorical):
+            if key in self._keys and key not in self._assigned:
+                self._codes[j, rows] = other._frame_values(key)[start:, columns]
+        for key, frame in self._assigned.items():
+            values = pd.DataFrame(other._frame_values(key)[start:, columns], 
+                                  index=other.index[start:], columns=self._columns)
+            self._assigned[key] = pd.concat([frame, values])
+        self._length += count
+        self._frames = {}
+        self._index = None
+
+    def slice(self, start_time=None, end_time=None, names=None):
+        """
+        Returns the results of a time window and a subset of elements.
+
+        A time window of all elements shares memory with these results;
+        selecting elements copies the selected values.
+
+        Parameters
+        ----------
+        start_time : int (optional)
+            First time (s) to include, default = the first time
+        end_time : int (optional)
+            Last time (s) to include, default = the last time
+        names : list of strings (optional)
+            Element names to include, default = all elements
+
+        Returns
+        -------
+        ElementResults
+        """
+        times = self._times[:self._length]
+        start = 0 if start_time is None else np.searchsorted(times, start_time, side='left')
+        stop = self._length if end_time is None else np.searchsorted(times, end_time, side='right')
+        data = self._data[:, start:stop]
+        codes = self._codes[:, start:stop]
+        if names is None:
+            names = self._columns
+        else:
+            names = pd.Index(list(names), name=self._columns.name)
+            position = dict(zip(self._names, range(len(self._names))))
+            columns = np.array([position[name] for name in names], dtype=np.intp)
+            data = data[:, :, columns]
+            codes = codes[:, :, columns]
+        results = ElementResults._from_arrays(names, self._variables + self._categorical, 
+                                              self._categorical, times[start:stop], data, codes)
+        results._keys = list(self._keys)
+        for key, frame in self._assigned.items():
+            results._assigned[key] = frame.loc[results.index, names]
+        return results
+
+    def _save(self, directory, chunk_size, compress):
+        """Write the results to a directory and return their metadata"""
+        os.makedirs(directory, exist_ok=True)
+        # DataFrames assigned by the user are stored as numeric variables
+        numeric = [key for key in self._keys if key not in self._categorical or key in self._assigned]
+        categorical = [key for key in self._categorical if key in self._keys and key not in self._assigned]
+        if numeric == self._variables and not any(key in self._assigned for key in numeric):
+            data = self._data
+        elif len(numeric) == 0:
+            data = np.zeros((0, self._length, len(self._names)), dtype=self._data.dtype)
+        else:
+            data = np.stack([self._frame_values(key) for key in numeric]).astype(self._data.dtype, copy=False)
+        if categorical == self._categorical:
+            codes = self._codes
+        else:
+            codes = self._codes[[self._categorical.index(key) for key in categorical]]
+        np.save(os.path.join(directory, 'times.npy'), self._times[:self._length])
+
+        if chunk_size is None or chunk_size < 1:
+            chunk_size = max(self._length, 1)
+        chunks = []
+        for start in range(0, max(self._length, 1), chunk_size):
+            stop = min(start + chunk_size, self._length)
+            name = _write_chunk(directory, len(chunks), data[:, start:stop], codes[:, start:stop], compress)
+            chunks.append([start, stop, name])
+        return self._group_metadata(chunks, categorical)
+
+    def _group_metadata(self, chunks, categorical=None):
+        """Metadata of saved element results"""
+        if categorical is None:
+            categorical = self._categorical
+        return {'names': list(self._names),
+                'names_label': self._columns.name,
+                'variables': list(self._keys),
+                'categorical': list(categorical),
+                'dtype': np.dtype(self._data.dtype).str,
+                'chunks': chunks}
+
+    def _frame_values(self, key):
+        """Values of one variable aligned to the stored times and elements"""
+        if key in self._assigned:
+            return self._assigned[key].reindex(index=self.index, columns=self._columns).values
+        return self.array(key)
+
+    @classmethod
+    def _load(cls, directory, metadata, compressed, variables, names, time, mmap):
+        """Read the selected results from a directory written by _save"""
+        mmap_mode = 'c' if mmap and not compressed else None
+        all_names = metadata['names']
+        categorical = metadata['categorical']
+        numeric = [key for key in metadata['variables'] if key not in categorical]
+        if variables is None:
+            keys = list(metadata['variables'])
+        else:
+            keys = [key for key in metadata['variables'] if key in variables]
+        numeric_index = [numeric.index(key) for key in keys if key not in categorical]
+        codes_index = [categorical.index(key) for key in keys if key in categorical]
+
+        times = np.load(os.path.join(directory, 'times.npy'))
+        start, stop = 0, len(times)
+        if time is not None:
+            if np.isscalar(time):
+                time = (time, time)
+            start = np.searchsorted(times, time[0], side='left')
+            stop = np.searchsorted(times, time[1], side='right')
+        times = times[start:stop]
+
+        if names is None:
+            names = all_names
+            columns = None
+        else:
+            position = dict(zip(all_names, range(len(all_names))))
+            names = [name for name in names if name in position]
+            columns = np.array([position[name] for name in names], dtype=np.intp)
+        names = pd.Index(names, name=metadata.get('names_label'))
+
+        chunks = [chunk for chunk in metadata['chunks'] if chunk[0] < stop and chunk[1] > start]
+        dtype = np.dtype(metadata['dtype'])
+        whole = (columns is None and len(numeric_index) == len(numeric) 
+                 and len(codes_index) == len(categorical))
+        if mmap_mode is not None and whole and len(chunks) == 1:
+            data, codes = cls._read_chunk(directory, chunks[0][2], compressed, mmap_mode)
+            offset = chunks[0][0]
+            return cls._from_arrays(names, keys, categorical, times, 
+                                    data[:, start-offset:stop-offset], 
+                                    codes[:, start-offset:stop-offset])
+
+        data = np.zeros((len(numeric_index), len(times), len(names)), dtype=dtype)
+        codes = np.zeros((len(codes_index), len(times), len(names)), dtype=np.int8)
+        if columns is None:
+            columns = np.arange(len(all_names))
+        for chunk_start, chunk_stop, chunk_name in chunks:
+            chunk_data, chunk_codes = cls._read_chunk(directory, chunk_name, compressed, mmap_mode)
+            first = max(start, chunk_start)
+            last = min(stop, chunk_stop)
+            rows = np.arange(first - chunk_start, last - chunk_start)
+            target = slice(first - start, last - start)
+            data[:, target] = chunk_data[np.ix_(numeric_index, rows, columns)]
+            codes[:, target] = chunk_codes[np.ix_(codes_index, rows, columns)]
+        return cls._from_arrays(names, keys, [key for key in keys if key in categorical], 
+                                times, data, codes)
+
+    @staticmethod
+    def _read_chunk(directory, name, compressed, mmap_mode):
+        """Open the arrays of one chunk"""
+        if compressed:
+            with np.load(os.path.join(directory, name + '.npz')) as arrays:
+                return arrays['data'], arrays['codes']
+        return (np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode),
+                np.load(os.path.join(directory, name + '_codes.npy'), mmap_mode=mmap_mode))
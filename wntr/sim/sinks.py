@@ -0,0 +1,329 @@
+"""
+The wntr.sim.sinks module includes classes that receive the results of the
+WNTRSimulator at each report step.
+
+.. rubric:: Contents
+
+.. autosummary::
+
+    ResultsSink
+    MemorySink
+    DiskSink
+    SummarySink
+    CallbackSink
+    P2Quantile
+
+"""
+import os
+import numpy as np
+import pandas as pd
+
+from wntr.sim.results import _write_chunk, _write_metadata
+
+
+class ResultsSink(object):
+    """
+    Base class of the objects that receive simulation results.
+
+    The WNTRSimulator calls :meth:`start` before the simulation,
+    :meth:`add_time` at each report step, and :meth:`finish` after the
+    simulation.
+    """
+
+    def start(self, node, link, num_times=None):
+        """
+        Called before the simulation.
+
+        Parameters
+        ----------
+        node : ElementResults
+            Empty node results, which define the node names, variables, and
+            the type of the numeric results
+        link : ElementResults
+            Empty link results
+        num_times : int (optional)
+            Expected number of report steps, if known
+        """
+        pass
+
+    def add_time(self, time, node, link):
+        """
+        Called at each report step.
+
+        Parameters
+        ----------
+        time : int
+            Simulation time, in seconds
+        node : dict of numpy arrays
+            Node results keyed by variable, in the order of the node names
+        link : dict of numpy arrays
+            Link results keyed by variable, in the order of the link names
+        """
+        raise NotImplementedError
+
+    def finish(self, results):
+        """
+        Called after the simulation.
+
+        Parameters
+        ----------
+        results : SimulationResults
+            Results returned by the simulator
+        """
+        pass
+
+
+class MemorySink(ResultsSink):
+    """
+    Keeps all results in memory and stores them in the node and link
+    results returned by the simulator. This is the default sink.
+    """
+
+    def __init__(self):
+        self.node = None
+        self.link = None
+
+    def start(self, node, link, num_times=None):
+        self.node = node._empty(num_times)
+        self.link = link._empty(num_times)
+
+    def add_time(self, time, node, link):
+        self.node.add_time(time, node)
+        self.link.add_time(time, link)
+
+    def finish(self, results):
+        self.node.compact()
+        self.link.compact()
+        results.node = self.node
+        results.link = self.link
+
+
+class DiskSink(ResultsSink):
+    """
+    Writes the results to disk in chunks of report steps, in the format of
+    :meth:`~wntr.sim.results.SimulationResults.save`. Only one chunk is
+    kept in memory. The results can be loaded with
+    :meth:`~wntr.sim.results.SimulationResults.load`.
+
+    Parameters
+    ----------
+    path : str
+        Name of the directory, which is created if it does not exist
+    chunk_size : int (optional)
+        Number of report steps per chunk, default = 100
+    compress : bool (optional)
+        If True, the chunks are compressed, default = False
+    provenance : dict (optional)
+        Additional JSON serializable entries to record with the results
+    """
+
+    def __init__(self, path, chunk_size=100, compress=False, provenance=None):
+        self.path = path
+        self.chunk_size = max(int(chunk_size), 1)
+        self.compress = compress
+        self.provenance = provenance
+        self._buffers = {}
+        self._chunks = {}
+        self._times = []
+
+    def start(self, node, link, num_times=None):
+        self._buffers = {}
+        self._chunks = {}
+        self._times = []
+        for group, element_results in (('node', node), ('link', link)):
+            os.makedirs(os.path.join(self.path, group), exist_ok=True)
+            self._buffers[group] = element_results._empty(self.chunk_size)
+            self._chunks[group] = []
+
+    def add_time(self, time, node, link):
+        self._times.append(time)
+        self._buffers['node'].add_time(time, node)
+        self._buffers['link'].add_time(time, link)
+        if self._buffers['node']._length == self.chunk_size:
+            self._flush()
+
+    def _flush(self):
+        for group, buffer in self._buffers.items():
+            length = buffer._length
+            if length == 0:
+                continue
+            start = self._chunks[group][-1][1] if self._chunks[group] else 0
+            name = _write_chunk(os.path.join(self.path, group), len(self._chunks[group]),
+                                buffer._data[:, :length], buffer._codes[:, :length], self.compress)
+            self._chunks[group].append([start, start + length, name])
+            buffer._length = 0
+
+    def finish(self, results):
+        self._flush()
+        metadata = results._metadata(self.compress, self.provenance)
+        for group, buffer in self._buffers.items():
+            np.save(os.path.join(self.path, group, 'times.npy'), np.array(self._times, dtype=np.int64))
+            metadata['groups'][group] = buffer._group_metadata(self._chunks[group])
+        _write_metadata(self.path, metadata)
+
+
+class SummarySink(ResultsSink):
+    """
+    Keeps running summaries (minimum, maximum, mean, and quantiles) of
+    each variable and element instead of the results.
+
+    Parameters
+    ----------
+    quantiles : list of floats (optional)
+        Quantiles to estimate, between 0 and 1, default = [0.5, 0.95]. The
+        quantiles are estimated with the P-square algorithm (see
+        :class:`P2Quantile`).
+    variables : list of strings (optional)
+        Variables to summarize, default = all variables
+
+    Attributes
+    ----------
+    node : dict of pandas DataFrames
+        Node summaries keyed by variable, with one row per statistic
+        ('min', 'max', 'mean', and one row per quantile, e.g., '95%') and
+        one column per node
+    link : dict of pandas DataFrames
+        Link summaries keyed by variable
+    """
+
+    def __init__(self, quantiles=(0.5, 0.95), variables=None):
+        self.quantiles = list(quantiles)
+        self.variables = variables
+        self.node = None
+        self.link = None
+
+    def start(self, node, link, num_times=None):
+        self._names = {'node': node.names, 'link': link.names}
+        self._stats = {}
+        self._count = 0
+        for group, element_results in (('node', node), ('link', link)):
+            n = len(element_results.names)
+            for key in element_results:
+                if self.variables is not None and key not in self.variables:
+                    continue
+                self._stats[group, key] = {
+                    'min': np.full(n, np.inf),
+                    'max': np.full(n, -np.inf),
+                    'sum': np.zeros(n),
+                    'quantiles': [P2Quantile(q, n) for q in self.quantiles]}
+
+    def add_time(self, time, node, link):
+        self._count += 1
+        values = {'node': node, 'link': link}
+        for (group, key), stats in self._stats.items():
+            x = np.asarray(values[group][key], dtype=np.float64)
+            np.minimum(stats['min'], x, out=stats['min'])
+            np.maximum(stats['max'], x, out=stats['max'])
+            stats['sum'] += x
+            for quantile in stats['quantiles']:
+                quantile.add(x)
+
+    def finish(self, results):
+        self.node = {}
+        self.link = {}
+        index = ['min', 'max', 'mean'] + ['{:g}%'.format(100*q) for q in self.quantiles]
+        for (group, key), stats in self._stats.items():
+            values = [stats['min'], stats['max'], stats['sum']/max(self._count, 1)]
+            values.extend(quantile.value for quantile in stats['quantiles'])
+            getattr(self, group)[key] = pd.DataFrame(np.array(values), index=index,
+                                                     columns=self._names[group])
+
+
+class CallbackSink(ResultsSink):
+    """
+    Forwards the results of each report step to a function.
+
+    Parameters
+    ----------
+    function : callable
+        Function called as ``function(time, node, link)``, where node and
+        link are dictionaries of numpy arrays keyed by variable (see
+        :meth:`ResultsSink.add_time`)
+    """
+
+    def __init__(self, function):
+        self.function = function
+
+    def add_time(self, time, node, link):
+        self.function(time, node, link)
+
+
+class P2Quantile(object):
+    """
+    Streaming estimate of a quantile of many variables, using the P-square
+    algorithm (Jain and Chlamtac, 1985).
+
+    The estimate uses five markers per variable, so memory does not grow
+    with the number of observations. Until five observations are added the
+    exact quantile is returned.
+
+    Parameters
+    ----------
+    q : float
+        Quantile, between 0 and 1
+    size : int
+        Number of variables observed together
+    """
+
+    def __init__(self, q, size):
+        if not 0 <= q <= 1:
+            raise ValueError('q must be between 0 and 1')
+        self.q = q
+        self.count = 0
+        self._heights = np.zeros((5, size))
+        self._positions = np.tile(np.arange(1.0, 6.0)[:, None], (1, size))
+        self._desired = np.array([1, 1 + 2*q, 1 + 4*q, 3 + 2*q, 5])
+        self._increments = np.array([0, q/2, q, (1 + q)/2, 1])
+
+    def add(self, x):
+        """
+        Adds one observation of each variable.
+
+        Parameters
+        ----------
+        x : array-like
+            Observations, one per variable
+        """
+        x = np.asarray(x, dtype=np.float64)
+        heights = self._heights
+        if self.count < 5:
+            heights[self.count] = x
+            self.count += 1
+            if self.count == 5:
+                heights.sort(axis=0)
+            return
+        self.count += 1
+
+        # Find the cell of each observation and update the extreme markers
+        np.minimum(heights[0], x, out=heights[0])
+        np.maximum(heights[4], x, out=heights[4])
+        cell = (x[None, :] >= heights[1:4]).sum(axis=0)
+        self._positions[1:] += np.arange(1, 5)[:, None] > cell[None, :]
+        self._desired += self._increments
+
+        # Adjust the middle markers
+        n = self._positions
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            up = (d >= 1) & (n[i+1] - n[i] > 1)
+            down = (d <= -1) & (n[i-1] - n[i] < -1)
+            move = up | down
+            if not move.any():
+                continue
+            s = np.where(up, 1.0, -1.0)[move]
+            q0, q1, q2 = heights[i-1, move], heights[i, move], heights[i+1, move]
+            n0, n1, n2 = n[i-1, move], n[i, move], n[i+1, move]
+            parabolic = q1 + s/(n2 - n0)*((n1 - n0 + s)*(q2 - q1)/(n2 - n1) +
+                                          (n2 - n1 - s)*(q1 - q0)/(n1 - n0))
+            linear = np.where(s > 0, q1 + (q2 - q1)/(n2 - n1), q1 - (q0 - q1)/(n0 - n1))
+            heights[i, move] = np.where((q0 < parabolic) & (parabolic < q2), parabolic, linear)
+            n[i, move] += s
+
+    @property
+    def value(self):
+        """numpy.ndarray: Estimated quantile of each variable"""
+        if self.count == 0:
+            return np.full(self._heights.shape[1], np.nan)
+        if self.count < 5:
+            return np.percentile(self._heights[:self.count], 100*self.q, axis=0)
+        return self._heights[2].copy()
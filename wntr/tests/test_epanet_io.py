@@ -2,6 +2,11 @@ import unittest
 import nose
 from os.path import abspath, dirname, join
 import sys
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
 
 testdir = dirname(abspath(str(__file__)))
 test_datadir = join(testdir, 'networks_for_testing')
@@ -172,6 +177,42 @@ class TestInpFileWriter(unittest.TestCase):
             self.assertTrue(control._compare(self.wn2.get_control(name)))
 
 
+class TestInpFileFingerprint(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        import wntr
+        self.wntr = wntr
+
+    def test_unchanged_model_is_not_rewritten(self):
+        wn = self.wntr.network.WaterNetworkModel(join(ex_datadir, 'Net3.inp'))
+        wn.write_inpfile('temp_fp.inp')
+        with open('temp_fp.inp') as f:
+            contents = f.read()
+        mtime = os.stat('temp_fp.inp').st_mtime
+        time.sleep(0.1)
+        wn.write_inpfile('temp_fp.inp')
+        self.assertEqual(os.stat('temp_fp.inp').st_mtime, mtime)
+        with open('temp_fp.inp') as f:
+            self.assertEqual(f.read(), contents)
+
+        # a changed model is written again
+        wn.get_node('10').elevation = 200
+        wn.write_inpfile('temp_fp.inp')
+        wn2 = self.wntr.network.WaterNetworkModel('temp_fp.inp')
+        self.assertAlmostEqual(wn2.get_node('10').elevation, 200, 4)
+
+    def test_modified_file_is_rewritten(self):
+        wn = self.wntr.network.WaterNetworkModel(join(ex_datadir, 'Net1.inp'))
+        wn.write_inpfile('temp_fp.inp')
+        with open('temp_fp.inp') as f:
+            contents = f.read()
+        with open('temp_fp.inp', 'w') as f:
+            f.write('[END]\n')
+        wn.write_inpfile('temp_fp.inp')
+        with open('temp_fp.inp') as f:
+            self.assertEqual(f.read(), contents)
+
 class TestNet3InpWriterResults(unittest.TestCase):
 
     @classmethod
@@ -246,5 +287,149 @@ class TestNet3InpUnitsResults(unittest.TestCase):
             for t in self.results2.link['flowrate'].index:
                 self.assertLessEqual(abs(self.results2.link['flowrate'].loc[t,link_name] - self.results.link['flowrate'].loc[t,link_name]), 0.00001)
 
+class TestBinFileReaders(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        import wntr
+        self.wntr = wntr
+
+        inp_file = join(ex_datadir, 'Net3.inp')
+        self.wn = self.wntr.network.WaterNetworkModel(inp_file)
+        self.wn.options.quality.mode = 'CHEMICAL'
+
+        sim = self.wntr.sim.EpanetSimulator(self.wn)
+        self.results = sim.run_sim(file_prefix='temp')
+        self.mm = self.wntr.epanet.io.BinFile().memmap('temp.bin')
+
+    @classmethod
+    def tearDownClass(self):
+        del self.mm
+
+    def test_all_values(self):
+        for name, values in self.mm.node.items():
+            self.assertTrue((values.values == self.results.node[name].values).all())
+        for name, values in self.mm.link.items():
+            self.assertTrue((values.values == self.results.link[name].values).all())
+
+    def test_to_dataframe(self):
+        names = ['10', '121', '35']
+        df = self.mm.node['quality'].to_dataframe(start_time=3600*4, end_time=3600*10, names=names)
+        expected = self.results.node['quality'].loc[3600*4:3600*10, names]
+        self.assertEqual(list(df.index), list(expected.index))
+        self.assertEqual(list(df.columns), names)
+        self.assertTrue((df.values == expected.values).all())
+
+    def test_indexing(self):
+        head = self.results.node['head']
+        self.assertEqual(self.mm.node['head'].shape, head.shape)
+        self.assertEqual(self.mm.node['head'][3, 5], head.iloc[3, 5])
+        self.assertTrue((self.mm.node['head'][2] == head.iloc[2].values).all())
+        self.assertTrue((self.mm.node['head'][:, 7] == head.iloc[:, 7].values).all())
+        self.assertTrue((self.mm.link['setting'][1:4, [0, 2]] == self.results.link['setting'].iloc[1:4, [0, 2]].values).all())
+
+    def test_iter_periods(self):
+        reader = self.wntr.epanet.io.BinFile()
+        times = []
+        for t, node, link in reader.iter_periods('temp.bin'):
+            times.append(t)
+            self.assertTrue((node['pressure'] == self.results.node['pressure'].loc[t].values).all())
+            self.assertTrue((link['status'] == self.results.link['status'].loc[t].values).all())
+        self.assertEqual(times, list(self.results.node['head'].index))
+        self.assertEqual(reader.node_names, list(self.results.node['head'].columns))
+
+    def test_iter_periods_result_types(self):
+        from wntr.epanet.util import ResultType
+        reader = self.wntr.epanet.io.BinFile()
+        periods = reader.iter_periods('temp.bin', result_types=[ResultType.quality, ResultType.flowrate], convert_units=False)
+        t, node, link = next(periods)
+        self.assertEqual(list(node.keys()), ['quality'])
+        self.assertEqual(list(link.keys()), ['flowrate'])
+        flow_units = self.wntr.epanet.util.FlowUnits.GPM
+        self.assertTrue(np.allclose(self.wntr.epanet.util.HydParam.Flow._to_si(flow_units, link['flowrate']),
+                                    self.results.link['flowrate'].loc[t].values))
+
+    def test_iter_periods_wait(self):
+        import threading
+        import time
+        with open('temp.bin', 'rb') as f:
+            content = f.read()
+        def write_slowly():
+            with open('temp_partial.bin', 'wb') as f:
+                for i in range(0, len(content), 20000):
+                    f.write(content[i:i+20000])
+                    f.flush()
+                    time.sleep(0.01)
+        with open('temp_partial.bin', 'wb') as f:
+            pass
+        writer = threading.Thread(target=write_slowly)
+        writer.start()
+        reader = self.wntr.epanet.io.BinFile()
+        times = [t for t, node, link in reader.iter_periods('temp_partial.bin', wait=True, timeout=10, poll_interval=0.01)]
+        writer.join()
+        self.assertEqual(times, list(self.results.node['head'].index))
+
+    def test_custom_handlers(self):
+        results = self.wntr.epanet.io.BinFile().read('temp.bin', custom_handlers=True)
+        for name in ['demand', 'head', 'quality']:
+            self.assertTrue((results.node[name].values.astype(float) == self.results.node[name].values).all())
+        for name in ['flowrate', 'status', 'setting']:
+            self.assertTrue((results.link[name].values.astype(float) == self.results.link[name].values).all())
+
+def _write_grid_inp(filename, n):
+    with open(filename, 'w') as f:
+        f.write('[JUNCTIONS]\n')
+        for i in range(n):
+            for j in range(n):
+                f.write(' J%d_%d\t%.1f\t%.1f\t1\n' % (i, j, 100+i, 1+(i*j)%7))
+        f.write('\n[RESERVOIRS]\n R1\t300\n\n[PIPES]\n P_R\tR1\tJ0_0\t100\t24\t100\n')
+        k = 0
+        for i in range(n):
+            for j in range(n):
+                if j+1 < n:
+                    f.write(' P%d\tJ%d_%d\tJ%d_%d\t500\t12\t100\t0\tOpen\n' % (k, i, j, i, j+1))
+                    k += 1
+                if i+1 < n:
+                    f.write(' P%d\tJ%d_%d\tJ%d_%d\t400\t8\t110\n' % (k, i, j, i+1, j))
+                    k += 1
+        f.write('\n[PATTERNS]\n 1\t1.0\t1.2\t0.8\n\n[COORDINATES]\n')
+        for i in range(n):
+            for j in range(n):
+                f.write(' J%d_%d\t%d\t%d\n' % (i, j, i*100, j*100))
+        f.write('\n[OPTIONS]\n Units\tGPM\n\n[END]\n')
+
+class TestInpFileReader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        import wntr
+        self.wntr = wntr
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_optional_pipe_fields(self):
+        inp_file = join(self.tempdir, 'grid.inp')
+        _write_grid_inp(inp_file, 3)
+        wn = self.wntr.network.WaterNetworkModel(inp_file)
+        self.assertEqual(wn.num_junctions, 9)
+        self.assertEqual(wn.num_pipes, 13)
+        pipe = wn.get_link('P1')
+        self.assertEqual(pipe.minor_loss, 0.0)
+        self.assertEqual(pipe.initial_status, self.wntr.network.LinkStatus.Open)
+        self.assertAlmostEqual(pipe.length, 400*0.3048, 6)
+        self.assertAlmostEqual(wn.get_node('J2_1').coordinates[0], 200, 6)
+
+    def test_error_line_number(self):
+        inp_file = join(self.tempdir, 'bad.inp')
+        with open(inp_file, 'w') as f:
+            f.write('[JUNCTIONS]\n J1\t10\t1\n J2\tten\t1\n\n[OPTIONS]\n Units\tGPM\n\n[END]\n')
+        with self.assertRaises(ValueError) as cm:
+            self.wntr.network.WaterNetworkModel(inp_file)
+        self.assertIn('[JUNCTIONS] line 3', str(cm.exception))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
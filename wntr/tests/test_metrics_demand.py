@@ -27,6 +27,27 @@ def test_expected_demand_net3_node101():
     error = abs((ave_ex_demand_101 - expected)/expected)
     assert_less(error, 0.01) # 1% error
 
+def test_expected_demand_categories():
+    inp_file = join(net3dir,'Net3.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    wn.options.hydraulic.demand_multiplier = 1.5
+    wn.add_pattern('nowrap', wntr.network.elements.Pattern('nowrap', [1,2,3], wrap=False, 
+                                                           time_options=wn.options.time))
+    junction = wn.get_node('101')
+    junction.add_demand(0.01, None, 'no pattern')
+    junction.add_demand(0.02, '1', 'pattern 1')
+    wn.get_node('105').add_demand(0.5, 'nowrap', 'no wrap')
+    wn.get_node('103').demand_timeseries_list.clear()
+    
+    expected_demand = wntr.metrics.hydraulic.expected_demand(wn, timestep=1800)
+    
+    assert_list_equal(list(expected_demand.columns), wn.junction_name_list)
+    expected = pd.DataFrame(index=expected_demand.index, 
+        data={name: [junc.demand_timeseries_list.at(t, multiplier=1.5) for t in expected_demand.index] 
+              for name, junc in wn.junctions()})
+    assert_frame_equal(expected_demand, expected, check_less_precise=True)
+    assert_equal(expected_demand['103'].abs().max(), 0)
+
 def test_wsa():
     
     expected_demand = pd.DataFrame(data=[[12,2],[3,4],[5,10]], columns=['A', 'B'], index=[0,1,2])
@@ -1,6 +1,7 @@
 from nose.tools import *
 from os.path import abspath, dirname, join
 import numpy as np
+import networkx as nx
 import wntr
 
 testdir = dirname(abspath(str(__file__)))
@@ -80,5 +81,47 @@ def test_layout8():
     error = abs((S_ave - expected_S_ave)/expected_S_ave)
     assert_less(error, 0.05) # 5% error
 
+def test_acyclic_matches_paths():
+    inp_file = join(datadir,'..','..','..','examples','networks','Net3.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    sim = wntr.sim.EpanetSimulator(wn)
+    results = sim.run_sim()
+    flowrate = results.link['flowrate'].loc[12*3600,:]
+    
+    G_flowrate = wn.get_graph(link_weight=flowrate, modify_direction=True)
+    G_flowrate.add_edge('10', '101', key='parallel', type='Pipe', weight=0.01)
+    assert_true(nx.is_directed_acyclic_graph(G_flowrate))
+    sources = ['River', 'Lake']
+    
+    S_dag, Q_dag = wntr.metrics.hydraulic._entropy_dag(G_flowrate, sources, G_flowrate.nodes())
+    S_paths, Q_paths = wntr.metrics.hydraulic._entropy_paths(G_flowrate, sources, G_flowrate.nodes())
+    
+    assert_equal(set(S_dag.keys()), set(S_paths.keys()))
+    for node, value in S_paths.items():
+        if np.isnan(value):
+            assert_true(np.isnan(S_dag[node]))
+        else:
+            assert_almost_equal(S_dag[node], value, 10)
+    for node, value in Q_paths.items():
+        assert_almost_equal(Q_dag[node], value, 10)
+
+def test_cycle():
+    G = nx.MultiDiGraph()
+    G.add_node('R', type='Reservoir')
+    for node in ['1', '2', '3']:
+        G.add_node(node, type='Junction')
+    G.add_edge('R', '1', key='a', weight=3.0)
+    G.add_edge('R', '2', key='e', weight=1.0)
+    G.add_edge('1', '2', key='b', weight=2.0)
+    G.add_edge('2', '3', key='c', weight=1.5)
+    G.add_edge('3', '1', key='d', weight=0.5)
+    
+    [S, S_ave] = wntr.metrics.entropy(G)
+    
+    assert_false(nx.is_directed_acyclic_graph(G))
+    assert_equal(S['R'], 0)
+    assert_greater(S['1'], 0)
+    assert_greater(S['2'], 0)
+
 if __name__ == '__main__':
     test_layout8()
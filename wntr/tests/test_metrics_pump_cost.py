@@ -44,5 +44,79 @@ class TestPumpCost(unittest.TestCase):
 
         self.assertAlmostEqual(avg_cost_sum, 0.070484, 5)
 
+    def test_pump_energy_efficiency_curve(self):
+        import numpy as np
+        flowrate = self.results.link['flowrate'].loc[:,self.wn.pump_name_list]
+        head = self.results.node['head'].loc[:,self.wn.node_name_list]
+        pump_name = self.wn.pump_name_list[0]
+        pump = self.wn.get_link(pump_name)
+        
+        energy = self.wntr.metrics.pump_energy(flowrate, head, self.wn)
+        curve_points = [(0.0, 40.0), (flowrate[pump_name].max()/2, 80.0), (flowrate[pump_name].max(), 70.0)]
+        self.wn.add_curve('effic', 'EFFICIENCY', curve_points)
+        pump.efficiency = self.wn.get_curve('effic')
+        try:
+            energy_curve = self.wntr.metrics.pump_energy(flowrate, head, self.wn)
+        finally:
+            pump.efficiency = None
+        
+        efficiency = np.interp(flowrate[pump_name], [0.0, curve_points[1][0], curve_points[2][0]], [0.4, 0.8, 0.7])
+        expected = energy[pump_name]*(self.wn.options.energy.global_efficiency/100.0)/efficiency
+        np.testing.assert_allclose(energy_curve[pump_name], expected, rtol=1e-10)
+        other_pumps = self.wn.pump_name_list[1:]
+        np.testing.assert_allclose(energy_curve[other_pumps], energy[other_pumps])
+    
+    def test_pump_energy_efficiency_curve_zero(self):
+        import numpy as np
+        flowrate = self.results.link['flowrate'].loc[:,self.wn.pump_name_list]
+        head = self.results.node['head'].loc[:,self.wn.node_name_list]
+        pump_name = self.wn.pump_name_list[0]
+        pump = self.wn.get_link(pump_name)
+        flowrate = flowrate.copy()
+        flowrate.iloc[0:3, 0] = 0 # idle pump
+        
+        energy = self.wntr.metrics.pump_energy(flowrate, head, self.wn)
+        max_flow = flowrate[pump_name].max()
+        self.wn.add_curve('effic_zero', 'EFFICIENCY', [(0.0, 0.0), (max_flow, 150.0)])
+        pump.efficiency = self.wn.get_curve('effic_zero')
+        try:
+            energy_curve = self.wntr.metrics.pump_energy(flowrate, head, self.wn)
+            cost_curve = self.wntr.metrics.pump_cost(flowrate, head, self.wn)
+        finally:
+            pump.efficiency = None
+        
+        self.assertFalse(energy_curve.isnull().any().any())
+        self.assertFalse(cost_curve.isnull().any().any())
+        self.assertTrue((energy_curve.iloc[0:3, 0] == 0).all())
+        # efficiency is limited to 1-100%
+        efficiency = np.clip(np.interp(flowrate[pump_name], [0.0, max_flow], [0.0, 1.5]), 0.01, 1.0)
+        expected = energy[pump_name]*(self.wn.options.energy.global_efficiency/100.0)/efficiency
+        np.testing.assert_allclose(energy_curve[pump_name], expected, rtol=1e-10)
+    
+    def test_pump_cost_price_pattern(self):
+        import numpy as np
+        flowrate = self.results.link['flowrate'].loc[:,self.wn.pump_name_list]
+        head = self.results.node['head'].loc[:,self.wn.node_name_list]
+        pump_name = self.wn.pump_name_list[0]
+        pump = self.wn.get_link(pump_name)
+        
+        cost = self.wntr.metrics.pump_cost(flowrate, head, self.wn)
+        self.wn.add_pattern('price', [1.0, 2.0, 0.5])
+        self.wn.add_pattern('pump_price', [3.0])
+        self.wn.options.energy.global_pattern = 'price'
+        pump.energy_price = 2*self.wn.options.energy.global_price
+        pump.energy_pattern = 'pump_price'
+        try:
+            cost_pattern = self.wntr.metrics.pump_cost(flowrate, head, self.wn)
+        finally:
+            self.wn.options.energy.global_pattern = None
+            pump.energy_price = None
+            pump.energy_pattern = None
+        
+        multiplier = self.wn.get_pattern('price').at_many(cost.index)
+        other_pumps = self.wn.pump_name_list[1:]
+        np.testing.assert_allclose(cost_pattern[other_pumps], cost[other_pumps].multiply(multiplier, axis=0))
+        np.testing.assert_allclose(cost_pattern[pump_name], 6*cost[pump_name])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
 import pandas as pd
+import networkx as nx
 from os.path import abspath, dirname, join
 import wntr
 
@@ -107,5 +108,28 @@ class TestSegmentation(unittest.TestCase):
         self.assertEqual(max_seg_size, 3)
         self.assertEqual(num_segments, 119)
         
+    def test_segmentation_grid(self):
+        # test a 100 x 100 grid (19800 links), with valves on both ends of 
+        # the horizontal links in the first row
+        grid = nx.grid_2d_graph(100, 100)
+        G = nx.MultiDiGraph()
+        for u, v in grid.edges():
+            G.add_edge(str(u), str(v), key=str(u)+'-'+str(v))
+        valves = []
+        for i in range(99):
+            link = str((0, i))+'-'+str((0, i+1))
+            valves.append([link, str((0, i))])
+            valves.append([link, str((0, i+1))])
+        valves = pd.DataFrame(valves, columns=['link', 'node'])
+        
+        node_segments, link_segments, seg_size = wntr.metrics.topographic.valve_segments(G, valves)
+        
+        # isolated links are numbered first, and the rest of the grid is one segment
+        self.assertEqual(seg_size.shape[0], 100)
+        self.assertListEqual(list(link_segments[valves['link'][::2]]), list(range(1, 100)))
+        self.assertEqual(seg_size.loc[100, 'node'], 10000)
+        self.assertEqual(seg_size.loc[100, 'link'], 19800-99)
+        self.assertEqual(node_segments.nunique(), 1)
+        
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,6 +1,9 @@
 import unittest
+import sys
 from os.path import abspath, dirname, join
+import operator
 import numpy as np
+from pandas.util.testing import assert_series_equal
 from nose.tools import *
 import wntr
 
@@ -155,6 +158,61 @@ class TestNetworkMethods(unittest.TestCase):
         self.assertEqual(pat1.multipliers.tolist(), [0.0, 0.0, 1.0, 1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
         self.assertEqual(pat2.multipliers.tolist(), [1,2,3,4])
 
+    def test_pattern_table(self):
+        wn = self.wntr.network.WaterNetworkModel()
+        wn.options.time.pattern_timestep = 10
+        wn.add_pattern('pat1', [1.0, 2.0, 3.0])
+        wn.add_pattern('pat2', [1.0, 2.0, 3.0])
+        wn.add_pattern('pat3', self.wntr.network.Pattern('pat3', [1.0, 2.0, 3.0], wrap=False))
+        wn.add_pattern('pat4', [4, 5])
+        wn.add_pattern('pat5', [6.0])
+        wn.add_pattern('pat6', [])
+
+        times = [-10, 0, 5, 10, 20, 30, 45, 100]
+        values = wn.patterns.at_many(times)
+        self.assertEqual(list(values.columns), wn.pattern_name_list)
+        for name in wn.pattern_name_list:
+            pattern = wn.get_pattern(name)
+            expected = [pattern.at(time) for time in times]
+            self.assertEqual(values[name].tolist(), expected)
+            self.assertEqual(pattern.at_many(times).tolist(), expected)
+
+        # identical patterns share a row of the table
+        table, lengths, rows = wn._pattern_reg._table()
+        self.assertEqual(table.shape, (4, 3))
+        self.assertEqual(rows.tolist(), [0, 0, 0, 1, 2, 3])
+
+        # the multipliers are read-only, assigning new multipliers does not
+        # change identical patterns
+        pattern = wn.get_pattern('pat1')
+        with self.assertRaises(ValueError):
+            pattern.multipliers[0] = 10.0
+        pattern.multipliers = [10.0, 2.0, 3.0]
+        values = wn.patterns.at_many([0], ['pat1', 'pat2'])
+        self.assertEqual(values.values.tolist(), [[10.0, 1.0]])
+        wn.get_pattern('pat2').multipliers = [7.0, 8.0]
+        self.assertEqual(wn.patterns.at_many([10], ['pat2']).values.tolist(), [[8.0]])
+        self.assertEqual(wn.get_pattern('pat3').multipliers.tolist(), [1.0, 2.0, 3.0])
+
+    def test_pattern_table_shared_after_write(self):
+        import shutil
+        import tempfile
+        wn = self.wntr.network.WaterNetworkModel(join(ex_datadir, 'Net3.inp'))
+        table = wn._pattern_reg._table()[0]
+        path = tempfile.mkdtemp()
+        try:
+            wn.write_inpfile(join(path, 'Net3.inp'))
+            self.wntr.sim.EpanetSimulator(wn).run_sim(file_prefix=join(path, 'temp'))
+        finally:
+            shutil.rmtree(path)
+        repr(wn.get_pattern('1'))
+        wntr.metrics.average_expected_demand(wn)
+        # the table is not rebuilt and every pattern still reads its row
+        self.assertIs(wn._pattern_reg._table()[0], table)
+        for name, pattern in wn.patterns():
+            self.assertFalse(pattern.multipliers.flags.writeable)
+            self.assertTrue(np.shares_memory(pattern.multipliers, table))
+
     def test_add_source(self):
         wn = self.wntr.network.WaterNetworkModel()
         wn.add_junction('j1')
@@ -439,6 +497,222 @@ class TestNetworkMethods(unittest.TestCase):
         self.assertEqual(l4,['p5'])
         self.assertEqual(l5,[])
 
+    def test_get_links_for_node_reconnect(self):
+        wn = self.wntr.network.WaterNetworkModel()
+        wn.add_junction('j1')
+        wn.add_junction('j2')
+        wn.add_junction('j3')
+        wn.add_pipe('p1','j1','j2')
+        wn.add_pipe('p2','j2','j3')
+        wn.add_pipe('p3','j1','j3')
+        wn.get_link('p2').start_node = wn.get_node('j1')
+        self.assertEqual(wn.get_links_for_node('j1','outlet'), ['p1','p3','p2'])
+        self.assertEqual(wn.get_links_for_node('j2'), ['p1'])
+        wn.remove_link('p1')
+        self.assertEqual(wn.get_links_for_node('j1'), ['p3','p2'])
+        self.assertEqual(wn.get_links_for_node('j2'), [])
+        self.assertEqual(wn.get_links_for_node('j3','inlet'), ['p2','p3'])
+
+    def test_incidence_matrix(self):
+        inp_file = join(ex_datadir, 'Net3.inp')
+        wn = self.wntr.network.WaterNetworkModel(inp_file)
+        A = wn.get_incidence_matrix()
+        self.assertEqual(A.shape, (wn.num_nodes, wn.num_links))
+        np.testing.assert_array_equal(A.sum(axis=0), 0)
+        sim = self.wntr.sim.EpanetSimulator(wn)
+        results = sim.run_sim()
+        flow = results.link['flowrate'].loc[3600, wn.link_name_list].values
+        demand = results.node['demand'].loc[3600, wn.node_name_list].values
+        np.testing.assert_array_almost_equal(A.dot(flow), demand, 5)
+
+        node_names, link_names, indptr, indices, directions = wn.nodes.adjacency.csr()
+        i = node_names.index('60')
+        links = [link_names[j] for j in indices[indptr[i]:indptr[i+1]]]
+        self.assertEqual(links, wn.get_links_for_node('60'))
+
+    def test_cached_name_arrays(self):
+        inp_file = join(ex_datadir, 'Net3.inp')
+        wn = self.wntr.network.WaterNetworkModel(inp_file)
+        Junction = self.wntr.network.Junction
+        Tank = self.wntr.network.Tank
+        Pipe = self.wntr.network.Pipe
+
+        names = wn.nodes.name_array(Junction)
+        self.assertFalse(names.flags.writeable)
+        self.assertEqual(list(names), wn.junction_name_list)
+        self.assertIs(wn.nodes.name_array(Junction), names)
+        node_names = wn.node_name_list
+        self.assertEqual([node_names[i] for i in wn.nodes.index_array(Tank)], wn.tank_name_list)
+        self.assertEqual([name for name, link in wn.links(Pipe)], wn.pipe_name_list)
+
+        # name lists are copies, not views of the cache
+        wn.junction_name_list.append('x')
+        self.assertEqual(list(names), wn.junction_name_list)
+
+        version = wn.structure_version
+        wn.add_junction('new_junction')
+        self.assertGreater(wn.structure_version, version)
+        self.assertEqual(wn.nodes.name_array(Junction)[-1], 'new_junction')
+        self.assertEqual(wn.junction_name_list[-1], 'new_junction')
+
+        version = wn.structure_version
+        wn.add_pipe('new_pipe', '10', 'new_junction')
+        self.assertGreater(wn.structure_version, version)
+        self.assertEqual(wn.pipe_name_list[-1], 'new_pipe')
+
+        version = wn.structure_version
+        wn.get_link('new_pipe').end_node = wn.get_node('15')
+        self.assertGreater(wn.structure_version, version)
+
+        version = wn.structure_version
+        wn.remove_link('new_pipe')
+        wn.remove_node('new_junction')
+        self.assertGreater(wn.structure_version, version)
+        self.assertEqual(list(wn.nodes.name_array(Junction)), list(names))
+
+        version = wn.structure_version
+        wn.get_node('10').elevation = 1.0
+        self.assertEqual(wn.structure_version, version)
+
+    def test_change_journal(self):
+        inp_file = join(ex_datadir, 'Net3.inp')
+        wn = self.wntr.network.WaterNetworkModel(inp_file)
+        version = wn.journal.version
+
+        wn.get_link('101').diameter = 0.5
+        wn.get_link('101').cv = True
+        wn.get_link('101').initial_status = self.wntr.network.LinkStatus.Closed
+        wn.get_node('10').coordinates = (1, 2)
+        wn.get_node('10').head = 10.0 # simulation state, not journaled
+        wn.get_link('101').status = self.wntr.network.LinkStatus.Open
+        wn.add_junction('new_junction')
+        wn.remove_node('new_junction')
+        changes = [(r.action, r.element_type, r.name, r.attribute) for r in wn.journal.changes(version)]
+        self.assertEqual(changes, [('modified', 'Pipe', '101', 'diameter'),
+                                   ('modified', 'Pipe', '101', 'cv'),
+                                   ('modified', 'Pipe', '101', 'initial_status'),
+                                   ('modified', 'Junction', '10', 'coordinates'),
+                                   ('added', 'Junction', 'new_junction', None),
+                                   ('removed', 'Junction', 'new_junction', None)])
+        self.assertEqual(wn.journal.changes(version, version+2)[-1].attribute, 'cv')
+        self.assertEqual([r.version for r in wn.journal.changes(version)], list(range(version+1, version+7)))
+
+        # control actions of a simulation are not journaled
+        length = len(wn.journal)
+        version = wn.journal.version
+        sim = self.wntr.sim.WNTRSimulator(wn)
+        results = sim.run_sim()
+        self.assertEqual(len(wn.journal), length)
+        self.assertEqual(wn.journal.version, version)
+        version -= 6
+
+        # elements that are not in the model are not journaled
+        junction = self.wntr.network.Junction('detached', wn)
+        junction.elevation = 1.0
+        self.assertEqual(len(wn.journal.changes(version)), 6)
+
+        journal = self.wntr.network.model.ChangeJournal(maxlen=3)
+        for i in range(5):
+            journal.record('modified', 'Pipe', str(i), 'length')
+        self.assertTrue(journal.covers(2))
+        self.assertFalse(journal.covers(1))
+        self.assertEqual([r.name for r in journal.changes(2)], ['2', '3', '4'])
+        self.assertRaises(ValueError, journal.changes, 1)
+
+    def test_clone(self):
+        inp_file = join(ex_datadir, 'Net3.inp')
+        wn = self.wntr.network.WaterNetworkModel(inp_file)
+        wn2 = wn.clone()
+        self.assertTrue(wn._compare(wn2))
+        self.assertEqual(wn.describe(level=2), wn2.describe(level=2))
+
+        # references are rewired to the elements and registries of the clone
+        for name, link in wn2.links():
+            self.assertIsNot(link, wn.get_link(name))
+            self.assertIs(link.start_node, wn2.get_node(link.start_node_name))
+            self.assertIs(link.end_node, wn2.get_node(link.end_node_name))
+            self.assertIs(link._node_reg, wn2._node_reg)
+        for name, control in wn2.controls():
+            for obj in control.requires():
+                if isinstance(obj, (self.wntr.network.Node, self.wntr.network.Link)):
+                    self.assertIs(obj, wn2.get_node(obj.name) if isinstance(obj, self.wntr.network.Node) else wn2.get_link(obj.name))
+        self.assertEqual(wn.get_links_for_node('10'), wn2.get_links_for_node('10'))
+
+        # the clone is independent
+        wn2.get_link('101').diameter = 0.5
+        wn2.get_node('10').demand_timeseries_list[0].base_value = 1.0
+        wn2.get_pattern('1').multipliers = [5.0]
+        wn2.add_junction('new_junction')
+        self.assertNotEqual(wn.get_link('101').diameter, 0.5)
+        self.assertNotEqual(wn.get_node('10').demand_timeseries_list[0].base_value, 1.0)
+        self.assertNotEqual(wn.get_pattern('1').multipliers[0], 5.0)
+        self.assertNotIn('new_junction', wn.node_name_list)
+
+        sim = self.wntr.sim.EpanetSimulator(wn)
+        results1 = sim.run_sim()
+        sim = self.wntr.sim.EpanetSimulator(wn.clone())
+        results2 = sim.run_sim()
+        self.assertTrue((results1.node['pressure'] == results2.node['pressure']).all().all())
+
+    def test_add_elements_in_bulk(self):
+        import pandas as pd
+        wn = self.wntr.network.WaterNetworkModel()
+        wn.add_pattern('pat1', [1, 2])
+        wn.add_curve('curve1', 'HEAD', [(0.1, 50)])
+        wn.add_junctions(pd.DataFrame({'base_demand': [0.01, 0.02], 'demand_pattern': ['pat1', None],
+                                       'elevation': [10, 20], 'coordinates': [(1, 2), None]},
+                                      index=['j1', 'j2']))
+        wn.add_tanks({'name': ['t1'], 'elevation': [30], 'init_level': [2], 'coordinates': [(3, 4)]})
+        wn.add_reservoirs({'name': ['r1'], 'base_head': [100], 'head_pattern': ['pat1']})
+        wn.add_pipes({'name': ['p1', 'p2'], 'start_node_name': ['j1', 'j2'],
+                      'end_node_name': ['j2', 't1'], 'length': [100, 200],
+                      'status': ['OPEN', 'CLOSED'], 'check_valve_flag': [False, True]})
+        wn.add_pumps({'name': ['pump1', 'pump2'], 'start_node_name': ['r1', 'r1'],
+                      'end_node_name': ['j1', 'j2'], 'pump_type': ['POWER', 'HEAD'],
+                      'pump_parameter': [10.0, 'curve1']})
+        wn.add_valves({'name': ['v1'], 'start_node_name': ['j2'], 'end_node_name': ['j1'],
+                       'valve_type': ['TCV'], 'setting': [2.0]})
+
+        wn2 = self.wntr.network.WaterNetworkModel()
+        wn2.add_pattern('pat1', [1, 2])
+        wn2.add_curve('curve1', 'HEAD', [(0.1, 50)])
+        wn2.add_junction('j1', base_demand=0.01, demand_pattern='pat1', elevation=10, coordinates=(1, 2))
+        wn2.add_junction('j2', base_demand=0.02, elevation=20)
+        wn2.add_tank('t1', elevation=30, init_level=2, coordinates=(3, 4))
+        wn2.add_reservoir('r1', base_head=100, head_pattern='pat1')
+        wn2.add_pipe('p1', 'j1', 'j2', length=100)
+        wn2.add_pipe('p2', 'j2', 't1', length=200, status='CLOSED', check_valve_flag=True)
+        wn2.add_pump('pump1', 'r1', 'j1', 'POWER', 10.0)
+        wn2.add_pump('pump2', 'r1', 'j2', 'HEAD', 'curve1')
+        wn2.add_valve('v1', 'j2', 'j1', valve_type='TCV', setting=2.0)
+
+        self.assertTrue(wn._compare(wn2))
+        self.assertEqual(wn.node_name_list, wn2.node_name_list)
+        self.assertEqual(wn.link_name_list, wn2.link_name_list)
+        self.assertEqual(wn.head_pump_name_list, ['pump2'])
+        self.assertEqual(wn.tcv_name_list, ['v1'])
+        self.assertEqual(wn.get_node('j1').coordinates, (1, 2))
+        self.assertEqual(wn.get_node('j1').demand_timeseries_list[0].pattern_name, 'pat1')
+        self.assertEqual(wn.get_link('p2').initial_status, self.wntr.network.LinkStatus.Closed)
+        self.assertEqual(list(wn.links.check_valves()), ['p2'])
+        self.assertEqual(wn._check_valves, ['p2'])
+        self.assertEqual(sorted(wn.get_links_for_node('j2')), ['p1', 'p2', 'pump2', 'v1'])
+
+        # the whole table is checked before elements are added
+        num_nodes = wn.num_nodes
+        self.assertRaises(ValueError, wn.add_junctions, {'name': ['j3', 'j3']})
+        self.assertRaises(ValueError, wn.add_junctions, {'name': ['j3', 'j1']})
+        self.assertRaises(ValueError, wn.add_junctions, {'name': ['j3'], 'elev': [1]})
+        self.assertRaises(ValueError, wn.add_junctions, {'name': ['j3', 'j4'], 'elevation': [1, 'x']})
+        self.assertRaises(ValueError, wn.add_tanks, {'name': ['t2'], 'init_level': [10], 'max_level': [5]})
+        self.assertEqual(wn.num_nodes, num_nodes)
+        self.assertRaises(ValueError, wn.add_pipes, {'name': ['p3'], 'start_node_name': ['j1']})
+        self.assertRaises(ValueError, wn.add_pipes, {'name': ['p3'], 'start_node_name': ['j1'],
+                                                     'end_node_name': ['missing']})
+        self.assertRaises(ValueError, wn.add_valves, {'name': ['v2'], 'start_node_name': ['j1'],
+                                                      'end_node_name': ['j2'], 'valve_type': ['XYZ']})
+        self.assertEqual(wn.num_links, 5)
+
 #    def test_assign_demand(self):
 #        inp_file = join(ex_datadir, 'Net3.inp')
 #        wn = self.wntr.network.WaterNetworkModel(inp_file)
@@ -583,6 +857,52 @@ def test_query_pipe_attribute():
 
     assert_set_equal(set(pipes.keys()), expected_pipes)
 
+def test_query_attribute_values():
+    inp_file = join(ex_datadir,'Net3.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+
+    def loop_query(elements, attribute, operation=None, value=None):
+        values = {}
+        for name, element in elements:
+            if hasattr(element, attribute):
+                if operation is None or operation(getattr(element, attribute), value):
+                    values[name] = getattr(element, attribute)
+        return values
+
+    elevation = wn.query_node_attribute('elevation', np.greater, 10)
+    assert_dict_equal(dict(elevation), loop_query(wn.nodes(), 'elevation', np.greater, 10))
+    assert_list_equal(list(elevation.index), list(loop_query(wn.nodes(), 'elevation', np.greater, 10).keys()))
+    diameter = wn.query_link_attribute('diameter', link_type=wntr.network.Pipe)
+    assert_dict_equal(dict(diameter), loop_query(wn.pipes(), 'diameter'))
+    coordinates = wn.query_node_attribute('coordinates')
+    assert_dict_equal(dict(coordinates), loop_query(wn.nodes(), 'coordinates'))
+    init_level = wn.query_node_attribute('init_level')
+    assert_dict_equal(dict(init_level), loop_query(wn.tanks(), 'init_level'))
+    status = wn.query_link_attribute('status', np.equal, wntr.network.LinkStatus.Open)
+    assert_equal(status.dtype, np.int64)
+    assert_dict_equal(dict(status), loop_query(wn.links(), 'status', np.equal, wntr.network.LinkStatus.Open))
+
+    # custom attributes on some elements
+    wn.get_link('122').material = 'PVC'
+    wn.get_link('123').material = 'Iron'
+    material = wn.query_link_attribute('material', operator.eq, 'PVC')
+    assert_dict_equal(dict(material), {'122': 'PVC'})
+
+    # cached values are updated when the model changes
+    wn.get_link('122').diameter = 5.0
+    assert_equal(wn.query_link_attribute('diameter')['122'], 5.0)
+    wn.get_node('10').elevation = 1000.0
+    assert_in('10', wn.query_node_attribute('elevation', np.greater, 999).index)
+    wn.get_node('10').demand_timeseries_list[0].base_value = 7.0
+    assert_equal(wn.query_node_attribute('base_demand')['10'], 7.0)
+    wn.get_node('10').head = 3.0
+    assert_equal(wn.query_node_attribute('head')['10'], 3.0)
+
+    # returned values can be modified without changing the model
+    elevation = wn.query_node_attribute('elevation')
+    elevation[:] = 0
+    assert_equal(wn.query_node_attribute('elevation')['10'], 1000.0)
+
 def test_nzd_nodes():
     inp_file = join(ex_datadir,'Net1.inp')
     wn = wntr.network.WaterNetworkModel(inp_file)
@@ -702,5 +1022,61 @@ def test_describe():
                            'Sources': 0, 
                            'Controls': 18})
     
+def test_columnar_storage():
+    inp_file = join(ex_datadir,'Net3.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    wn2 = wntr.network.WaterNetworkModel(inp_file)
+    wn2.enable_columnar_storage()
+    assert_true(wn2.nodes.columnar)
+    assert_true(wn._compare(wn2))
+
+    np.testing.assert_array_equal(wn.nodes.column('elevation'), wn2.nodes.column('elevation'))
+    np.testing.assert_array_equal(wn.links.column('diameter'), wn2.links.column('diameter'))
+    np.testing.assert_array_equal(wn.links.column('status'), wn2.links.column('status'))
+    assert_true(np.isnan(wn2.nodes.column('elevation', ['River'])[0]))
+    np.testing.assert_array_equal(wn.links.column('cv'), wn2.links.column('cv'))
+
+    # queries read the columns
+    for attribute, link_type in [('diameter', wntr.network.Pipe), ('cv', wntr.network.Pipe),
+                                 ('roughness', None), ('status', None)]:
+        assert_series_equal(wn.query_link_attribute(attribute, link_type=link_type),
+                            wn2.query_link_attribute(attribute, link_type=link_type), check_dtype=False)
+    assert_series_equal(wn.query_node_attribute('nominal_pressure', node_type=wntr.network.Junction),
+                        wn2.query_node_attribute('nominal_pressure', node_type=wntr.network.Junction))
+    assert_is_not_none(wn2.links._column_values('diameter', wntr.network.Pipe))
+    assert_equal(wntr.metrics.annual_network_cost(wn), wntr.metrics.annual_network_cost(wn2))
+
+    # the elements hold fewer attributes
+    assert_less(sys.getsizeof(wn2.get_node('10').__dict__), sys.getsizeof(wn.get_node('10').__dict__))
+    assert_less(sys.getsizeof(wn2.get_link('101').__dict__), sys.getsizeof(wn.get_link('101').__dict__))
+
+    # element objects read and write the columns
+    pipe = wn2.get_link('101')
+    assert_not_in('diameter', pipe.__dict__)
+    pipe.diameter = 0.5
+    assert_equal(wn2.links.column('diameter', ['101'])[0], 0.5)
+    wn2.nodes.set_column('elevation', np.arange(wn2.num_nodes, dtype=float))
+    assert_equal(wn2.get_node(wn2.node_name_list[3]).elevation, 3.0)
+    assert_equal(wn2.get_link('101').status, wntr.network.LinkStatus.Open)
+
+    # removed elements keep their values, added elements are attached
+    wn2.remove_link('101')
+    assert_equal(pipe.diameter, 0.5)
+    assert_in('diameter', pipe.__dict__)
+    wn2.add_pipe('new_pipe', '10', '20', diameter=0.2)
+    assert_equal(wn2.links.column('diameter', ['new_pipe'])[0], 0.2)
+
+    sim = wntr.sim.EpanetSimulator(wn)
+    results1 = sim.run_sim()
+    wn3 = wntr.network.WaterNetworkModel(inp_file)
+    wn3.enable_columnar_storage()
+    sim = wntr.sim.EpanetSimulator(wn3)
+    results2 = sim.run_sim()
+    assert_less(abs(results1.node['head'] - results2.node['head']).max().max(), 1e-6)
+
+    wn3.disable_columnar_storage()
+    assert_false(wn3.nodes.columnar)
+    assert_true(wn._compare(wn3))
+
 if __name__ == '__main__':
     unittest.main()
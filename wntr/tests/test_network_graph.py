@@ -21,6 +21,18 @@ def test_weight_graph():
     assert_equal(G.nodes['111']['weight'], 10*0.3048)
     assert_equal(G['159']['161']['177']['weight'], 2000*0.3048)
 
+    class Weights(object):
+        def __init__(self, error):
+            self.error = error
+        def __getitem__(self, name):
+            raise self.error(name)
+
+    # weights that are not found are skipped, other errors propagate
+    G = wn.get_graph(Weights(KeyError), Weights(IndexError))
+    assert_not_in('weight', G.nodes['111'])
+    assert_not_in('weight', G['159']['161']['177'])
+    assert_raises(ValueError, wn.get_graph, Weights(ValueError))
+
 def test_terminal_nodes():
     inp_file = join(netdir,'Net1.inp')
     wn = wntr.network.WaterNetworkModel(inp_file)
@@ -136,5 +148,96 @@ def test_Net1_MultiDiGraph():
     assert_dict_contains_subset(node, G.nodes)
     assert_dict_contains_subset(edge, G.adj)
 
+def test_graph_cache():
+    inp_file = join(netdir,'Net1.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    G1 = wn.get_graph()
+    G1.remove_node('10')
+    G2 = wn.get_graph()
+    assert_is_not(G1, G2)
+    assert_in('10', G2)
+    
+    link_weight = {'10': -1.5, '11': 2.0}
+    G = wn.get_graph(link_weight=link_weight, modify_direction=True)
+    assert_dict_equal(dict(G['11']['10']['10']), {'type': 'Pipe', 'weight': 1.5})
+    assert_dict_equal(dict(G['11']['12']['11']), {'type': 'Pipe', 'weight': 2.0})
+    assert_dict_equal(dict(G['12']['13']['12']), {'type': 'Pipe'})
+    assert_not_in('weight', wn.get_graph().adj['10']['11']['10'])
+    
+    # changes to the model are reflected in the graph
+    wn.get_node('10').coordinates = (1.0, 2.0)
+    assert_equal(wn.get_graph().nodes['10']['pos'], (1.0, 2.0))
+    wn.add_junction('new_junction')
+    wn.add_pipe('new_pipe', 'new_junction', '10')
+    G = wn.get_graph()
+    assert_in('new_pipe', G['new_junction']['10'])
+    assert_equal(G.number_of_edges(), wn.num_links)
+    
+def test_sparse_graph():
+    inp_file = join(netdir,'Net3.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    sparse_graph = wn.get_sparse_graph()
+    assert_list_equal(list(sparse_graph.node_names), wn.node_name_list)
+    assert_list_equal(list(sparse_graph.link_names), wn.link_name_list)
+    assert_equal(sparse_graph.node_index['111'], wn.node_name_list.index('111'))
+    
+    G = wn.get_graph()
+    A = nx.to_scipy_sparse_matrix(G, nodelist=wn.node_name_list)
+    assert_equal((A != sparse_graph.adjacency).nnz, 0)
+    assert_equal((wn.get_incidence_matrix() != sparse_graph.incidence).nnz, 0)
+    link = wn.get_link('177')
+    i = sparse_graph.link_index['177']
+    assert_equal(sparse_graph.node_names[sparse_graph.start_nodes[i]], link.start_node_name)
+    assert_equal(sparse_graph.node_names[sparse_graph.end_nodes[i]], link.end_node_name)
+    
+    assert_is(wn.get_sparse_graph(), sparse_graph)
+    wn.remove_link('177')
+    assert_equal(wn.get_sparse_graph().incidence.shape, (wn.num_nodes, wn.num_links))
+
+def _listed_links_in_simple_paths(G, sources, sinks):
+    # count links by listing all simple paths
+    link_count = dict.fromkeys([name for (node1, node2, name) in G.edges(keys=True)], 0)
+    for sink in sinks:
+        for source in sources:
+            for path in nx.all_simple_paths(G, source, target=sink):
+                for i in range(len(path)-1):
+                    for link in G[path[i]][path[i+1]].keys():
+                        link_count[link] += 1
+    return link_count
+
+def test_links_in_simple_paths():
+    inp_file = join(netdir,'Net3.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    sources = wn.reservoir_name_list + wn.tank_name_list
+    sinks = wn.junction_name_list[0:20]
+    
+    G = wn.get_graph() # has cycles
+    G.add_edge('10', '101', key='parallel')
+    link_count = wntr.metrics.topographic._links_in_simple_paths(G, sources, sinks)
+    assert_equal(link_count.dtype, np.int64)
+    assert_dict_equal(link_count.to_dict(), _listed_links_in_simple_paths(G, sources, sinks))
+    
+    uG = wntr.network.WaterNetworkModel(join(netdir,'Net1.inp')).get_graph().to_undirected()
+    link_count = wntr.metrics.topographic._links_in_simple_paths(uG, ['9'], ['12', '22', '32'])
+    assert_dict_equal(link_count.to_dict(), _listed_links_in_simple_paths(uG, ['9'], ['12', '22', '32']))
+
+def test_links_in_simple_paths_sampled():
+    G = nx.MultiDiGraph()
+    grid = nx.grid_2d_graph(3, 3)
+    for u, v in grid.edges():
+        G.add_edge(str(u), str(v), key=str(u)+'-'+str(v))
+        G.add_edge(str(v), str(u), key=str(v)+'-'+str(u))
+    sources = [str((0, 0))]
+    sinks = [str(node) for node in grid.nodes()]
+    
+    exact = wntr.metrics.topographic._links_in_simple_paths(G, sources, sinks)
+    estimate = wntr.metrics.topographic._links_in_simple_paths(G, sources, sinks, 
+                    max_paths=10, num_samples=5000, seed=123)
+    
+    assert_dict_equal(exact.to_dict(), _listed_links_in_simple_paths(G, sources, sinks))
+    assert_equal(estimate.dtype, np.float64)
+    error = abs(estimate.sum() - exact.sum())/exact.sum()
+    assert_less(error, 0.05)
+    
 if __name__ == '__main__':
     test_weight_graph()
@@ -0,0 +1,105 @@
+from nose.tools import *
+from os.path import abspath, dirname, join
+import numpy as np
+import wntr
+
+testdir = dirname(abspath(str(__file__)))
+datadir = join(testdir,'networks_for_testing')
+netdir = join(testdir,'..','..','examples','networks')
+
+
+def _epanet_scenario(inp_file, inj_node, quality_type):
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    for name, node in wn.nodes():
+        node.initial_quality = 0.0
+    for name in list(wn.source_name_list):
+        wn.remove_source(name)
+    if quality_type == 'CHEM':
+        wn.options.quality.mode = 'CHEMICAL'
+        newpat = wntr.network.elements.Pattern.binary_pattern('NewPattern', 2*3600, 6*3600, wn.options.time.pattern_timestep, wn.options.time.duration)
+        wn.add_pattern(newpat.name, newpat)
+        wn.add_source('Source1', inj_node, 'SETPOINT', 0.1, 'NewPattern')
+    else:
+        wn.options.quality.mode = 'TRACE'
+        wn.options.quality.trace_node = inj_node
+    sim = wntr.sim.EpanetSimulator(wn)
+    results = sim.run_sim()
+    return wn, results
+
+def test_impact_chemical_net3():
+    inp_file = join(netdir,'Net3.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    scenarios = ['121', '15', '123']
+    sim = wntr.sim.ContaminationImpactSimulator(wn)
+    impact = sim.run_sim(scenarios=scenarios, strength=0.1, start_time=2*3600, end_time=6*3600)
+
+    assert_equal(list(impact.impact.index), scenarios)
+    assert_equal(list(impact.impact.columns), wn.junction_name_list)
+
+    for inj_node in scenarios:
+        wn, results = _epanet_scenario(inp_file, inj_node, 'CHEM')
+        demand = results.node['demand'].loc[:,wn.junction_name_list]
+        quality = results.node['quality'].loc[:,wn.junction_name_list]
+        MC = wntr.metrics.mass_contaminant_consumed(demand, quality)
+        MC_cumsum = MC.sum(axis=1).cumsum()
+
+        error = abs((impact.total_impact[inj_node] - MC_cumsum.iloc[-1])/MC_cumsum.iloc[-1])
+        assert_less(error, 0.0001)
+
+        detected = quality > 0
+        for sensor in ['35', '15', '253', '141']:
+            if detected[sensor].any():
+                det_time = detected[sensor].idxmax()
+                assert_equal(impact.detection_time.loc[inj_node, sensor], det_time)
+                assert_almost_equal(impact.impact.loc[inj_node, sensor], MC_cumsum[det_time], 3)
+            else:
+                assert_true(np.isnan(impact.detection_time.loc[inj_node, sensor]))
+                assert_almost_equal(impact.impact.loc[inj_node, sensor], impact.total_impact[inj_node], 6)
+
+def test_impact_trace_net1():
+    inp_file = join(netdir,'Net1.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    sim = wntr.sim.ContaminationImpactSimulator(wn)
+    impact = sim.run_sim(quality_type='TRACE', detection_limit=10, metric='VC')
+
+    for inj_node in ['10', '22', '31']:
+        wn, results = _epanet_scenario(inp_file, inj_node, 'TRACE')
+        quality = results.node['quality'].loc[:,wn.junction_name_list]
+        demand = results.node['demand'].loc[:,wn.junction_name_list]
+        VC = wntr.metrics.volume_contaminant_consumed(demand, quality, 10)
+        assert_almost_equal(impact.total_impact[inj_node], VC.sum().sum(), 3)
+
+        detected = quality > 10
+        det_time = detected.idxmax().astype(float)
+        det_time[~detected.any()] = np.nan
+        np.testing.assert_array_equal(impact.detection_time.loc[inj_node, :].values, det_time.values)
+
+def test_impact_trace_mass_units():
+    inp_file = join(netdir,'Net1.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    sim = wntr.sim.ContaminationImpactSimulator(wn)
+    impact = sim.run_sim(scenarios=['22'], quality_type='TRACE', detection_limit=10, metric='MC')
+    
+    # MC for TRACE is volume consumed times percent source water (m3 %)
+    wn, results = _epanet_scenario(inp_file, '22', 'TRACE')
+    quality = results.node['quality'].loc[:,wn.junction_name_list]
+    demand = results.node['demand'].loc[:,wn.junction_name_list]
+    MC = wntr.metrics.mass_contaminant_consumed(demand, quality, 10)
+    error = abs((impact.total_impact['22'] - MC.sum().sum())/MC.sum().sum())
+    assert_less(error, 0.0001)
+    VC = wntr.metrics.volume_contaminant_consumed(demand, quality, 10)
+    assert_less(impact.total_impact['22'], 100*VC.sum().sum())
+
+def test_impact_processes():
+    inp_file = join(netdir,'Net1.inp')
+    wn = wntr.network.WaterNetworkModel(inp_file)
+    sim = wntr.sim.ContaminationImpactSimulator(wn)
+    impact1 = sim.run_sim(strength=0.1, processes=1)
+    impact2 = sim.run_sim(strength=0.1, processes=2)
+
+    np.testing.assert_array_almost_equal(impact1.impact.values, impact2.impact.values)
+    np.testing.assert_array_equal(impact1.detection_time.values, impact2.detection_time.values)
+
+    long_form = impact1.to_long()
+    assert_equal(list(long_form.columns), ['Scenario', 'Sensor', 'Impact', 'Detection time'])
+    assert_equal(len(long_form), impact1.detection_time.notnull().sum().sum())
@@ -0,0 +1,334 @@
+import unittest
+import json
+import pickle
+import shutil
+import tempfile
+from os.path import abspath, dirname, exists, join
+import numpy as np
+import pandas as pd
+import wntr
+from wntr.sim.results import ElementResults
+
+testdir = dirname(abspath(str(__file__)))
+netdir = join(testdir, '..', '..', 'examples', 'networks')
+
+
+class TestElementResults(unittest.TestCase):
+
+    def _results(self, dtype=np.float64):
+        res = ElementResults(['a', 'b', 'c'], ['head', 'status'], categorical=['status'], dtype=dtype)
+        for i in range(5):
+            res.add_time(i*3600, {'head': [i, i+1, i+2], 'status': [1, 0, 1]})
+        return res
+
+    def test_dataframe_views(self):
+        res = self._results()
+        self.assertEqual(list(res.keys()), ['head', 'status'])
+        head = res['head']
+        self.assertEqual(list(head.index), [0, 3600, 7200, 10800, 14400])
+        self.assertEqual(list(head.columns), ['a', 'b', 'c'])
+        self.assertEqual(head.loc[7200, 'c'], 4)
+        self.assertIs(res['head'], head)
+        self.assertTrue(np.shares_memory(head.values, res.array('head')))
+        self.assertEqual(res['status'].dtypes.iloc[0], np.int8)
+
+        res.add_time(18000, {'head': [5, 6, 7]})
+        self.assertEqual(res['head'].shape, (6, 3))
+        self.assertEqual(res['status'].loc[18000].sum(), 0)
+
+        frame = pd.DataFrame(1.0, index=res.index, columns=res.names)
+        res['quality'] = frame
+        self.assertIs(res['quality'], frame)
+        del res['quality']
+        self.assertNotIn('quality', res)
+
+    def test_dtype(self):
+        res64 = self._results()
+        res32 = self._results(np.float32)
+        self.assertEqual(res32['head'].dtypes.iloc[0], np.float32)
+        res64.compact()
+        res32.compact()
+        self.assertLess(res32.nbytes, res64.nbytes)
+
+    def test_slice(self):
+        res = self._results()
+        part = res.slice(3600, 10800)
+        self.assertEqual(list(part.index), [3600, 7200, 10800])
+        self.assertTrue(np.shares_memory(part.array('head'), res.array('head')))
+        part = res.slice(names=['c', 'a'])
+        self.assertEqual(list(part['head'].columns), ['c', 'a'])
+        np.testing.assert_array_equal(part['head'].values, res['head'][['c', 'a']].values)
+
+    def test_append(self):
+        res = self._results()
+        res.reserve(12)
+        data = res._data
+        other = ElementResults(['c', 'b', 'a'], ['status', 'head'], categorical=['status'])
+        for i in range(4, 9):
+            other.add_time(i*3600, {'head': [i+2, i+1, i], 'status': [0, 1, 1]})
+        res.append(other)
+        self.assertIs(res._data, data)
+        self.assertEqual(list(res.index), [i*3600 for i in range(9)])
+        np.testing.assert_array_equal(res['head']['a'].values, np.arange(9))
+        self.assertEqual(list(res['status'].loc[28800]), [1, 1, 0])
+
+        self.assertRaises(ValueError, res.append, other)
+        other = ElementResults(['a', 'b'], ['head', 'status'], times=[32400])
+        self.assertRaises(ValueError, res.append, other)
+        other = ElementResults(['a', 'b', 'c'], ['head'], times=[32400])
+        self.assertRaises(ValueError, res.append, other)
+
+    def test_pickle(self):
+        res = self._results()
+        res['head']
+        copy = pickle.loads(pickle.dumps(res))
+        self.assertEqual(list(copy.keys()), ['head', 'status'])
+        pd.testing.assert_frame_equal(copy['head'], res['head'])
+
+    def test_simulators(self):
+        inp_file = join(netdir, 'Net1.inp')
+        wn = wntr.network.WaterNetworkModel(inp_file)
+        wn.options.time.duration = 4*3600
+        sim = wntr.sim.WNTRSimulator(wn)
+        results = sim.run_sim(results_dtype=np.float32)
+        self.assertIsInstance(results.node, ElementResults)
+        self.assertEqual(results.node['pressure'].shape, (5, wn.num_nodes))
+        self.assertEqual(results.node['pressure'].dtypes.iloc[0], np.float32)
+        self.assertEqual(results.link['status'].dtypes.iloc[0], np.int8)
+
+        sim = wntr.sim.EpanetSimulator(wn)
+        results = sim.run_sim(file_prefix=join(testdir, 'temp_results'))
+        self.assertIsInstance(results.link, ElementResults)
+        self.assertEqual(list(results.link['flowrate'].columns), wn.link_name_list)
+
+
+class TestSaveLoad(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        inp_file = join(netdir, 'Net3.inp')
+        self.wn = wntr.network.WaterNetworkModel(inp_file)
+        sim = wntr.sim.EpanetSimulator(self.wn)
+        self.results = sim.run_sim(file_prefix=join(testdir, 'temp_results'))
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _assert_equal(self, results1, results2):
+        for group in ['node', 'link']:
+            self.assertEqual(list(getattr(results1, group)), list(getattr(results2, group)))
+            for key in getattr(results1, group):
+                pd.testing.assert_frame_equal(getattr(results1, group)[key], getattr(results2, group)[key])
+
+    def test_round_trip(self):
+        self.results.save(self.path, provenance={'scenario': 'base'})
+        results = wntr.sim.SimulationResults.load(self.path)
+        self._assert_equal(self.results, results)
+        self.assertIsInstance(results.node.array('pressure'), np.memmap)
+        self.assertEqual(results.provenance['scenario'], 'base')
+        self.assertEqual(results.provenance['units'], 'SI')
+        self.assertEqual(results.provenance['wntr_version'], wntr.__version__)
+        self.assertEqual(results.timestamp, self.results.timestamp)
+        self.assertTrue(results.network_name.endswith('temp_results.inp'))
+
+        results = wntr.sim.SimulationResults.load(self.path, mmap=False)
+        self.assertNotIsInstance(results.node.array('pressure'), np.memmap)
+        self._assert_equal(self.results, results)
+
+    def test_partial_load(self):
+        self.results.save(self.path, chunk_size=100, compress=True)
+        results = wntr.sim.SimulationResults.load(self.path)
+        self._assert_equal(self.results, results)
+
+        nodes = ['123', '10', 'River']
+        results = wntr.sim.SimulationResults.load(self.path, variables=['pressure', 'status'], 
+                    elements={'node': nodes, 'link': ['335']}, time=(80*3600, 90*3600))
+        self.assertEqual(list(results.node), ['pressure'])
+        self.assertEqual(list(results.link), ['status'])
+        pd.testing.assert_frame_equal(results.node['pressure'], 
+                                      self.results.node['pressure'].loc[80*3600:90*3600, nodes])
+        pd.testing.assert_frame_equal(results.link['status'], 
+                                      self.results.link['status'].loc[80*3600:90*3600, ['335']])
+
+    def test_dataframes(self):
+        results = wntr.sim.SimulationResults()
+        results.node = {key: self.results.node[key] for key in self.results.node}
+        results.link = {key: self.results.link[key] for key in self.results.link}
+        results.node['quality'] = results.node['quality'] * 2
+        results.save(self.path)
+        self._assert_equal(results, wntr.sim.SimulationResults.load(self.path))
+
+
+def _net3(duration):
+    wn = wntr.network.WaterNetworkModel(join(netdir, 'Net3.inp'))
+    wn.options.time.duration = duration
+    return wn
+
+
+class TestSinks(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        sim = wntr.sim.WNTRSimulator(_net3(12*3600))
+        self.results = sim.run_sim()
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_sinks(self):
+        times = []
+        summary = wntr.sim.SummarySink(quantiles=[0.5], variables=['pressure', 'flowrate'])
+        sim = wntr.sim.WNTRSimulator(_net3(12*3600))
+        results = sim.run_sim(sinks=[wntr.sim.DiskSink(self.path, chunk_size=10), summary,
+                                     lambda time, node, link: times.append(time)])
+        self.assertIsNone(results.node)
+        self.assertEqual(times, list(self.results.node['pressure'].index))
+
+        saved = wntr.sim.SimulationResults.load(self.path)
+        for group in ['node', 'link']:
+            for key in getattr(self.results, group):
+                pd.testing.assert_frame_equal(getattr(saved, group)[key], getattr(self.results, group)[key])
+
+        self.assertEqual(list(summary.node), ['pressure'])
+        self.assertEqual(list(summary.link), ['flowrate'])
+        pressure = self.results.node['pressure']
+        np.testing.assert_allclose(summary.node['pressure'].loc['min'], pressure.min())
+        np.testing.assert_allclose(summary.node['pressure'].loc['max'], pressure.max())
+        np.testing.assert_allclose(summary.node['pressure'].loc['mean'], pressure.mean())
+        self.assertEqual(list(summary.node['pressure'].index), ['min', 'max', 'mean', '50%'])
+
+    def test_append_slice(self):
+        sim = wntr.sim.WNTRSimulator(_net3(6*3600))
+        results = sim.run_sim()
+        results.reserve(len(self.results.node['head']))
+        sim._wn.options.time.duration = 12*3600
+        results.append(sim.run_sim())
+        for group in ['node', 'link']:
+            for key in getattr(self.results, group):
+                pd.testing.assert_frame_equal(getattr(results, group)[key], getattr(self.results, group)[key],
+                                              check_less_precise=6)
+
+        window = results.slice(3600, 7200)
+        self.assertEqual(list(window.node['pressure'].index), [3600, 4500, 5400, 6300, 7200])
+        self.assertTrue(np.shares_memory(window.link.array('flowrate'), results.link.array('flowrate')))
+        self.assertRaises(ValueError, results.append, window)
+
+    def test_report_selection(self):
+        sim = wntr.sim.WNTRSimulator(_net3(12*3600))
+        results = sim.run_sim(report_nodes=['123', '10', 'River'], report_links='NONE', 
+                              report_variables=['pressure', 'flow'])
+        self.assertEqual(list(results.node), ['pressure'])
+        self.assertEqual(list(results.link), ['flowrate'])
+        self.assertEqual(results.link['flowrate'].shape, (len(self.results.link['flowrate']), 0))
+        pd.testing.assert_frame_equal(results.node['pressure'], 
+                                      self.results.node['pressure'][['10', '123', 'River']])
+
+        sim = wntr.sim.WNTRSimulator(_net3(3600))
+        results = sim.run_sim(report_nodes=False, report_links=['10', '335'], report_variables=['status'])
+        self.assertEqual(list(results.link), ['status'])
+        pd.testing.assert_frame_equal(results.link['status'], 
+                                      self.results.link['status'].loc[:3600, ['10', '335']])
+
+        sim = wntr.sim.WNTRSimulator(_net3(3600))
+        self.assertRaises(ValueError, sim.run_sim, report_nodes=['not a node'])
+        self.assertRaises(ValueError, sim.run_sim, report_variables=['quality'])
+
+    def test_p2_quantile(self):
+        x = np.random.RandomState(42).normal(size=(5000, 3))
+        quantile = wntr.sim.sinks.P2Quantile(0.9, 3)
+        quantile.add(x[0])
+        self.assertEqual(quantile.value[0], x[0, 0])
+        for row in x[1:]:
+            quantile.add(row)
+        np.testing.assert_allclose(quantile.value, np.percentile(x, 90, axis=0), atol=0.05)
+
+
+class TestEnsemble(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        self.results = []
+        for multiplier in [1.0, 1.5, 2.0, 2.5, 3.0, 4.0]:
+            wn = _net3(4*3600)
+            for name, junction in wn.junctions():
+                junction.demand_timeseries_list[0].base_value *= multiplier
+            sim = wntr.sim.WNTRSimulator(wn, mode='PDD')
+            self.results.append(sim.run_sim())
+        self.wn = _net3(4*3600)
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_reductions(self):
+        expected_demand = wntr.metrics.expected_demand(self.wn)[self.wn.junction_name_list]
+        def wsa(results):
+            demand = results.node['demand'][self.wn.junction_name_list]
+            return wntr.metrics.water_service_availability(expected_demand, demand)
+
+        ensemble = wntr.sim.EnsembleResults({'pressure': None, 'flowrate': None, 'wsa': wsa},
+                                            quantiles=[0.5], store=self.path,
+                                            thresholds={'pressure': [(np.less, 20)]})
+        for results in self.results:
+            ensemble.add(results)
+        self.assertEqual(len(ensemble), 6)
+        self.assertRaises(ValueError, ensemble.add, self.results[0], 0)
+
+        # the metadata is written once, when flushed
+        metadata_file = join(self.path, 'metadata.json')
+        self.assertFalse(exists(metadata_file))
+        ensemble.flush()
+        with open(metadata_file) as f:
+            metadata = json.load(f)
+        self.assertEqual(metadata['scenarios'], list(range(6)))
+        self.assertEqual(metadata['times'], ensemble.times.tolist())
+        self.assertEqual(list(metadata['variables']), ['pressure', 'flowrate', 'wsa'])
+        self.assertEqual(metadata['variables']['wsa']['names'], self.wn.junction_name_list)
+
+        pressure =np.stack([results.node['pressure'].values for results in self.results])
+        np.testing.assert_array_equal(ensemble.stack('pressure'), pressure)
+        np.testing.assert_allclose(ensemble.mean('pressure').values, pressure.mean(axis=0))
+        np.testing.assert_allclose(ensemble.std('pressure').values, pressure.std(axis=0, ddof=1))
+        np.testing.assert_allclose(ensemble.min('pressure').values, pressure.min(axis=0))
+        np.testing.assert_allclose(ensemble.max('pressure').values, pressure.max(axis=0))
+        np.testing.assert_allclose(ensemble.quantile('pressure', 0.9).values,
+                                   np.percentile(pressure, 90, axis=0))
+        self.assertEqual(list(ensemble.mean('flowrate').columns), self.results[0].link['flowrate'].columns.tolist())
+
+        probability = ensemble.exceedance_probability('pressure', np.less, 20)
+        np.testing.assert_allclose(probability.values, (pressure < 20).mean(axis=0))
+        np.testing.assert_allclose(ensemble.exceedance_probability('pressure', np.greater, 50).values,
+                                   (pressure > 50).mean(axis=0))
+
+        pop = wntr.metrics.population(self.wn)
+        impacted = ensemble.population_impacted(pop, 'wsa', np.less, 0.9)
+        expected = np.mean([wntr.metrics.population_impacted(pop, wsa(results), np.less, 0.9).values
+                            for results in self.results], axis=0)
+        np.testing.assert_allclose(impacted.values, expected)
+
+    def test_summaries_only(self):
+        ensemble = wntr.sim.EnsembleResults(['pressure'], quantiles=[0.5])
+        for results in self.results:
+            ensemble.add(results)
+        self.assertRaises(ValueError, ensemble.stack, 'pressure')
+        self.assertRaises(ValueError, ensemble.quantile, 'pressure', 0.9)
+        self.assertEqual(ensemble.quantile('pressure', 0.5).shape, self.results[0].node['pressure'].shape)
+
+        results = wntr.sim.SimulationResults()
+        results.node = {'pressure': self.results[0].node['pressure'].iloc[:, :10]}
+        self.assertRaises(ValueError, ensemble.add, results)
+        results.node = {'pressure': self.results[0].node['pressure'].iloc[:, ::-1]}
+        ensemble.add(results)
+        self.assertEqual(len(ensemble), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()